@@ -37,6 +37,15 @@ def create_app():
     config_instance = Config()
     config_instance.log_configuration()
 
+    # Open the minimum pooled connections in the background so the first requests skip the TLS handshake
+    from app.database import DatabaseManager
+    import threading
+    threading.Thread(target=DatabaseManager.get_pool().warm, name='db-pool-warm', daemon=True).start()
+
+    # Typeahead index over active employees, built in the background
+    from app.database.employee_search import employee_search
+    employee_search.start()
+
     # Import logging utilities
     from app.logging_utils import (
         log_page_access, 
@@ -110,6 +119,22 @@ def create_app():
             
         return response
 
+    # One database connection per request, committed once after the view succeeds
+    @app.after_request
+    def commit_database(response):
+        if response.status_code >= 500:
+            return response
+        try:
+            DatabaseManager.commit_request()
+        except Exception as e:
+            app.logger.error(f"Commit at end of request failed: {e}")
+            return app.response_class("Could not save changes. Please try again.", status=500)
+        return response
+
+    @app.teardown_request
+    def release_database(error=None):
+        DatabaseManager.release_request(error)
+
     # Register blueprints with logging
     from app.auth import auth_bp
     from app.admin import admin_bp
@@ -119,6 +144,7 @@ def create_app():
     from app.users import users_bp
     from app.finance import finance_bp
     from app.face import face_bp
+    from app.media import media_bp
      
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
@@ -128,6 +154,7 @@ def create_app():
     app.register_blueprint(contractors_bp, url_prefix='/admin/contractors')    
     app.register_blueprint(users_bp, url_prefix='/admin/users')
     app.register_blueprint(face_bp)
+    app.register_blueprint(media_bp)
 
     # Register error handlers
     from app.utils import register_error_handlers, inject_user_context
@@ -3,6 +3,9 @@ import logging
 from . import admin_bp
 from app.auth.decorators import require_auth, require_role
 from app.database import DatabaseManager
+from app.database.wage_snapshot import wage_snapshots
+from app.database.wage_listings import payments_page
+from app.database.dashboard_stats import dashboard_stats, empty_stats
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -13,20 +16,12 @@ logger = logging.getLogger(__name__)
 def dashboard():
     """Admin dashboard with access to all tables"""
     try:
-        stats = {
-            'employees': DatabaseManager.execute_query("SELECT COUNT(*) FROM Employee", fetch_one=True),
-            'contractors': DatabaseManager.execute_query("SELECT COUNT(*) FROM Contractor", fetch_one=True),
-            'users': DatabaseManager.execute_query("SELECT COUNT(*) FROM [User]", fetch_one=True)
-        }
-        
-        stats = {k: v[0] if v else 0 for k, v in stats.items()}
-        
-        return render_template('admin/admin_dashboard.html', stats=stats)
+        return render_template('admin/admin_dashboard.html', stats=dashboard_stats.get())
     
     except Exception as e:
         logger.error(f"Error in admin dashboard: {e}")
         flash('Error loading dashboard data.', 'error')
-        return render_template('admin/admin_dashboard.html', stats={'employees': 0, 'contractors': 0, 'users': 0})
+        return render_template('admin/admin_dashboard.html', stats=empty_stats())
     
 #Author: Abrar ul Hassan, Comment: View Page Employee Payment View, Created At: 09-01-2025
 @admin_bp.route('/ViewEmployePayment')
@@ -42,54 +37,14 @@ def viewPaymentLabour():
 @require_auth
 @require_role(["cashier:paid"])
 def get_employees_payment():
-    conn = DatabaseManager.get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    SELECT 
-        NucleusId, 
-        ContractorId, 
-        LabourName, 
-        ContractorName, 
-        UpdatedAt, 
-        Amount,
-        UnitId, 
-        IsPaid, 
-        VerifyType,
-        CASE 
-            WHEN UnitId = 1 THEN 'C4'
-            WHEN UnitId = 2 THEN 'E-38'
-            WHEN UnitId = 3 THEN 'B44'
-            ELSE 'Unknown'
-        END AS UnitName
-    FROM WagesUpload
-    WHERE cast(CreatedAt AS DATE) = (
-        SELECT MAX(cast(CreatedAt AS DATE)) 
-        FROM WagesUpload 
-        WHERE UnitId = ?
-    )
-    AND UnitId = ?
-    AND UpdatedAt IS NOT NULL
-    ORDER BY 
-        CASE WHEN IsPaid = 1 THEN 1 ELSE 0 END,  -- unpaid first
-        UpdatedAt DESC;  
-""", (session['cashier_unit'], session['cashier_unit']))
-
-    rows = cursor.fetchall()
-
-    employees = []
-    for row in rows:
-        employees.append({
-            "NucleusId": row.NucleusId,
-            "LabourName": row.LabourName,
-            "ContractorName": row.ContractorName,
-            "Amount": row.Amount,
-            "Date": row.UpdatedAt.strftime("%Y-%m-%d %H:%M:%S") if row.UpdatedAt else None,
-            "Unit": row.UnitName,
-            "IsPaid": row.IsPaid,
-        })
+    """DataTables page of the unit's current batch rows a cashier has updated, unpaid first"""
+    try:
+        return jsonify(payments_page(request.args, session['cashier_unit']))
+    except Exception as e:
+        logger.error(f"Error loading employee payments: {e}")
+        return jsonify({"draw": request.args.get("draw", type=int, default=0),
+                        "error": "Error loading employee payments"}), 500
 
-    return jsonify(employees)
 #Author: Abrar ul Hassan, Comment: Update Wages Payment Confirm ispaid =1, Created At: 09-09-2025
 @admin_bp.route("/api/get_employeesPayment",methods=["POST"])
 @require_auth
@@ -101,17 +56,27 @@ def PyamentConfirm():
         data = request.get_json()
         NucleusId = data.get("NucleusId")
         IsPaid = data.get("isPaid")
-        cursor.execute("""
+        # Paying is checked against the row itself, not a cached page: a second confirm must not pay twice
+        unpaid_only = "AND (IsPaid = 0 OR IsPaid IS NULL)" if IsPaid else ""
+        cursor.execute(f"""
     update WagesUpload set IsPaid = ?,
     UpdatedAt = ?, 
     UpdatedBy = ?
     where NucleusId = ? AND UnitId = ?
-    AND CreatedAt = (
-    SELECT MAX(CreatedAt) 
-    FROM WagesUpload wu 
-    WHERE wu.NucleusId = WagesUpload.NucleusId )
-""", (IsPaid, datetime.now(), session['user_id'], NucleusId, session['cashier_unit'],))
+    AND BatchId = (
+    SELECT TOP 1 wb.Id
+    FROM WagesUpload wu
+    INNER JOIN WageBatch wb ON wb.Id = wu.BatchId
+    WHERE wu.NucleusId = ?
+    ORDER BY wb.BatchDate DESC, wu.CreatedAt DESC )
+    {unpaid_only}
+""", (IsPaid, datetime.now(), session['user_id'], NucleusId, session['cashier_unit'], NucleusId,))
+        if cursor.rowcount == 0:
+            message = "Wages already paid for this employee" if IsPaid else "No wages record found for this employee"
+            return jsonify({"success": False, "message": message}), 409
         conn.commit()
+        unit_id = session['cashier_unit']
+        DatabaseManager.after_commit(lambda: wage_snapshots.mark_paid(unit_id, NucleusId, bool(IsPaid)))
         return jsonify({"success": True, "message": "Payment confirmed"})
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -120,3 +85,11 @@ def PyamentConfirm():
         conn.close()
         
 
+
+
+@admin_bp.route("/api/db-pool-stats")
+@require_auth
+@require_role(["admin"])
+def db_pool_stats():
+    """Connection pool metrics of the worker process serving this request"""
+    return jsonify(DatabaseManager.pool_stats())
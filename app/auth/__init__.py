@@ -74,7 +74,7 @@ def require_auth(f):
     """Decorator to require authentication with comprehensive logging"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from app.database import DatabaseManager
+        from app.auth.user_cache import get_user
         from flask import current_app
         
         # Log access attempt
@@ -147,11 +147,7 @@ def require_auth(f):
         
         # Verify user still exists
         try:
-            user = DatabaseManager.execute_query(
-                "SELECT Id, Email, Type FROM [User] WHERE Id = ?",
-                (session['user_id'],),
-                fetch_one=True
-            )
+            user = get_user(session['user_id'])
             
             if not user:
                 logger.warning(f"User {session.get('email')} no longer exists in database")
@@ -9,7 +9,7 @@ def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from app.database import DatabaseManager
+        from app.auth.user_cache import get_user
         from flask import current_app
         
         if 'user_id' not in session or 'user_type' not in session:
@@ -41,11 +41,7 @@ def require_auth(f):
         session['last_activity'] = datetime.now()
         
         # Verify user still exists
-        user = DatabaseManager.execute_query(
-            "SELECT Id, Email, Type FROM [User] WHERE Id = ?",
-            (session['user_id'],),
-            fetch_one=True
-        )
+        user = get_user(session['user_id'])
         
         if not user:
             logger.warning(f"User {session.get('email')} no longer exists in database")
@@ -0,0 +1,78 @@
+"""In-process cache of the user row checked by require_auth on every request.
+
+Entries expire after USER_CACHE_TTL seconds. Creating or deleting a user
+clears the local cache and bumps a version stamp file shared by all
+worker processes; each worker checks the stamp at most once a second and
+drops its cache when it changed, so deletions propagate within seconds.
+"""
+
+import threading
+import time
+from typing import Optional, Tuple
+
+from config import Config
+from app.database import DatabaseManager
+from app.database.version_stamp import VersionStamp
+
+class UserCache:
+    """TTL cache of (Id, Email, Type) rows keyed by user id"""
+
+    def __init__(self, ttl: float = Config.USER_CACHE_TTL, version_path: str = Config.USER_CACHE_VERSION_FILE,
+                 check_interval: float = 1.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stamp = VersionStamp(version_path, check_interval)
+
+    def _sync_version(self) -> None:
+        """Drop everything if another worker bumped the version stamp"""
+        if self._stamp.changed():
+            with self._lock:
+                self._entries.clear()
+
+    def get(self, user_id) -> Optional[Tuple]:
+        self._sync_version()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            row, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[user_id]
+                return None
+            return row
+
+    def set(self, user_id, row: Tuple) -> None:
+        with self._lock:
+            self._entries[user_id] = (row, time.monotonic() + self.ttl)
+
+    def invalidate(self, user_id=None) -> None:
+        """Forget one user (or all) here and tell the other workers through the version stamp"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+        if self._stamp.bump():
+            # Another worker changed users we have not caught up with yet
+            with self._lock:
+                self._entries.clear()
+
+user_cache = UserCache()
+
+def get_user(user_id) -> Optional[Tuple]:
+    """(Id, Email, Type) of an existing user, served from the cache when fresh"""
+    row = user_cache.get(user_id)
+    if row is not None:
+        return row
+
+    user = DatabaseManager.execute_query(
+        "SELECT Id, Email, Type FROM [User] WHERE Id = ?",
+        (user_id,),
+        fetch_one=True
+    )
+    if user:
+        row = tuple(user)
+        user_cache.set(user_id, row)
+        return row
+    return None
@@ -1,5 +1,6 @@
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from app.face.image_ingest import ingest_photo
 
 class ContractorForm:
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png'}
@@ -25,11 +26,11 @@ class ContractorForm:
         Address = form_data.get('Address', '').strip()
         IsActive = 'IsActive' in form_data
 
-        # Read image file as binary
+        # Normalize the photo once here so only the compact version is stored
         image_file = file_data.get('ProfileImage')
         image_binary = None
         if image_file and ContractorForm.allowed_file(image_file.filename):
-            image_binary = image_file.read()  # read binary data
+            image_binary = ingest_photo(image_file.read(), compute_encoding=False).photo
 
         return {
             'ContractorId': ContractorId,
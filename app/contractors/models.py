@@ -1,7 +1,9 @@
 from app.database import DatabaseManager
+from app.database.blob_store import store_image
+from app.database.listing import Listing, Column, NUMBER, PREFIX
+from app.database.employee_search import employee_search
 from datetime import datetime
 import logging
-import base64  # ✅ Import for base64 encoding
 
 logger = logging.getLogger(__name__)
 
@@ -14,60 +16,30 @@ class ContractorModel:
             SELECT Id, Name FROM Unit
         """, fetch_all=True)
     
+    LISTING = Listing(
+        source="""
+            Contractor c
+            LEFT JOIN [Unit] u ON c.UnitId = u.Id
+        """,
+        columns=[
+            Column('Id', 'c.Id'),
+            Column('ContractorId', 'c.ContractorId', sort='ISNULL(c.ContractorId, 0)', search=NUMBER),
+            Column('Name', 'c.Name', sort="ISNULL(c.Name, '')", search=PREFIX),
+            Column('FatherName', 'c.FatherName', sort="ISNULL(c.FatherName, '')", search=PREFIX),
+            Column('PhoneNo', 'c.PhoneNo', search=PREFIX),
+            Column('UnitName', 'u.Name', sort="ISNULL(u.Name, '')"),
+            Column('HasImage', 'CASE WHEN DATALENGTH(c.Image) > 0 OR c.ImageHash IS NOT NULL THEN 1 ELSE 0 END'),
+            Column('Address', 'c.Address'),
+            Column('IsActive', 'c.IsActive', sort='c.IsActive'),
+        ],
+        key='c.Id',
+        default_order=[("ISNULL(c.Name, '')", 'asc')],
+    )
+
     @staticmethod
-    def get_all():
-        """Get all contractors with base64-encoded profile image"""
-        try:
-            raw_contractors = DatabaseManager.execute_query("""
-                  SELECT c.Id, c.ContractorId, c.Name, c.FatherName, c.PhoneNo, u.Name,
-                    c.Image, c.Address, c.IsActive,
-                    u1.Email as CreatedByEmail, c.CreatedAt,
-                    u2.Email as UpdatedByEmail, c.UpdatedAt
-                FROM Contractor c
-                LEFT JOIN [Unit] u ON c.UnitId = u.Id
-                LEFT JOIN [User] u1 ON c.CreatedBy = u1.Id
-                LEFT JOIN [User] u2 ON c.UpdatedBy = u2.Id
-                ORDER BY c.Name
-            """, fetch_all=True)
-            
-            contractors = []
-            for con in raw_contractors:
-                image_data = None
-                # Check if image exists and handle potential None/NULL values
-                if con[6] is not None and len(con[6]) > 0:
-                    try:
-                        # Ensure the image data is in bytes format
-                        if isinstance(con[6], str):
-                            # If it's already a string, assume it's base64
-                            image_data = "data:image/jpeg;base64," + con[6]
-                        else:
-                            # If it's bytes, encode it
-                            image_data = "data:image/jpeg;base64," + base64.b64encode(con[6]).decode('utf-8')
-                    except Exception as img_error:
-                        print(f"Error processing image for contractor {con[0]}: {img_error}")
-                        image_data = None
-                
-                contractors.append((
-                    con[0],  # Id
-                    con[1],  # ContractorId
-                    con[2],  # Name
-                    con[3],  # FatherName
-                    con[4],  # PhoneNo
-                    con[5],  # Unit
-                    image_data,  # Base64 Profile Image
-                    con[7],  # Address
-                    con[8],  # IsActive
-                    con[9],  # CreatedByEmail
-                    con[10],  # CreatedAt
-                    con[11], # UpdatedByEmail
-                    con[12], # UpdatedAt
-                ))
-            
-            return contractors
-            
-        except Exception as e:
-            print(f"Error in get_all(): {e}")
-            return []
+    def page(args):
+        """One DataTables page of contractors; HasImage flags a stored photo, served lazily by the media endpoint"""
+        return ContractorModel.LISTING.page(args)
         
      
     @staticmethod
@@ -80,12 +52,13 @@ class ContractorModel:
 
     @staticmethod
     def get_by_id(contractor_id):
-        """Get contractor by ID"""
-        return DatabaseManager.execute_query(
-            "SELECT * FROM Contractor WHERE Id = ?",
-            (contractor_id,),
-            fetch_one=True
-        )
+        """Get contractor by ID; column 6 flags a stored photo instead of carrying it"""
+        return DatabaseManager.execute_query("""
+            SELECT Id, ContractorId, Name, FatherName, PhoneNo, UnitId,
+                   CASE WHEN DATALENGTH(Image) > 0 OR ImageHash IS NOT NULL THEN 1 ELSE 0 END AS HasImage,
+                   Address, IsActive
+            FROM Contractor WHERE Id = ?
+        """, (contractor_id,), fetch_one=True)
     
     @staticmethod
     def exists_Contractor_Id(contractor_id):
@@ -101,12 +74,13 @@ class ContractorModel:
     @staticmethod
     def create(data, created_by):
         """Create new contractor"""
+        image, image_hash = store_image(data['ProfileImage'])
         return DatabaseManager.execute_query("""
-            INSERT INTO Contractor (ContractorId, Name, FatherName, PhoneNo, UnitId, Image, Address, IsActive, CreatedBy, CreatedAt)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO Contractor (ContractorId, Name, FatherName, PhoneNo, UnitId, Image, ImageHash, Address, IsActive, CreatedBy, CreatedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             data['ContractorId'], data['Name'], data['FatherName'], data['PhoneNumber'],
-            data['Unit'], data['ProfileImage'], data['Address'], data['IsActive'], created_by, datetime.now()
+            data['Unit'], image, image_hash, data['Address'], data['IsActive'], created_by, datetime.now()
         ))
     
     @staticmethod
@@ -115,19 +89,20 @@ class ContractorModel:
          
 
         if data['ProfileImage']:  # If a new image is provided
-            return DatabaseManager.execute_query("""
+            image, image_hash = store_image(data['ProfileImage'])
+            success = DatabaseManager.execute_query("""
                 UPDATE Contractor
                 SET Name = ?, FatherName = ?, 
-                    PhoneNo = ?, UnitId = ?, Image = ?, Address = ?, 
+                    PhoneNo = ?, UnitId = ?, Image = ?, ImageHash = ?, Address = ?, 
                     IsActive = ?, UpdatedBy = ?, UpdatedAt = ?
                 WHERE Id = ?
             """, (
                 data['Name'], data['FatherName'], data['PhoneNumber'],
-                data['Unit'], data['ProfileImage'], data['Address'],
+                data['Unit'], image, image_hash, data['Address'],
                 data['IsActive'], updated_by, datetime.now(), contractor_id
             ))
         else:  # Keep the existing image
-            return DatabaseManager.execute_query("""
+            success = DatabaseManager.execute_query("""
                 UPDATE Contractor
                 SET Name = ?, FatherName = ?, 
                     PhoneNo = ?, UnitId = ?, Address = ?, 
@@ -138,6 +113,10 @@ class ContractorModel:
                 data['Unit'], data['Address'],
                 data['IsActive'], updated_by, datetime.now(), contractor_id
             ))
+        if success:
+            # Employee search suggestions show the contractor's name
+            DatabaseManager.after_commit(employee_search.invalidate)
+        return success
 
         
     @staticmethod
@@ -1,9 +1,10 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, jsonify
 import logging
 from . import contractors_bp
 from .models import ContractorModel
 from .forms import ContractorForm
 from app.auth.decorators import require_auth, require_role
+from app.face.exceptions import FaceEncodingError
 
 logger = logging.getLogger(__name__)
 
@@ -11,16 +12,27 @@ logger = logging.getLogger(__name__)
 @require_auth
 @require_role(['admin','hr'])
 def list_contractors():
-    """List all contractors"""
+    """List all contractors; the table itself is paged through contractors_data"""
     try:
-        contractors = ContractorModel.get_all()
         units = ContractorModel.get_unit()
-        return render_template('contractors/contractors.html', contractors=contractors ,units=units)
+        return render_template('contractors/contractors.html', units=units)
     
     except Exception as e:
         logger.error(f"Error in list_contractors: {e}")
         flash('Error loading contractor data.', 'error')
-        return render_template('contractors/contractors.html', contractors=[])
+        return render_template('contractors/contractors.html', units=[])
+
+@contractors_bp.route('/data')
+@require_auth
+@require_role(['admin','hr'])
+def contractors_data():
+    """DataTables server-side page of the contractor list"""
+    try:
+        return jsonify(ContractorModel.page(request.args))
+    except Exception as e:
+        logger.error(f"Error in contractors_data: {e}")
+        return jsonify({'draw': request.args.get('draw', type=int, default=0),
+                        'error': 'Error loading contractor data.'}), 500
 
 @contractors_bp.route('/add', methods=['POST'])
 @require_auth
@@ -45,6 +57,8 @@ def add_contractor():
         else:
             flash('Error adding contractor. Please try again.', 'error')
             
+    except FaceEncodingError as e:
+        flash(f'Photo rejected: {e}', 'error')
     except Exception as e:
         logger.error(f"Error adding contractor: {e}")
         flash('An unexpected error occurred.', 'error')
@@ -97,6 +111,8 @@ def edit_contractor(contractor_id):
             else:
                 flash('Error updating contractor. Please try again.', 'error')
 
+        except FaceEncodingError as e:
+            flash(f'Photo rejected: {e}', 'error')
         except Exception as e:
             logger.error(f"Error updating contractor: {e}")
             flash('An unexpected error occurred.', 'error')
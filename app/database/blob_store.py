@@ -0,0 +1,183 @@
+"""Content-addressed on-disk store for employee and contractor photos.
+
+When BLOB_STORE_ENABLED is set, new photos are written to disk under
+<BLOB_STORE_DIR>/<aa>/<bb>/<sha256> and the database keeps only the hash
+in ImageHash (Image stays NULL). Rows written before the store was enabled
+keep their varbinary Image and are read exactly as before.
+
+Usage:
+    python -m app.database.blob_store migrate [--batch 200]   # move existing Image blobs to disk
+    python -m app.database.blob_store gc [--grace-hours 24]   # delete files no row references
+"""
+
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import time
+from typing import Iterable, Optional, Set, Tuple
+
+from config import Config
+from .connection import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+class BlobStore:
+    """Immutable files named by the SHA-256 of their content"""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, content_hash[:2], content_hash[2:4], content_hash)
+
+    def exists(self, content_hash: str) -> bool:
+        return os.path.exists(self.path(content_hash))
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its hash; identical content is stored once"""
+        content_hash = self.hash_bytes(data)
+        path = self.path(content_hash)
+        if os.path.exists(path):
+            # Refresh the mtime so a concurrent sweep treats the reused blob as recent
+            os.utime(path)
+            return content_hash
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file in the same directory, then rename: readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return content_hash
+
+    def read(self, content_hash: str) -> Optional[mmap.mmap]:
+        """Read-only memory map of a blob (bytes-like, usable with np.frombuffer); None if missing"""
+        try:
+            with open(self.path(content_hash), 'rb') as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty files cannot be mapped
+            return None
+
+    def iter_hashes(self) -> Iterable[Tuple[str, str]]:
+        """Yield (hash, path) for every stored blob"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    yield name, os.path.join(root, name)
+
+    def sweep(self, referenced: Set[str], grace_seconds: int = 24 * 3600) -> Tuple[int, int]:
+        """Delete blobs no row references; recent files are kept so in-flight writes are not lost"""
+        cutoff = time.time() - grace_seconds
+        removed = kept = 0
+        for content_hash, path in self.iter_hashes():
+            if content_hash in referenced or os.path.getmtime(path) > cutoff:
+                kept += 1
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove blob {content_hash}: {e}")
+        return removed, kept
+
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> Optional[BlobStore]:
+    """The configured store, or None when photos stay in the database"""
+    global _blob_store
+    if not Config.BLOB_STORE_ENABLED:
+        return None
+    if _blob_store is None:
+        _blob_store = BlobStore(Config.BLOB_STORE_DIR)
+    return _blob_store
+
+def store_image(image_data: Optional[bytes]) -> Tuple[Optional[bytes], Optional[str]]:
+    """Values for the (Image, ImageHash) columns of a new photo"""
+    store = get_blob_store()
+    if not image_data or store is None:
+        return image_data, None
+    return None, store.put(image_data)
+
+def load_image(image_data, image_hash: Optional[str]):
+    """Photo bytes from the Image column, or memory-mapped from the store when only the hash is kept"""
+    if image_data:
+        return image_data
+    if image_hash:
+        store = get_blob_store() or BlobStore(Config.BLOB_STORE_DIR)
+        mapped = store.read(image_hash)
+        if mapped is None:
+            logger.error(f"Blob {image_hash} referenced by the database is missing from {store.directory}")
+        return mapped
+    return None
+
+# ---- maintenance ---------------------------------------------------------
+
+def referenced_hashes() -> Set[str]:
+    rows = DatabaseManager.execute_query("""
+        SELECT ImageHash FROM Employee WHERE ImageHash IS NOT NULL
+        UNION
+        SELECT ImageHash FROM Contractor WHERE ImageHash IS NOT NULL
+    """, fetch_all=True)
+    if rows is None:
+        raise RuntimeError("Could not load referenced image hashes")
+    return {row[0].strip() for row in rows}
+
+def migrate(store: BlobStore, batch_size: int = 200) -> int:
+    """Move existing Image blobs to the store, one committed batch at a time"""
+    moved = 0
+    for table, key in (('Employee', 'Id'), ('Contractor', 'Id')):
+        while True:
+            rows = DatabaseManager.execute_query(f"""
+                SELECT TOP {int(batch_size)} {key}, Image FROM {table}
+                WHERE Image IS NOT NULL AND ImageHash IS NULL
+            """, fetch_all=True)
+            if not rows:
+                break
+
+            updates = [(store.put(bytes(image)), row_id) for row_id, image in rows]
+            conn = DatabaseManager.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.fast_executemany = True
+                cursor.executemany(f"UPDATE {table} SET ImageHash = ?, Image = NULL WHERE {key} = ?", updates)
+                conn.commit()
+            finally:
+                conn.close()
+            moved += len(updates)
+            logger.info(f"Moved {moved} image(s) to the blob store")
+    return moved
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the on-disk photo blob store")
+    sub = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = sub.add_parser('migrate', help="Move Image blobs from the database to disk")
+    migrate_parser.add_argument('--batch', type=int, default=200)
+    gc_parser = sub.add_parser('gc', help="Delete blobs no longer referenced by any row")
+    gc_parser.add_argument('--grace-hours', type=float, default=24)
+    args = parser.parse_args(argv)
+
+    store = BlobStore(Config.BLOB_STORE_DIR)
+    if args.command == 'migrate':
+        print(f"Moved {migrate(store, args.batch)} image(s) to {store.directory}")
+    else:
+        removed, kept = store.sweep(referenced_hashes(), int(args.grace_hours * 3600))
+        print(f"Removed {removed} unreferenced blob(s), kept {kept}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,19 +1,199 @@
+import os
 import pyodbc
 import logging
+import threading
+from contextlib import contextmanager
+from flask import g, has_request_context
 from config import Config
+from .pool import ConnectionPool, PoolTimeoutError, is_disconnect
 
 logger = logging.getLogger(__name__)
 
+class RequestConnection:
+    """The connection shared by every model call in one request (unit of work).
+
+    commit() only marks the work as pending; the request commits once in
+    after_request, or rolls back on error. close() is a no-op, so existing
+    open/close call sites share this connection transparently. Explicit
+    transactions go through DatabaseManager.transaction().
+
+    A failed statement rolls back the whole unit of work, including writes
+    the caller already reported as done, so the connection is marked failed
+    and refuses to commit whatever the request writes afterwards.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.pending = False
+        self.wrote = False
+        self.failed = False
+        self.transaction_depth = 0
+        self.on_commit = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def execute(self, *args):
+        return self._conn.execute(*args)
+
+    def commit(self):
+        self.pending = True
+        self.wrote = True
+
+    def rollback(self):
+        self.pending = False
+        self.on_commit.clear()
+        self._conn.rollback()
+
+    def fail(self):
+        """A statement failed: undo the unit of work and refuse to commit the rest of it"""
+        self.failed = True
+        self.rollback()
+
+    def invalidate(self):
+        self.failed = True
+        self._conn.invalidate()
+
+    def close(self):
+        pass
+
+    def flush(self):
+        """Commit pending work now, then run the callbacks waiting for it"""
+        if self.failed and self.wrote:
+            raise pyodbc.DatabaseError("A query failed earlier in this request; its changes were rolled back")
+        self._conn.commit()
+        self.pending = False
+        callbacks, self.on_commit = self.on_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-commit callback failed: {e}")
+
+    def release(self):
+        self._conn.close()
+
 class DatabaseManager:
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls) -> ConnectionPool:
+        """Per-process pool, created on first use (and again in forked workers)"""
+        pool = cls._pool
+        if pool is not None and pool.pid == os.getpid():
+            return pool
+
+        with cls._pool_lock:
+            if cls._pool is None or cls._pool.pid != os.getpid():
+                database_uri = Config().DATABASE_URI  # built once, not per connection
+                cls._pool = ConnectionPool(
+                    connect=lambda: pyodbc.connect(database_uri),
+                    min_size=Config.DB_POOL_MIN_SIZE,
+                    max_size=Config.DB_POOL_MAX_SIZE,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    max_idle_seconds=Config.DB_POOL_MAX_IDLE,
+                    max_lifetime_seconds=Config.DB_POOL_MAX_LIFETIME,
+                    health_check_interval=Config.DB_POOL_CHECK_INTERVAL,
+                )
+            return cls._pool
+
     @staticmethod
-    def get_connection():
-        """Create database connection with error handling"""
+    def _acquire():
         try:
-            conn = pyodbc.connect(Config().DATABASE_URI)
-            return conn
-        except pyodbc.Error as e:
+            return DatabaseManager.get_pool().acquire()
+        except (pyodbc.Error, PoolTimeoutError) as e:
             logger.error(f"Database connection error: {e}")
             return None
+
+    @staticmethod
+    def get_connection():
+        """Connection for this request (shared, committed once at the end), or a pooled one outside requests"""
+        if not has_request_context():
+            return DatabaseManager._acquire()
+
+        conn = g.get('_db_connection')
+        if conn is None:
+            pooled = DatabaseManager._acquire()
+            if pooled is None:
+                return None
+            conn = g._db_connection = RequestConnection(pooled)
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """Explicit transaction: commits when the block exits, rolls back (and re-raises) on error.
+
+        Inside a request it runs on the request connection, so work done
+        earlier in the request is committed with it; nested blocks join the
+        outermost one.
+        """
+        conn = DatabaseManager.get_connection()
+        if conn is None:
+            raise pyodbc.OperationalError("Database connection failed")
+
+        shared = isinstance(conn, RequestConnection)
+        if shared:
+            conn.transaction_depth += 1
+        try:
+            yield conn
+            if not shared:
+                conn.commit()
+            elif conn.transaction_depth == 1:
+                conn.flush()
+        except Exception:
+            if shared:
+                conn.fail()  # the rollback also undid the request's earlier work
+            else:
+                conn.rollback()
+            raise
+        finally:
+            if shared:
+                conn.transaction_depth -= 1
+            else:
+                conn.close()
+
+    @staticmethod
+    def after_commit(callback) -> None:
+        """Run callback once this request's work is committed (e.g. to refresh a cache);
+        immediately when there is no open request connection"""
+        conn = g.get('_db_connection') if has_request_context() else None
+        if conn is None:
+            callback()
+        else:
+            conn.on_commit.append(callback)
+
+    @staticmethod
+    def commit_request():
+        """Commit the request's pending work; called from after_request"""
+        conn = g.get('_db_connection')
+        if conn is not None and (conn.pending or conn.on_commit or (conn.failed and conn.wrote)):
+            conn.flush()
+
+    @staticmethod
+    def release_request(error=None):
+        """Roll back on error and return the request connection to the pool; called on teardown"""
+        conn = g.pop('_db_connection', None)
+        if conn is None:
+            return
+        try:
+            if error is not None or conn.pending:
+                # Pending here means commit_request never ran (the request failed before after_request)
+                conn.rollback()
+        except pyodbc.Error as e:
+            logger.error(f"Rollback of request connection failed: {e}")
+            conn.invalidate()
+        finally:
+            conn.release()
+
+    @staticmethod
+    def pool_stats():
+        """Pool metrics for this process"""
+        return DatabaseManager.get_pool().stats()
     
     @staticmethod
     def execute_query(query, params=None, fetch_one=False, fetch_all=False):
@@ -38,9 +218,14 @@ class DatabaseManager:
         except pyodbc.Error as e:
             logger.error(f"Database query error: {e}")
             if conn:
-                conn.rollback()
+                if is_disconnect(e):
+                    # Server restarted or link dropped: do not hand this connection out again
+                    conn.invalidate()
+                elif isinstance(conn, RequestConnection):
+                    conn.fail()
+                else:
+                    conn.rollback()
             return None
         finally:
             if conn:
                 conn.close()
-    
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""Dashboard statistics for the admin, HR and finance landing pages.
+
+Every count the dashboards show, plus paid/unpaid totals of each unit's
+current wage batch, comes from one query. The result is cached per
+process; once it is older than the TTL the next page view still gets the
+cached figures while a background thread reloads them, so only the very
+first view (or one after a long idle spell) waits for the database.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import Config
+from .connection import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Figures older than this many TTLs are reloaded before the page renders
+MAX_STALE_FACTOR = 10
+
+_STATS_QUERY = """
+    WITH latest AS (
+        SELECT UnitId, Id AS BatchId, BatchDate,
+               ROW_NUMBER() OVER (PARTITION BY UnitId ORDER BY BatchDate DESC) AS Recency
+        FROM WageBatch
+    ),
+    totals AS (
+        SELECT
+            (SELECT COUNT(*) FROM Employee) AS Employees,
+            (SELECT COUNT(*) FROM Employee WHERE IsActive = 1) AS ActiveEmployees,
+            (SELECT COUNT(*) FROM Contractor) AS Contractors,
+            (SELECT COUNT(*) FROM Contractor WHERE IsActive = 1) AS ActiveContractors,
+            (SELECT COUNT(*) FROM [User]) AS Users
+    )
+    SELECT t.Employees, t.ActiveEmployees, t.Contractors, t.ActiveContractors, t.Users,
+           u.Id, u.Name, l.BatchDate,
+           COUNT(wu.Id),
+           SUM(CASE WHEN wu.IsPaid = 1 THEN 1 ELSE 0 END),
+           SUM(wu.Amount),
+           SUM(CASE WHEN wu.IsPaid = 1 THEN wu.Amount ELSE 0 END)
+    FROM totals t
+    LEFT JOIN Unit u ON 1 = 1
+    LEFT JOIN latest l ON l.UnitId = u.Id AND l.Recency = 1
+    LEFT JOIN WagesUpload wu ON wu.BatchId = l.BatchId
+    GROUP BY t.Employees, t.ActiveEmployees, t.Contractors, t.ActiveContractors, t.Users,
+             u.Id, u.Name, l.BatchDate
+    ORDER BY u.Id
+"""
+
+def empty_stats() -> Dict:
+    """Zeroed figures for rendering a dashboard when the database is unavailable"""
+    return _summarize(0, 0, 0, 0, 0, [])
+
+def _summarize(employees: int, active_employees: int, contractors: int, active_contractors: int,
+               users: int, units: List[Dict]) -> Dict:
+    return {
+        'total_employees': employees,
+        'active_employees': active_employees,
+        'inactive_employees': employees - active_employees,
+        'contractors': contractors,
+        'active_contractors': active_contractors,
+        'users': users,
+        'units': units,
+        'batch_rows': sum(unit['rows'] for unit in units),
+        'paid': sum(unit['paid'] for unit in units),
+        'unpaid': sum(unit['unpaid'] for unit in units),
+        'amount': sum(unit['amount'] for unit in units),
+        'paid_amount': sum(unit['paid_amount'] for unit in units),
+        'unpaid_amount': sum(unit['unpaid_amount'] for unit in units),
+        'refreshed_at': datetime.now(),
+    }
+
+class DashboardStats:
+    """All dashboard figures from one query, cached for ttl seconds and refreshed in the background"""
+
+    def __init__(self, ttl: float = Config.DASHBOARD_STATS_TTL):
+        self.ttl = ttl
+        self._stats: Optional[Dict] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self) -> Dict:
+        with self._lock:
+            stats, age = self._stats, time.monotonic() - self._loaded_at
+
+        if stats is not None and age < self.ttl:
+            return stats
+        if stats is not None and age < self.ttl * MAX_STALE_FACTOR:
+            self._refresh_in_background()
+            return stats
+
+        # Nothing usable yet: the first dashboards opened together wait for a single load
+        with self._load_lock:
+            with self._lock:
+                if self._stats is not None and time.monotonic() - self._loaded_at < self.ttl:
+                    return self._stats
+            return self._reload()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name='dashboard-stats', daemon=True).start()
+
+    def _refresh(self) -> None:
+        try:
+            with self._load_lock:
+                self._reload()
+        except Exception as e:
+            logger.error(f"Could not refresh dashboard stats: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _reload(self) -> Dict:
+        stats = self._load()
+        with self._lock:
+            self._stats = stats
+            self._loaded_at = time.monotonic()
+        return stats
+
+    @staticmethod
+    def _load() -> Dict:
+        rows = DatabaseManager.execute_query(_STATS_QUERY, fetch_all=True)
+        if not rows:
+            raise RuntimeError("Could not load dashboard stats")
+
+        units = []
+        for row in rows:
+            if row[5] is None:
+                continue  # no units defined
+            batch_rows, paid = int(row[8] or 0), int(row[9] or 0)
+            amount, paid_amount = float(row[10] or 0), float(row[11] or 0)
+            units.append({
+                'unit_id': row[5],
+                'unit_name': row[6],
+                'batch_date': row[7],
+                'rows': batch_rows,
+                'paid': paid,
+                'unpaid': batch_rows - paid,
+                'amount': amount,
+                'paid_amount': paid_amount,
+                'unpaid_amount': amount - paid_amount,
+            })
+        first = rows[0]
+        return _summarize(int(first[0]), int(first[1]), int(first[2]), int(first[3]), int(first[4]), units)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stats = None
+
+dashboard_stats = DashboardStats()
@@ -0,0 +1,233 @@
+"""In-process typeahead index over active employees.
+
+Cashiers look labour up by a code they half remember or by name. The
+index keeps every active employee's code, name, father name and
+contractor as normalized tokens in one sorted list, so a prefix query is
+a bisect plus vectorized scoring of the matching range instead of a LIKE
+over Employee. It is built
+in the background at startup, patched when an employee is created,
+edited or deleted, and rebuilt when another worker reports a change
+through the shared version stamp.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from .connection import DatabaseManager
+from .version_stamp import VersionStamp
+
+logger = logging.getLogger(__name__)
+
+# Field weights: a hit on the code ranks above one on the name, then father name, then contractor
+CODE, NAME, FATHER, CONTRACTOR = 0, 1, 2, 3
+NO_MATCH = 1 << 15
+MAX_QUERY_TERMS = 8
+# Ranking key: the summed score above the first characters of the name, for alphabetical ties
+NAME_KEY_BITS = 48
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+def normalize_tokens(text: Optional[str]) -> List[str]:
+    """Lower-case ASCII word tokens, accents stripped"""
+    if not text:
+        return []
+    folded = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return [token for token in _NON_ALNUM.split(folded) if token]
+
+@dataclass
+class EmployeeEntry:
+    employee_id: int
+    nucleus_id: int
+    name: str
+    father_name: str
+    contractor_name: Optional[str]
+    unit_id: Optional[int]
+
+    def tokens(self) -> List[Tuple[str, int]]:
+        tokens = [(str(self.nucleus_id), CODE)]
+        for text, weight in ((self.name, NAME), (self.father_name, FATHER), (self.contractor_name, CONTRACTOR)):
+            tokens.extend((token, weight) for token in normalize_tokens(text))
+        return list(dict.fromkeys(tokens))
+
+    def name_key(self) -> int:
+        """First NAME_KEY_BITS/8 characters of the normalized name as a sortable integer"""
+        width = NAME_KEY_BITS // 8
+        return int.from_bytes(' '.join(normalize_tokens(self.name)).encode('ascii')[:width].ljust(width, b'\0'), 'big')
+
+    @classmethod
+    def from_row(cls, row) -> 'EmployeeEntry':
+        return cls(int(row[0]), int(row[1]), row[2] or '', row[3] or '', row[4], row[5])
+
+    def to_dict(self) -> Dict:
+        return {
+            'NucleusId': self.nucleus_id,
+            'Name': self.name,
+            'FatherName': self.father_name,
+            'ContractorName': self.contractor_name,
+            'UnitId': self.unit_id,
+        }
+
+_SELECT = """
+    SELECT e.Id, e.NucleusId, e.Name, e.FatherName, c.Name, e.UnitId
+    FROM Employee e
+    LEFT JOIN Contractor c ON c.ContractorId = e.ContractorId
+    WHERE e.IsActive = 1 AND e.NucleusId IS NOT NULL
+"""
+
+class EmployeeSearchIndex:
+    """Sorted tokens with parallel weight/slot arrays; each active employee owns one slot"""
+
+    def __init__(self, version_path: str = Config.EMPLOYEE_SEARCH_VERSION_FILE,
+                 default_limit: int = Config.EMPLOYEE_SEARCH_LIMIT):
+        self.default_limit = default_limit
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built = False
+        self._stamp = VersionStamp(version_path)
+        self._reset([])
+
+    def _reset(self, entries: List[EmployeeEntry]) -> None:
+        """Replace the whole index; the sort runs before the lock is taken"""
+        postings = sorted((token, weight, slot) for slot, entry in enumerate(entries)
+                          for token, weight in entry.tokens())
+        name_keys = np.array([entry.name_key() for entry in entries], dtype=np.int64)
+        tokens = [p[0] for p in postings]
+        weights = np.array([p[1] for p in postings], dtype=np.int32)
+        slots = np.array([p[2] for p in postings], dtype=np.int64)
+        with self._lock:
+            self._entries: List[Optional[EmployeeEntry]] = list(entries)
+            self._slot_of: Dict[int, int] = {entry.nucleus_id: slot for slot, entry in enumerate(entries)}
+            self._codes_by_id: Dict[int, int] = {entry.employee_id: entry.nucleus_id for entry in entries}
+            self._free: List[int] = []
+            self._name_keys = name_keys
+            self._tokens: List[str] = tokens
+            self._weights = weights
+            self._slots = slots
+
+    def start(self) -> None:
+        """Build in the background so startup does not wait for the employee table"""
+        threading.Thread(target=self._rebuild_quietly, name='employee-search-build', daemon=True).start()
+
+    def _rebuild_quietly(self) -> None:
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Could not build the employee search index: {e}")
+
+    def rebuild(self) -> None:
+        with self._build_lock:
+            rows = DatabaseManager.execute_query(_SELECT, fetch_all=True)
+            if rows is None:
+                raise RuntimeError("Could not load employees for the search index")
+            entries = list({entry.nucleus_id: entry for entry in map(EmployeeEntry.from_row, rows)}.values())
+            self._reset(entries)
+            self._built = True
+            logger.info(f"Employee search index built: {len(entries)} employees, {len(self._tokens)} tokens")
+
+    def _ensure_current(self) -> None:
+        if not self._built:
+            self.rebuild()  # first search before the startup build finished
+        elif self._stamp.changed():
+            # Keep answering from the current index while another worker's change is loaded
+            self.start()
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Top matches: every query token must prefix a token of the employee's code, names or contractor"""
+        self._ensure_current()
+        terms = list(dict.fromkeys(normalize_tokens(query)))[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+        limit = limit or self.default_limit
+
+        with self._lock:
+            total = None
+            for term in terms:
+                lo = bisect.bisect_left(self._tokens, term)
+                hi = bisect.bisect_left(self._tokens, term + '\x7f', lo)  # tokens only hold [0-9a-z]
+                if lo == hi:
+                    return []
+                # Exact token hits rank before prefix hits on the same field
+                scores = self._weights[lo:hi] * 2 + 1
+                scores[:bisect.bisect_right(self._tokens, term, lo, hi) - lo] -= 1
+                best = np.full(len(self._entries), NO_MATCH, dtype=np.int32)
+                np.minimum.at(best, self._slots[lo:hi], scores)
+                if total is None:
+                    total = best
+                else:
+                    total = np.where((total < NO_MATCH) & (best < NO_MATCH), total + best, NO_MATCH)
+
+            matched = np.flatnonzero(total < NO_MATCH)
+            if not matched.size:
+                return []
+            keys = (total[matched].astype(np.int64) << NAME_KEY_BITS) | self._name_keys[matched]
+            count = min(limit, matched.size)
+            top = np.argpartition(keys, count - 1)[:count]
+            top = top[np.argsort(keys[top], kind='stable')]
+            return [self._entries[matched[i]].to_dict() for i in top]
+
+    def refresh(self, employee_id: Optional[int] = None, nucleus_id: Optional[int] = None) -> None:
+        """Re-read one employee after a create/update/delete and tell the other workers"""
+        nucleus_id = int(nucleus_id) if nucleus_id is not None else None
+        try:
+            if employee_id is not None:
+                row = DatabaseManager.execute_query(_SELECT + " AND e.Id = ?", (employee_id,), fetch_one=True)
+            else:
+                row = DatabaseManager.execute_query(_SELECT + " AND e.NucleusId = ?", (nucleus_id,), fetch_one=True)
+            entry = EmployeeEntry.from_row(row) if row else None
+            with self._lock:
+                if self._built:
+                    stale = self._codes_by_id.get(employee_id) if employee_id is not None else nucleus_id
+                    self._remove_locked(stale)
+                    if entry is not None:
+                        self._remove_locked(entry.nucleus_id)
+                        self._add_locked(entry)
+        except Exception as e:
+            logger.error(f"Could not refresh the employee search index: {e}")
+            with self._lock:
+                self._built = False  # rebuild on the next search rather than serve a stale entry
+        if self._stamp.bump():
+            self.start()  # another worker's change has not been loaded here yet
+
+    def invalidate(self) -> None:
+        """Rebuild in the background, here and in the other workers (e.g. after a bulk import)"""
+        self._stamp.bump()
+        self.start()
+
+    def _add_locked(self, entry: EmployeeEntry) -> None:
+        if self._free:
+            slot = self._free.pop()
+            self._entries[slot] = entry
+            self._name_keys[slot] = entry.name_key()
+        else:
+            slot = len(self._entries)
+            self._entries.append(entry)
+            self._name_keys = np.append(self._name_keys, np.int64(entry.name_key()))
+        self._slot_of[entry.nucleus_id] = slot
+        self._codes_by_id[entry.employee_id] = entry.nucleus_id
+        for token, weight in entry.tokens():
+            i = bisect.bisect_right(self._tokens, token)
+            self._tokens.insert(i, token)
+            self._weights = np.insert(self._weights, i, weight)
+            self._slots = np.insert(self._slots, i, slot)
+
+    def _remove_locked(self, nucleus_id: Optional[int]) -> None:
+        slot = self._slot_of.pop(nucleus_id, None) if nucleus_id is not None else None
+        if slot is None:
+            return
+        self._codes_by_id.pop(self._entries[slot].employee_id, None)
+        self._entries[slot] = None
+        self._free.append(slot)
+        positions = np.flatnonzero(self._slots == slot)
+        for i in reversed(positions.tolist()):
+            del self._tokens[i]
+        self._weights = np.delete(self._weights, positions)
+        self._slots = np.delete(self._slots, positions)
+
+employee_search = EmployeeSearchIndex()
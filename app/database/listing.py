@@ -0,0 +1,246 @@
+"""Server-side listings for DataTables.
+
+List pages used to fetch every row and let DataTables page, sort and
+search them in the browser. A Listing answers the DataTables server-side
+protocol instead: only whitelisted columns can be sorted or searched, a
+page holds at most MAX_PAGE_LENGTH rows, and the next page is read with a
+keyset predicate on the last row's sort values (carried in an opaque
+cursor) so paging deeper does not make SQL Server skip more rows. Jumps
+to an arbitrary page fall back to OFFSET/FETCH.
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .connection import DatabaseManager
+
+MAX_PAGE_LENGTH = 100
+DEFAULT_PAGE_LENGTH = 25
+MAX_SEARCH_LENGTH = 100
+
+PREFIX = 'prefix'
+CONTAINS = 'contains'
+NUMBER = 'number'
+
+@dataclass(frozen=True)
+class Column:
+    """One output column.
+
+    name is the key in the JSON row (DataTables' columns[i][data]). sort is a
+    NOT NULL SQL expression when the column may be ordered by, search how the
+    global search box matches it (PREFIX, CONTAINS, NUMBER) or None.
+    """
+    name: str
+    expr: str
+    sort: Optional[str] = None
+    search: Optional[str] = None
+
+@dataclass
+class Listing:
+    """A sortable, searchable SELECT over source, paged with a keyset on key (unique, NOT NULL).
+
+    totals are (name, expression) pairs summed over every row matching the
+    filters and search, for footers that must not depend on the current page.
+    """
+    source: str
+    columns: List[Column]
+    key: str
+    default_order: List[Tuple[str, str]] = field(default_factory=list)  # (sort expression, 'asc'/'desc')
+    totals: List[Tuple[str, str]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._by_name = {column.name: column for column in self.columns}
+
+    def page(self, args: Mapping[str, Any], where: Sequence[str] = (), params: Sequence[Any] = ()) -> Dict:
+        """Answer one DataTables request; where/params are the caller's fixed filters"""
+        request = PageRequest.parse(args)
+        order = self._order(args)
+        search_sql, search_params = self._search(request.search)
+
+        base_where = ' AND '.join(f"({clause})" for clause in where) or '1 = 1'
+        matches = search_sql or '1 = 1'
+        sums = ''.join(f", SUM(CASE WHEN {matches} THEN {expr} END)" for _, expr in self.totals)
+        counts = DatabaseManager.execute_query(f"""
+            SELECT COUNT(*), SUM(CASE WHEN {matches} THEN 1 ELSE 0 END){sums}
+            FROM {self.source}
+            WHERE {base_where}
+        """, tuple(search_params) * (len(self.totals) + 1) + tuple(params), fetch_one=True)
+        if counts is None:
+            raise RuntimeError("Could not count listing rows")
+        total, filtered = int(counts[0] or 0), int(counts[1] or 0)
+
+        signature = self._signature(order, request.search, params)
+        clauses, clause_params = list(where), list(params)
+        if search_sql:
+            clauses.append(search_sql)
+            clause_params.extend(search_params)
+
+        after = _decode_cursor(request.cursor, signature, request.start, len(order))
+        offset = request.start
+        if after is not None:
+            keyset_sql, keyset_params = _keyset(order, after)
+            clauses.append(keyset_sql)
+            clause_params.extend(keyset_params)
+            offset = 0
+
+        rows = []
+        if request.length:
+            select = ', '.join(f"{column.expr} AS [{column.name}]" for column in self.columns)
+            sort_values = ', '.join(f"{expr} AS [_sort{i}]" for i, (expr, _) in enumerate(order))
+            rows = DatabaseManager.execute_query(f"""
+                SELECT {select}, {sort_values}
+                FROM {self.source}
+                WHERE {' AND '.join(f"({clause})" for clause in clauses) or '1 = 1'}
+                ORDER BY {', '.join(f"{expr} {direction.upper()}" for expr, direction in order)}
+                OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+            """, tuple(clause_params) + (offset, request.length), fetch_all=True)
+            if rows is None:
+                raise RuntimeError("Could not load listing rows")
+
+        width = len(self.columns)
+        cursor = None
+        if rows and len(rows) == request.length:
+            cursor = _encode_cursor(signature, request.start + len(rows), list(rows[-1][width:]))
+
+        page = {
+            'draw': request.draw,
+            'recordsTotal': total,
+            'recordsFiltered': filtered,
+            'data': [{column.name: _json_value(value) for column, value in zip(self.columns, row[:width])}
+                     for row in rows],
+            'cursor': cursor,
+        }
+        if self.totals:
+            page['totals'] = {name: counts[2 + i] or 0 for i, (name, _) in enumerate(self.totals)}
+        return page
+
+    def _order(self, args: Mapping[str, Any]) -> List[Tuple[str, str]]:
+        """Requested order restricted to sortable columns, then the key as the final tie-breaker"""
+        order = []
+        for i in range(len(self.columns)):
+            index = args.get(f'order[{i}][column]')
+            if index is None:
+                break
+            column = self._by_name.get(args.get(f'columns[{index}][data]', ''))
+            if column is None or column.sort is None or any(expr == column.sort for expr, _ in order):
+                continue
+            direction = 'desc' if args.get(f'order[{i}][dir]') == 'desc' else 'asc'
+            order.append((column.sort, direction))
+        if not order:
+            order = list(self.default_order)
+        if not any(expr == self.key for expr, _ in order):
+            order.append((self.key, order[-1][1] if order else 'asc'))
+        return order
+
+    def _search(self, text: str) -> Tuple[Optional[str], List[Any]]:
+        if not text:
+            return None, []
+        escaped = _escape_like(text)
+        clauses, params = [], []
+        for column in self.columns:
+            if column.search == PREFIX:
+                clauses.append(f"{column.expr} LIKE ?")
+                params.append(escaped + '%')
+            elif column.search == CONTAINS:
+                clauses.append(f"{column.expr} LIKE ?")
+                params.append('%' + escaped + '%')
+            elif column.search == NUMBER and text.isdigit() and len(text) <= 18:
+                clauses.append(f"{column.expr} = ?")
+                params.append(int(text))
+        if not clauses:
+            return None, []
+        return '(' + ' OR '.join(clauses) + ')', params
+
+    @staticmethod
+    def _signature(order: List[Tuple[str, str]], search: str, params: Sequence[Any]) -> str:
+        # A cursor only continues the listing it was issued for
+        raw = json.dumps([order, search, [str(p) for p in params]])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+@dataclass
+class PageRequest:
+    draw: int
+    start: int
+    length: int
+    search: str
+    cursor: Optional[str]
+
+    @classmethod
+    def parse(cls, args: Mapping[str, Any]) -> 'PageRequest':
+        length = _int(args.get('length'), DEFAULT_PAGE_LENGTH)
+        if length < 0 or length > MAX_PAGE_LENGTH:  # DataTables sends -1 for "all"
+            length = MAX_PAGE_LENGTH
+        return cls(
+            draw=_int(args.get('draw'), 0),
+            start=max(_int(args.get('start'), 0), 0),
+            length=length,
+            search=(args.get('search[value]') or '').strip()[:MAX_SEARCH_LENGTH],
+            cursor=args.get('cursor') or None,
+        )
+
+def _int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _escape_like(text: str) -> str:
+    return text.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+
+def _keyset(order: List[Tuple[str, str]], values: List[Any]) -> Tuple[str, List[Any]]:
+    """Rows strictly after values in the given mixed-direction order"""
+    alternatives, params = [], []
+    for i, (expr, direction) in enumerate(order):
+        terms = [f"{prev} = ?" for prev, _ in order[:i]]
+        terms.append(f"{expr} {'<' if direction == 'desc' else '>'} ?")
+        alternatives.append('(' + ' AND '.join(terms) + ')')
+        params.extend(values[:i + 1])
+    return '(' + ' OR '.join(alternatives) + ')', params
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def _encode_cursor(signature: str, next_start: int, values: List[Any]) -> str:
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append(['dt', value.isoformat()])
+        elif isinstance(value, date):
+            encoded.append(['d', value.isoformat()])
+        elif isinstance(value, Decimal):
+            encoded.append(['dec', str(value)])
+        else:
+            encoded.append(['v', value])
+    raw = json.dumps({'sig': signature, 'start': next_start, 'after': encoded})
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor: Optional[str], signature: str, start: int, width: int) -> Optional[List[Any]]:
+    """Sort values of the row before start, or None when the cursor does not continue this request"""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if payload['sig'] != signature or payload['start'] != start or len(payload['after']) != width:
+            return None
+        values = []
+        for kind, value in payload['after']:
+            if kind == 'dt':
+                values.append(datetime.fromisoformat(value))
+            elif kind == 'd':
+                values.append(date.fromisoformat(value))
+            elif kind == 'dec':
+                values.append(Decimal(value))
+            else:
+                values.append(value)
+        return values
+    except (ValueError, KeyError, TypeError):
+        return None
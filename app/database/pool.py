@@ -0,0 +1,335 @@
+"""Thread-safe pool of pyodbc connections.
+
+Opening a TLS connection to SQL Server is the largest fixed cost of a
+request, so connections are kept open and handed out again. Checked-out
+connections are wrapped in PooledConnection, whose close() returns the
+connection to the pool, so existing `conn.close()` call sites keep working.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict
+
+import pyodbc
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(Exception):
+    """No connection became available within the checkout timeout"""
+    pass
+
+@dataclass
+class PoolMetrics:
+    """Counters since the pool was created"""
+    created: int = 0
+    closed: int = 0
+    checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    failed_health_checks: int = 0
+    connect_failures: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+class _Entry:
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class PooledConnection:
+    """Proxy for a pooled pyodbc connection; close() gives it back instead of closing it"""
+
+    def __init__(self, pool: 'ConnectionPool', entry: _Entry):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entry', entry)
+        object.__setattr__(self, '_broken', False)
+        object.__setattr__(self, '_cursors', [])
+
+    def __getattr__(self, name):
+        entry = self._entry
+        if entry is None:
+            raise pyodbc.ProgrammingError("Attempt to use a closed connection.")
+        return getattr(entry.raw, name)
+
+    def __setattr__(self, name, value):
+        # e.g. conn.autocommit = True must reach the real connection
+        setattr(self._entry.raw, name, value)
+
+    def cursor(self):
+        cursor = self._entry.raw.cursor()
+        self._cursors.append(weakref.ref(cursor))
+        return cursor
+
+    def execute(self, *args):
+        cursor = self._entry.raw.execute(*args)
+        self._cursors.append(weakref.ref(cursor))
+        return cursor
+
+    def invalidate(self) -> None:
+        """Mark the connection unusable (e.g. after a communication link failure) so it is discarded"""
+        object.__setattr__(self, '_broken', True)
+
+    def close(self) -> None:
+        entry = self._entry
+        if entry is None:
+            return
+        object.__setattr__(self, '_entry', None)
+        # Like pyodbc's close(): open cursors would otherwise keep the connection busy for the next user
+        for ref in self._cursors:
+            cursor = ref()
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except pyodbc.Error:
+                    pass
+        self._cursors.clear()
+        self._pool.release(entry, broken=self._broken)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same semantics as pyodbc: commit on success, roll back on error, do not close
+        if exc_type is None:
+            self._entry.raw.commit()
+        else:
+            self._entry.raw.rollback()
+        return False
+
+    def __del__(self):
+        # Call sites that never close their connection still hand it back
+        try:
+            self.close()
+        except Exception:
+            pass
+
+def is_disconnect(error: Exception) -> bool:
+    """True for SQLSTATE class 08 (connection exceptions) and other link failures"""
+    args = getattr(error, 'args', ())
+    state = str(args[0]) if args else ''
+    return state.startswith('08') or state in ('HYT00', 'HYT01') or 'Communication link failure' in str(error)
+
+class ConnectionPool:
+    """Bounded pool with health checks, idle recycling and reconnect backoff"""
+
+    def __init__(self, connect: Callable[[], object], min_size: int = 2, max_size: int = 20,
+                 timeout: float = 10.0, max_idle_seconds: float = 300.0, max_lifetime_seconds: float = 1800.0,
+                 health_check_interval: float = 30.0, connect_attempts: int = 4,
+                 backoff_base: float = 0.25, backoff_max: float = 5.0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_interval = health_check_interval
+        self.connect_attempts = max(connect_attempts, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.pid = os.getpid()
+        self.metrics = PoolMetrics()
+        self._idle = deque()  # most recently used on the right
+        self._size = 0  # open connections, idle or checked out
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    # ---- checkout ------------------------------------------------------------
+
+    def acquire(self) -> PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        while True:
+            entry = None
+            create = False
+            with self._available:
+                to_close = self._reap_locked()
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1  # reserve the slot, connect outside the lock
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.metrics.timeouts += 1
+                        raise PoolTimeoutError(f"No database connection available after {self.timeout}s "
+                                               f"({self._size} open, all in use)")
+                    waited = True
+                    self._available.wait(remaining)
+            self._close_raw(to_close)
+
+            if create:
+                try:
+                    entry = _Entry(self._connect_with_backoff())
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+            elif entry is None:
+                continue
+            elif not self._healthy(entry):
+                self._discard(entry)
+                continue
+
+            self._record_checkout(started, waited)
+            return PooledConnection(self, entry)
+
+    def _healthy(self, entry: _Entry) -> bool:
+        """Ping connections that sat idle longer than the check interval"""
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = entry.raw.cursor()
+            cursor.execute("SELECT 1").fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error as e:
+            with self._lock:
+                self.metrics.failed_health_checks += 1
+            logger.warning(f"Discarding dead pooled connection: {e}")
+            return False
+
+    def _connect_with_backoff(self):
+        """Open a connection, retrying with exponential backoff and jitter (e.g. while SQL Server restarts)"""
+        for attempt in range(self.connect_attempts):
+            try:
+                raw = self._connect()
+                with self._lock:
+                    self.metrics.created += 1
+                return raw
+            except pyodbc.Error as e:
+                with self._lock:
+                    self.metrics.connect_failures += 1
+                if attempt == self.connect_attempts - 1:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(f"Database connect attempt {attempt + 1} failed, retrying in {delay:.2f}s: {e}")
+                time.sleep(delay)
+
+    def _record_checkout(self, started: float, waited: bool) -> None:
+        wait = time.monotonic() - started
+        with self._lock:
+            self.metrics.checkouts += 1
+            self.metrics.total_wait_seconds += wait
+            self.metrics.max_wait_seconds = max(self.metrics.max_wait_seconds, wait)
+            if waited:
+                self.metrics.waits += 1
+
+    # ---- checkin -------------------------------------------------------------
+
+    def release(self, entry: _Entry, broken: bool = False) -> None:
+        """Return a connection; uncommitted work is rolled back so it cannot leak into the next user"""
+        if os.getpid() != self.pid:
+            return  # inherited across fork; the parent still owns the socket
+        if not broken:
+            try:
+                entry.raw.rollback()
+                if entry.raw.autocommit:
+                    entry.raw.autocommit = False
+            except pyodbc.Error:
+                broken = True
+
+        if broken or self._expired(entry, time.monotonic()):
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._available:
+            self._idle.append(entry)
+            self._available.notify()
+
+    def _discard(self, entry: _Entry) -> None:
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+        self._close_raw([entry])
+
+    # ---- recycling -----------------------------------------------------------
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return now - entry.created_at > self.max_lifetime_seconds
+
+    def _reap_locked(self):
+        """Drop idle connections past their lifetime, or idle too long while above min_size"""
+        now = time.monotonic()
+        to_close = []
+        kept = deque()
+        while self._idle:
+            entry = self._idle.popleft()  # oldest first
+            idle_too_long = now - entry.last_used > self.max_idle_seconds and self._size > self.min_size
+            if idle_too_long or self._expired(entry, now):
+                to_close.append(entry)
+                self._size -= 1
+            else:
+                kept.append(entry)
+        self._idle = kept
+        return to_close
+
+    def _close_raw(self, entries) -> None:
+        for entry in entries:
+            try:
+                entry.raw.close()
+            except pyodbc.Error:
+                pass
+            with self._lock:
+                self.metrics.closed += 1
+
+    def warm(self) -> None:
+        """Open connections up to min_size; failures are only logged"""
+        entries = []
+        try:
+            for _ in range(self.min_size):
+                with self._lock:
+                    if self._size >= self.min_size:
+                        break
+                    self._size += 1
+                try:
+                    raw = self._connect()
+                except pyodbc.Error as e:
+                    with self._lock:
+                        self._size -= 1
+                        self.metrics.connect_failures += 1
+                    logger.warning(f"Could not pre-open database connections: {e}")
+                    break
+                with self._lock:
+                    self.metrics.created += 1
+                entries.append(_Entry(raw))
+        finally:
+            with self._available:
+                self._idle.extend(entries)
+                self._available.notify_all()
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries, self._idle = list(self._idle), deque()
+            self._size -= len(entries)
+        self._close_raw(entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            metrics = asdict(self.metrics)
+            idle = len(self._idle)
+            size = self._size
+        metrics.update({
+            'open': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'avg_wait_ms': round(1000 * metrics['total_wait_seconds'] / metrics['checkouts'], 3) if metrics['checkouts'] else 0.0,
+        })
+        return metrics
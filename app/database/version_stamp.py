@@ -0,0 +1,70 @@
+"""Cross-process change notification through a small token file.
+
+In-process caches cannot see writes made by other worker processes. A
+writer bumps the stamp after changing the underlying rows; readers call
+changed() before serving from their cache, which re-reads the token at
+most once per check interval, and drop what they cached when it moved.
+"""
+
+import os
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class VersionStamp:
+    """Token file shared by all workers; bump() on write, changed() before reading a cache"""
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = self._read()
+        self._checked_at = time.monotonic()
+
+    def _read(self) -> Optional[str]:
+        # The token itself, not the mtime: coarse filesystem timestamps could hide two quick bumps
+        try:
+            with open(self.path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def changed(self) -> bool:
+        """True once after another process bumped the stamp"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        version = self._read()
+        with self._lock:
+            if version == self._version:
+                return False
+            self._version = version
+            return True
+
+    def bump(self) -> bool:
+        """Tell the other workers to drop their caches.
+
+        Returns True when another worker had bumped since this process last
+        looked: overwriting its token would hide that change from this
+        process, so the caller must drop its own cache too.
+        """
+        missed = False
+        try:
+            current = self._read()
+            with self._lock:
+                missed = current != self._version
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            token = f"{os.getpid()}-{time.time_ns()}"
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(token)
+            os.replace(tmp_path, self.path)
+            with self._lock:
+                self._version = token
+        except OSError as e:
+            logger.error(f"Could not bump version stamp {self.path}: {e}")
+        return missed
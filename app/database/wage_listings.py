@@ -0,0 +1,67 @@
+"""Server-side listings over WagesUpload for the cashier payment pages."""
+
+from typing import Any, Dict, Mapping, Optional
+
+from .listing import Column, Listing, NUMBER, PREFIX
+
+LATEST_BATCH = """wu.BatchId = (
+    SELECT TOP 1 Id FROM WageBatch
+    WHERE UnitId = ?
+    ORDER BY BatchDate DESC
+)"""
+
+_SOURCE = """
+    WagesUpload wu
+    LEFT JOIN Unit u ON wu.UnitId = u.Id
+"""
+
+_COLUMNS = [
+    Column('Id', 'wu.Id'),
+    Column('NucleusId', 'wu.NucleusId', sort='ISNULL(wu.NucleusId, 0)', search=NUMBER),
+    Column('ContractorId', 'wu.ContractorId', sort='ISNULL(wu.ContractorId, 0)', search=NUMBER),
+    Column('LabourName', 'wu.LabourName', sort="ISNULL(wu.LabourName, '')", search=PREFIX),
+    Column('ContractorName', 'wu.ContractorName', sort="ISNULL(wu.ContractorName, '')", search=PREFIX),
+    Column('Amount', 'wu.Amount', sort='ISNULL(wu.Amount, 0)'),
+    Column('UnitId', 'wu.UnitId'),
+    Column('UnitName', "ISNULL(u.Name, 'Unknown')"),
+    Column('IsPaid', 'CASE WHEN wu.IsPaid = 1 THEN 1 ELSE 0 END'),
+    Column('VerifyType', 'wu.VerifyType'),
+    Column('CreatedAt', 'wu.CreatedAt', sort="ISNULL(wu.CreatedAt, '19000101')"),
+    Column('UpdatedAt', 'wu.UpdatedAt', sort="ISNULL(wu.UpdatedAt, '19000101')"),
+]
+
+UNPAID_WAGES = Listing(
+    source=_SOURCE,
+    columns=_COLUMNS,
+    key='wu.Id',
+    default_order=[('wu.Id', 'desc')],
+    totals=[('Amount', 'wu.Amount')],
+)
+
+# Unpaid first, then the most recently updated
+PAYMENTS = Listing(
+    source=_SOURCE,
+    columns=_COLUMNS,
+    key='wu.Id',
+    default_order=[('CASE WHEN wu.IsPaid = 1 THEN 1 ELSE 0 END', 'asc'),
+                   ("ISNULL(wu.UpdatedAt, '19000101')", 'desc')],
+)
+
+def unpaid_batch_page(args: Mapping[str, Any], unit_id: int,
+                      from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict:
+    """Unpaid rows of the unit's latest batch, or of its batches dated from_date..to_date"""
+    if from_date and to_date:
+        batch = "wu.BatchId IN (SELECT Id FROM WageBatch WHERE UnitId = ? AND BatchDate BETWEEN ? AND ?)"
+        params = (unit_id, from_date, to_date, unit_id)
+    else:
+        batch = LATEST_BATCH
+        params = (unit_id, unit_id)
+    return UNPAID_WAGES.page(args, [batch, 'wu.UnitId = ?', 'wu.IsPaid = 0'], params)
+
+def unpaid_history_page(args: Mapping[str, Any], unit_id: int) -> Dict:
+    """Every unpaid row of the unit, whichever batch it belongs to"""
+    return UNPAID_WAGES.page(args, ['wu.UnitId = ?', 'wu.IsPaid = 0'], (unit_id,))
+
+def payments_page(args: Mapping[str, Any], unit_id: int) -> Dict:
+    """Rows of the unit's latest batch that a cashier has touched"""
+    return PAYMENTS.page(args, [LATEST_BATCH, 'wu.UnitId = ?', 'wu.UpdatedAt IS NOT NULL'], (unit_id, unit_id))
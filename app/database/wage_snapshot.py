@@ -0,0 +1,145 @@
+"""In-memory snapshot of each unit's current wage batch.
+
+The cashier pages render the whole batch of their unit and look single
+labour codes up in it on every scan. The batch is loaded once per unit
+into compact columns keyed by NucleusId, patched in place when a payment
+is recorded, and dropped when a new batch is uploaded. Other worker
+processes learn about both through a shared version stamp, so a payment
+made at one station shows up at the others within a second.
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from .connection import DatabaseManager
+from .version_stamp import VersionStamp
+
+class BatchSnapshot:
+    """Columns of one unit's latest batch, in the order get_upload_data returned them"""
+
+    def __init__(self, unit_id: int, rows: List[Tuple]):
+        self.unit_id = unit_id
+        self.loaded_at = time.monotonic()
+        self.batch_id = int(rows[0][0]) if rows else None
+        self.nucleus_ids = np.array([r[1] for r in rows], dtype=np.int64)
+        self.contractor_ids = np.array([r[2] for r in rows], dtype=object)
+        self.labour_names = np.array([r[3] for r in rows], dtype=object)
+        self.contractor_names = np.array([r[4] for r in rows], dtype=object)
+        self.amounts = np.array([r[5] for r in rows], dtype=object)  # Decimal, as the templates print it
+        self.is_paid = np.array([bool(r[6]) for r in rows], dtype=bool)
+        self.unit_ids = np.array([r[7] for r in rows], dtype=np.int64)
+        self.created_by = np.array([r[8] for r in rows], dtype=object)
+        self.created_at = np.array([r[9] for r in rows], dtype=object)
+        self._position = {int(n): i for i, n in enumerate(self.nucleus_ids)}
+
+    def __len__(self) -> int:
+        return len(self.nucleus_ids)
+
+    def rows(self) -> List[Tuple]:
+        """Rows shaped like get_upload_data's: NucleusId, ContractorId, LabourName, ContractorName,
+        Amount, IsPaid (0/1), IsPaidText, UnitId, CreatedBy, CreatedAt"""
+        return [
+            (int(n), c, name, contractor, amount, int(paid), 'Yes' if paid else 'No', int(unit), by, at)
+            for n, c, name, contractor, amount, paid, unit, by, at in zip(
+                self.nucleus_ids, self.contractor_ids, self.labour_names, self.contractor_names,
+                self.amounts, self.is_paid, self.unit_ids, self.created_by, self.created_at)
+        ]
+
+    def lookup(self, nucleus_id: int) -> Optional[Tuple]:
+        """(NucleusId, LabourName, ContractorName, Amount, IsPaid, CreatedAt) like check_labour_ispaid_or_not"""
+        i = self._position.get(int(nucleus_id))
+        if i is None:
+            return None
+        return (int(self.nucleus_ids[i]), self.labour_names[i], self.contractor_names[i],
+                self.amounts[i], bool(self.is_paid[i]), self.created_at[i])
+
+    def set_paid(self, nucleus_id: int, is_paid: bool) -> bool:
+        i = self._position.get(int(nucleus_id))
+        if i is None:
+            return False
+        self.is_paid[i] = is_paid
+        return True
+
+class WageSnapshotCache:
+    """Per-unit BatchSnapshot, reloaded after ttl seconds or when another worker changed a batch"""
+
+    def __init__(self, ttl: float = Config.WAGE_SNAPSHOT_TTL,
+                 version_path: str = Config.WAGE_SNAPSHOT_VERSION_FILE):
+        self.ttl = ttl
+        self._snapshots: Dict[int, BatchSnapshot] = {}
+        self._load_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stamp = VersionStamp(version_path)
+
+    def get(self, unit_id: int) -> BatchSnapshot:
+        if self._stamp.changed():
+            with self._lock:
+                self._snapshots.clear()
+
+        snapshot = self._fresh(unit_id)
+        if snapshot is not None:
+            return snapshot
+
+        # One load per unit at a time; stations opening the page together wait for it
+        with self._lock:
+            load_lock = self._load_locks.setdefault(unit_id, threading.Lock())
+        with load_lock:
+            snapshot = self._fresh(unit_id)
+            if snapshot is None:
+                snapshot = BatchSnapshot(unit_id, self._load(unit_id))
+                with self._lock:
+                    self._snapshots[unit_id] = snapshot
+            return snapshot
+
+    def _fresh(self, unit_id: int) -> Optional[BatchSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(unit_id)
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        return None
+
+    @staticmethod
+    def _load(unit_id: int) -> List[Tuple]:
+        rows = DatabaseManager.execute_query("""
+            SELECT BatchId, NucleusId, ContractorId, LabourName, ContractorName, Amount,
+                   CASE WHEN IsPaid = 1 THEN 1 ELSE 0 END AS IsPaid,
+                   UnitId, CreatedBy, CreatedAt
+            FROM WagesUpload
+            WHERE BatchId = (
+                SELECT TOP 1 Id FROM WageBatch
+                WHERE UnitId = ?
+                ORDER BY BatchDate DESC
+            )
+            AND UnitId = ?
+        """, (unit_id, unit_id), fetch_all=True)
+        if rows is None:
+            raise RuntimeError(f"Could not load the wage batch of UnitId {unit_id}")
+        return [tuple(row) for row in rows]
+
+    def mark_paid(self, unit_id: int, nucleus_id: int, is_paid: bool = True) -> None:
+        """Patch a payment into the local snapshot and tell the other workers"""
+        with self._lock:
+            snapshot = self._snapshots.get(unit_id)
+            if snapshot is not None and not snapshot.set_paid(nucleus_id, is_paid):
+                del self._snapshots[unit_id]  # not in the cached batch; reload rather than guess
+        self._bump()
+
+    def invalidate(self, unit_id: Optional[int] = None) -> None:
+        """Drop one unit's snapshot (or all), e.g. after a new batch was uploaded"""
+        with self._lock:
+            if unit_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(unit_id, None)
+        self._bump()
+
+    def _bump(self) -> None:
+        if self._stamp.bump():
+            # Another worker changed a batch we have not reloaded yet
+            with self._lock:
+                self._snapshots.clear()
+
+wage_snapshots = WageSnapshotCache()
@@ -0,0 +1,185 @@
+"""Bulk employee enrollment from a spreadsheet plus a zip of photos named by NucleusId"""
+
+import os
+import logging
+import zipfile
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from app.database import DatabaseManager
+from app.database.blob_store import store_image
+from app.database.employee_search import employee_search
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['NucleusId', 'Name', 'FatherName', 'ContractorId', 'UnitId']
+OPTIONAL_COLUMNS = ['PhoneNo', 'Address', 'IsActive']
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+INSERT_BATCH_SIZE = 500
+
+@dataclass
+class BulkImportResult:
+    """Outcome of a bulk import"""
+    total_rows: int = 0
+    inserted: int = 0
+    errors: List[Tuple[int, str, str]] = field(default_factory=list)  # (sheet row, NucleusId, reason)
+    elapsed_seconds: float = 0.0
+
+    def add_error(self, row_number: int, nucleus_id, reason: str) -> None:
+        self.errors.append((row_number, str(nucleus_id), reason))
+
+def read_employee_sheet(file_storage) -> pd.DataFrame:
+    """Read an .xlsx/.xls or .csv employee sheet with every column as text"""
+    filename = (file_storage.filename or '').lower()
+    if filename.endswith('.csv'):
+        df = pd.read_csv(file_storage, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(file_storage, dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+
+    missing = set(REQUIRED_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    for column in OPTIONAL_COLUMNS:
+        if column not in df.columns:
+            df[column] = ''
+    return df[REQUIRED_COLUMNS + OPTIONAL_COLUMNS].apply(lambda col: col.str.strip())
+
+def index_photos(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Map NucleusId (file stem) to archive member name"""
+    photos = {}
+    for name in archive.namelist():
+        stem, extension = os.path.splitext(os.path.basename(name))
+        if stem and extension.lower() in PHOTO_EXTENSIONS:
+            photos[stem.strip()] = name
+    return photos
+
+# ---- worker process side -------------------------------------------------
+
+def _prepare_photo(image_data: bytes):
+    """Normalize a photo and compute its face encoding from the same decode; returns (photo, encoding, error)"""
+    from app.face.image_ingest import ingest_photo
+    from app.face.exceptions import FaceEncodingError
+
+    try:
+        ingested = ingest_photo(image_data)
+        return ingested.photo, ingested.encoding, None
+    except FaceEncodingError as e:
+        return None, None, str(e)
+
+# ---- coordinator ---------------------------------------------------------
+
+class BulkEmployeeImporter:
+    """Validates rows against reference data, encodes photos in parallel and inserts in batches"""
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+
+    def run(self, sheet_file, photo_archive_file, created_by: int) -> BulkImportResult:
+        started = datetime.now()
+        result = BulkImportResult()
+
+        df = read_employee_sheet(sheet_file)
+        result.total_rows = len(df)
+
+        with zipfile.ZipFile(photo_archive_file) as archive:
+            photos = index_photos(archive)
+            valid_rows = self._validate(df, photos, result)
+
+            images = [archive.read(photos[row['NucleusId']]) for row in valid_rows]
+
+        prepared = []
+        if valid_rows:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                outcomes = executor.map(_prepare_photo, images, chunksize=4)
+                for row, (photo, encoding, error) in zip(valid_rows, outcomes):
+                    if error:
+                        result.add_error(row['_row'], row['NucleusId'], f"Photo rejected: {error}")
+                    else:
+                        prepared.append((row, photo, encoding))
+
+        if prepared:
+            result.inserted = self._insert(prepared, created_by)
+
+        result.elapsed_seconds = round((datetime.now() - started).total_seconds(), 2)
+        logger.info(f"Bulk import: {result.inserted}/{result.total_rows} employees inserted, "
+                    f"{len(result.errors)} rejected in {result.elapsed_seconds}s")
+        return result
+
+    def _validate(self, df: pd.DataFrame, photos: Dict[str, str], result: BulkImportResult) -> List[Dict]:
+        """Check every row against sets preloaded with one query each"""
+        existing_ids = self._load_set("SELECT CAST(NucleusId AS NVARCHAR(50)) FROM Employee")
+        contractor_ids = self._load_set("SELECT CAST(ContractorId AS NVARCHAR(50)) FROM Contractor WHERE IsActive = 1")
+        unit_ids = self._load_set("SELECT CAST(Id AS NVARCHAR(50)) FROM Unit")
+
+        duplicated = df['NucleusId'].duplicated(keep=False)
+        valid_rows = []
+        for position, row in enumerate(df.to_dict('records')):
+            row_number = position + 2  # header is row 1
+            row['_row'] = row_number
+            nucleus_id = row['NucleusId']
+
+            if not nucleus_id.isdigit():
+                reason = "NucleusId must contain digits only"
+            elif duplicated.iat[position]:
+                reason = "NucleusId appears more than once in the sheet"
+            elif nucleus_id in existing_ids:
+                reason = "NucleusId already exists"
+            elif not row['Name'] or not row['FatherName']:
+                reason = "Name and FatherName are required"
+            elif row['ContractorId'] not in contractor_ids:
+                reason = f"Unknown or inactive ContractorId {row['ContractorId']}"
+            elif row['UnitId'] not in unit_ids:
+                reason = f"Unknown UnitId {row['UnitId']}"
+            elif nucleus_id not in photos:
+                reason = "No photo named after this NucleusId in the archive"
+            else:
+                valid_rows.append(row)
+                continue
+
+            result.add_error(row_number, nucleus_id, reason)
+
+        return valid_rows
+
+    @staticmethod
+    def _load_set(query: str) -> set:
+        rows = DatabaseManager.execute_query(query, fetch_all=True) or []
+        return {str(row[0]).strip() for row in rows}
+
+    @staticmethod
+    def _insert(prepared: List[Tuple[Dict, bytes, object]], created_by: int) -> int:
+        """Insert employees and their profile encodings in batched executemany calls, one transaction"""
+        from app.face.models import FaceTemplateModel
+
+        now = datetime.now()
+        employee_rows = []
+        template_rows = []
+        for row, photo, encoding in prepared:
+            is_active = row['IsActive'].lower() not in ('0', 'false', 'no', 'n') if row['IsActive'] else True
+            employee_rows.append((
+                int(row['NucleusId']), row['Name'], row['FatherName'], row['PhoneNo'], row['Address'],
+                int(row['ContractorId']), int(row['UnitId']), *store_image(photo), is_active, created_by, now
+            ))
+            template_rows.append((
+                int(row['NucleusId']), FaceTemplateModel.to_bytes(encoding),
+                FaceTemplateModel.PROFILE_SOURCE, created_by, now
+            ))
+
+        with DatabaseManager.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            for start in range(0, len(employee_rows), INSERT_BATCH_SIZE):
+                cursor.executemany("""
+                    INSERT INTO Employee (NucleusId, Name, FatherName, PhoneNo, Address, ContractorId, UnitId, Image, ImageHash, IsActive, CreatedBy, CreatedAt)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, employee_rows[start:start + INSERT_BATCH_SIZE])
+                cursor.executemany("""
+                    INSERT INTO EmployeeFaceTemplate (NucleusId, Encoding, Source, CreatedBy, CreatedAt)
+                    VALUES (?, ?, ?, ?, ?)
+                """, template_rows[start:start + INSERT_BATCH_SIZE])
+        DatabaseManager.after_commit(employee_search.invalidate)
+        return len(employee_rows)
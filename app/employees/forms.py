@@ -1,5 +1,6 @@
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from app.face.image_ingest import ingest_photo
 
 class EmployeeForm:
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png'}
@@ -26,11 +27,14 @@ class EmployeeForm:
         Unit = form_data.get('Unit', '').strip()
         IsActive = 'IsActive' in form_data
 
-        # Read image file as binary
+        # Normalize the photo once here; the encoding is kept as the profile template
         image_file = file_data.get('ProfileImage')
         image_binary = None
+        face_encoding = None
+        face_crop = None
         if image_file and EmployeeForm.allowed_file(image_file.filename):
-            image_binary = image_file.read()  # read binary data
+            photo = ingest_photo(image_file.read())
+            image_binary, face_encoding, face_crop = photo.photo, photo.encoding, photo.face_crop
 
         return {
             'NucleusId': NucleusId,
@@ -41,5 +45,16 @@ class EmployeeForm:
             'Unit': Unit,
             'ContractorId': ContractorId,
             'IsActive': IsActive,
-            'image': image_binary
+            'image': image_binary,
+            'face_encoding': face_encoding,
+            'face_crop': face_crop
         }
+
+    @staticmethod
+    def prepare_template_images(file_data):
+        """Read the extra reference photos uploaded for multi-template enrollment"""
+        images = []
+        for image_file in file_data.getlist('TemplateImages'):
+            if image_file and EmployeeForm.allowed_file(image_file.filename):
+                images.append(image_file.read())
+        return images
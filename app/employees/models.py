@@ -1,29 +1,55 @@
 from sqlite3 import DatabaseError
 from app.database import DatabaseManager
+from app.database.blob_store import store_image
+from app.database.listing import Listing, Column, NUMBER, PREFIX
+from app.database.employee_search import employee_search
 from datetime import datetime
 import logging
-import base64  # ✅ Import for base64 encoding
 
 logger = logging.getLogger(__name__)
 
 class EmployeeModel:
-    @staticmethod
-    def get_all():
-        """Get all employees with contractor information, including base64 image"""
-        raw_employees = DatabaseManager.execute_query("""
-              SELECT e.Id, e.NucleusId, e.Name, e.FatherName, e.PhoneNo, e.Address, 
-                (c.Name + ' ' + c.FatherName) as ContractorName, u.Name as UnitName, e.IsActive,
-                u1.Email as CreatedByEmail, e.CreatedAt,
-                u2.Email as UpdatedByEmail, e.UpdatedAt
-            FROM Employee e
+    LISTING = Listing(
+        source="""
+            Employee e
             LEFT JOIN Contractor c ON e.ContractorId = c.ContractorId
             LEFT JOIN Unit u ON e.UnitId = u.Id
             LEFT JOIN [User] u1 ON e.CreatedBy = u1.Id
             LEFT JOIN [User] u2 ON e.UpdatedBy = u2.Id
-            ORDER BY e.Id DESC
-        """, fetch_all=True)
-            
-        return raw_employees
+        """,
+        columns=[
+            Column('Id', 'e.Id'),
+            Column('NucleusId', 'e.NucleusId', sort='ISNULL(e.NucleusId, 0)', search=NUMBER),
+            Column('Name', 'e.Name', sort="ISNULL(e.Name, '')", search=PREFIX),
+            Column('FatherName', 'e.FatherName', sort="ISNULL(e.FatherName, '')", search=PREFIX),
+            Column('PhoneNo', 'e.PhoneNo', search=PREFIX),
+            Column('Address', 'e.Address'),
+            Column('ContractorName', "(c.Name + ' ' + c.FatherName)", sort="ISNULL(c.Name + ' ' + c.FatherName, '')", search=PREFIX),
+            Column('UnitName', 'u.Name', sort="ISNULL(u.Name, '')"),
+            Column('IsActive', 'e.IsActive', sort='e.IsActive'),
+            Column('CreatedByEmail', 'u1.Email'),
+            Column('CreatedAt', 'e.CreatedAt', sort="ISNULL(e.CreatedAt, '19000101')"),
+            Column('UpdatedByEmail', 'u2.Email'),
+            Column('UpdatedAt', 'e.UpdatedAt', sort="ISNULL(e.UpdatedAt, '19000101')"),
+        ],
+        key='e.Id',
+        default_order=[('e.Id', 'desc')],
+    )
+
+    @staticmethod
+    def page(args, active_only=False):
+        """One DataTables page of employees with contractor and unit information"""
+        where = ['e.IsActive = 1'] if active_only else []
+        return EmployeeModel.LISTING.page(args, where)
+
+    @staticmethod
+    def counts():
+        """(total, active) employee counts for the list page's cards"""
+        row = DatabaseManager.execute_query(
+            "SELECT COUNT(*), SUM(CASE WHEN IsActive = 1 THEN 1 ELSE 0 END) FROM Employee",
+            fetch_one=True
+        )
+        return (row[0] or 0, row[1] or 0) if row else (0, 0)
 
     @staticmethod
     def exists_nucleus_id(nucleus_id):
@@ -38,53 +64,49 @@ class EmployeeModel:
 
     @staticmethod
     def get_by_id(employee_id):
-        """Get employee by ID with Base64 image conversion"""
-        employee = DatabaseManager.execute_query(
-            "SELECT * FROM Employee WHERE Id = ?",
-            (employee_id,),
-            fetch_one=True
-        )
-
-        if employee:
-            employee = list(employee)  # convert tuple to list so we can modify it
-
-            # If Image column exists and is not None, convert to Base64
-            if employee[8]:
-                employee[8] = base64.b64encode(employee[8]).decode('utf-8')
-
-        return employee
+        """Get employee by ID; column 8 flags whether a photo is stored (served by the media endpoint)"""
+        return DatabaseManager.execute_query("""
+            SELECT Id, NucleusId, Name, FatherName, PhoneNo, Address, ContractorId, UnitId,
+                   CASE WHEN Image IS NULL AND ImageHash IS NULL THEN 0 ELSE 1 END AS HasImage, IsActive
+            FROM Employee WHERE Id = ?
+        """, (employee_id,), fetch_one=True)
 
 
     @staticmethod
     def create(data, created_by):
         """Create new employee"""
-        return DatabaseManager.execute_query("""
-            INSERT INTO Employee (NucleusId, Name, FatherName, PhoneNo, Address, ContractorId, UnitId, Image, IsActive, CreatedBy, CreatedAt)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        image, image_hash = store_image(data['image'])
+        success = DatabaseManager.execute_query("""
+            INSERT INTO Employee (NucleusId, Name, FatherName, PhoneNo, Address, ContractorId, UnitId, Image, ImageHash, IsActive, CreatedBy, CreatedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             data['NucleusId'], data['Name'], data['FatherName'], data['PhoneNumber'],
-            data['Address'], data.get('ContractorId'), data['Unit'], data['image'], data['IsActive'],
+            data['Address'], data.get('ContractorId'), data['Unit'], image, image_hash, data['IsActive'],
             created_by, datetime.now()
         ))
+        if success:
+            DatabaseManager.after_commit(lambda: employee_search.refresh(nucleus_id=data['NucleusId']))
+        return success
 
     @staticmethod
     def update(employee_id, data, updated_by):
         """Update employee with optional image"""        
         if data['image']:
-            return DatabaseManager.execute_query("""
+            image, image_hash = store_image(data['image'])
+            success = DatabaseManager.execute_query("""
                 UPDATE Employee 
                 SET Name = ?, FatherName = ?, 
                     PhoneNo = ?, Address = ?, 
-                    ContractorId = ?, UnitId = ?, Image = ?, IsActive = ?, 
+                    ContractorId = ?, UnitId = ?, Image = ?, ImageHash = ?, IsActive = ?, 
                     UpdatedBy = ?, UpdatedAt = ?
                 WHERE Id = ?
             """, (
                 data['Name'], data['FatherName'], data['PhoneNumber'],
-                data['Address'], data['ContractorId'], data['Unit'], data['image'],
+                data['Address'], data['ContractorId'], data['Unit'], image, image_hash,
                 data['IsActive'], updated_by, datetime.now(), employee_id
             ))
         else:
-            return DatabaseManager.execute_query("""
+            success = DatabaseManager.execute_query("""
                 UPDATE Employee 
                 SET Name = ?, FatherName = ?, 
                     PhoneNo = ?, Address = ?, 
@@ -96,14 +118,28 @@ class EmployeeModel:
                 data['Address'], data['ContractorId'], data['Unit'],
                 data['IsActive'], updated_by, datetime.now(), employee_id
             ))
+        if success:
+            DatabaseManager.after_commit(lambda: employee_search.refresh(employee_id=employee_id))
+        return success
+
+    @staticmethod
+    def set_face_crop(nucleus_id, face_crop):
+        """Store the aligned face crop derived from the profile photo"""
+        return DatabaseManager.execute_query(
+            "UPDATE Employee SET FaceCrop = ? WHERE NucleusId = ?",
+            (face_crop, nucleus_id)
+        )
 
     @staticmethod
     def delete(employee_id):
         """Delete employee"""
-        return DatabaseManager.execute_query(
+        success = DatabaseManager.execute_query(
             "DELETE FROM Employee WHERE Id = ?",
             (employee_id,)
         )
+        if success:
+            DatabaseManager.after_commit(lambda: employee_search.refresh(employee_id=employee_id))
+        return success
 
 
 
@@ -1,32 +1,86 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, jsonify
 import logging
 from . import employees_bp
 from .models import EmployeeModel
 from .forms import EmployeeForm
+from .bulk_import import BulkEmployeeImporter
 from app.auth.decorators import require_auth, require_role
 from app.contractors.models import ContractorModel
+from app.face.models import FaceTemplateModel
+from app.face.exceptions import FaceEncodingError
 
 logger = logging.getLogger(__name__)
 
+
+def store_profile_face(nucleus_id, data):
+    """Keep the encoding (and optional face crop) computed when the profile photo was ingested"""
+    if data.get('face_encoding') is not None:
+        FaceTemplateModel.add_many(nucleus_id, [data['face_encoding']], FaceTemplateModel.PROFILE_SOURCE, session['user_id'])
+    if data.get('face_crop'):
+        EmployeeModel.set_face_crop(nucleus_id, data['face_crop'])
+
+def update_face_templates(employee_id, data, template_images, replace_existing):
+    """Enroll extra reference photos and drop stale cached encodings for the employee"""
+    from app.face.routes import face_service
+
+    employee = EmployeeModel.get_by_id(employee_id)
+    if not employee:
+        return
+    nucleus_id = employee[1]
+
+    try:
+        if replace_existing:
+            FaceTemplateModel.delete_for_employee(nucleus_id)
+        elif data['image']:
+            # The saved encoding belonged to the previous profile photo
+            FaceTemplateModel.delete_for_employee(nucleus_id, FaceTemplateModel.PROFILE_SOURCE)
+
+        if data['image']:
+            store_profile_face(nucleus_id, data)
+
+        if template_images:
+            enrolled, rejected = face_service.enroll_templates(nucleus_id, template_images, session['user_id'])
+            flash(f'{enrolled} face template(s) enrolled, {rejected} rejected.', 'success' if enrolled else 'warning')
+            logger.info(f"Enrolled {enrolled} face template(s) for NucleusId {nucleus_id}, rejected {rejected}")
+    except Exception as e:
+        logger.error(f"Error enrolling face templates for NucleusId {nucleus_id}: {e}")
+        flash('Employee saved, but face templates could not be enrolled.', 'error')
+    finally:
+        if data['image'] or replace_existing or template_images:
+            face_service.invalidate_employee(nucleus_id)
+
 @employees_bp.route('/')
 @require_auth
 @require_role(['admin', 'hr'])
 def list_employees():
-    """List all employees"""
+    """List all employees; the table itself is paged through employees_data"""
     try:
-        employees = EmployeeModel.get_all()
+        total, active = EmployeeModel.counts()
         contractors = ContractorModel.get_active_contractors()
         units = ContractorModel.get_unit()
       
         return render_template('employees/employees.html', 
-                             employees=employees, 
+                             employee_count=total,
+                             active_count=active,
                              contractors=contractors,
                              units=units)
     
     except Exception as e:
         logger.error(f"Error in list_employees: {e}")
         flash('Error loading employee data.', 'error')
-        return render_template('employees/employees.html', employees=[], contractors=[])
+        return render_template('employees/employees.html', employee_count=0, active_count=0, contractors=[])
+
+@employees_bp.route('/data')
+@require_auth
+@require_role(['admin', 'hr'])
+def employees_data():
+    """DataTables server-side page of the employee list"""
+    try:
+        return jsonify(EmployeeModel.page(request.args, active_only=request.args.get('active') == '1'))
+    except Exception as e:
+        logger.error(f"Error in employees_data: {e}")
+        return jsonify({'draw': request.args.get('draw', type=int, default=0),
+                        'error': 'Error loading employee data.'}), 500
 
 @employees_bp.route('/add', methods=['GET', 'POST'])
 @require_auth
@@ -48,9 +102,15 @@ def add_employee():
             if success:
                 flash('Employee added successfully.', 'success')
                 logger.info(f"Employee {data['Name']} added by user {session['email']}")
+                try:
+                    store_profile_face(int(data['NucleusId']), data)
+                except Exception as e:
+                    logger.error(f"Error storing profile encoding for NucleusId {data['NucleusId']}: {e}")
             else:
                 flash('Error adding employee. Please try again.', 'error')
 
+        except FaceEncodingError as e:
+            flash(f'Photo rejected: {e}', 'error')
         except Exception as e:
             logger.error(f"Unexpected error while adding employee: {e}")
             flash('An unexpected error occurred.', 'error')
@@ -64,6 +124,34 @@ def add_employee():
 
 
 
+@employees_bp.route('/bulk-import', methods=['POST'])
+@require_auth
+@require_role(['admin', 'hr'])
+def bulk_import_employees():
+    """Enroll many employees from a spreadsheet and a zip of photos named by NucleusId"""
+    sheet = request.files.get('EmployeeSheet')
+    archive = request.files.get('PhotoArchive')
+
+    if not sheet or not sheet.filename or not archive or not archive.filename:
+        flash('Please upload both the employee sheet and the photo archive.', 'error')
+        return redirect(url_for('employees.list_employees'))
+
+    try:
+        result = BulkEmployeeImporter().run(sheet, archive, session['user_id'])
+    except ValueError as e:
+        flash(f'Error: {e}', 'error')
+        return redirect(url_for('employees.list_employees'))
+    except Exception as e:
+        logger.error(f"Error in bulk employee import: {e}")
+        flash('An unexpected error occurred during bulk import.', 'error')
+        return redirect(url_for('employees.list_employees'))
+
+    logger.info(f"Bulk import of {result.inserted} employees by user {session['email']}")
+    flash(f'{result.inserted} of {result.total_rows} employees imported in {result.elapsed_seconds}s.',
+          'success' if result.inserted else 'warning')
+    return render_template('employees/bulk_import_result.html', result=result)
+
+
 @employees_bp.route('/edit/<int:employee_id>', methods=['GET', 'POST'])
 @require_auth
 @require_role(['admin', 'hr'])
@@ -74,15 +162,19 @@ def edit_employee(employee_id):
             
             # Prepare data
             data = EmployeeForm.prepare_data(request.form, request.files)
+            template_images = EmployeeForm.prepare_template_images(request.files)
             success = EmployeeModel.update(employee_id, data, session['user_id'])
             
             if success:
                 flash('Employee updated successfully.', 'success')
                 logger.info(f"Employee ID {employee_id} updated by user {session['email']}")
+                update_face_templates(employee_id, data, template_images, 'ReplaceTemplates' in request.form)
                 return redirect(url_for('employees.list_employees'))
             else:
                 flash('Error updating employee. Please try again.', 'error')
                 
+        except FaceEncodingError as e:
+            flash(f'Photo rejected: {e}', 'error')
         except Exception as e:
             logger.error(f"Error updating employee: {e}")
             flash('An unexpected error occurred.', 'error')
@@ -97,10 +189,12 @@ def edit_employee(employee_id):
             flash('Employee not found.', 'error')
             return redirect(url_for('employees.list_employees'))
         
+        template_count = FaceTemplateModel.count(employee[1])
         return render_template('employees/edit_employee.html', 
                              employee=employee, 
                              contractors=contractors,
-                             units=units)
+                             units=units,
+                             template_count=template_count)
     
     except Exception as e:
         logger.error(f"Error in edit_employee:")
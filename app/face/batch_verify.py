@@ -0,0 +1,223 @@
+"""Offline batch verification of captured images against stored employee faces.
+
+Takes a folder or zip archive of captures plus a manifest CSV with
+NucleusId and image columns, streams the images through a process pool
+that decodes and encodes them with FaceRecognitionService, compares each
+against the employee's stored templates and writes a CSV or JSON report.
+
+Usage:
+    python -m app.face.batch_verify captures.zip --manifest manifest.csv --report report.csv [--workers 4]
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .exceptions import FaceEncodingError, NoFaceFoundError
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.csv'
+
+@dataclass
+class BatchResult:
+    """Verification outcome for one manifest row"""
+    nucleus_id: str
+    image: str
+    status: str  # match | no_match | no_face | unknown_employee | error
+    distance: Optional[float] = None
+    template_index: Optional[int] = None
+    message: str = ''
+
+class CaptureSource:
+    """Reads capture images from a directory or a zip archive"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+
+    def read(self, name: str) -> bytes:
+        if self._zip is not None:
+            return self._zip.read(name)
+        with open(os.path.join(self.path, name), 'rb') as f:
+            return f.read()
+
+    def open_manifest(self, manifest_path: Optional[str]) -> io.TextIOBase:
+        if manifest_path:
+            return open(manifest_path, newline='', encoding='utf-8-sig')
+        if self._zip is not None:
+            return io.TextIOWrapper(self._zip.open(MANIFEST_NAME), encoding='utf-8-sig', newline='')
+        return open(os.path.join(self.path, MANIFEST_NAME), newline='', encoding='utf-8-sig')
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+
+def iter_manifest(source: CaptureSource, manifest_path: Optional[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (NucleusId, image name) rows without loading the whole manifest"""
+    with source.open_manifest(manifest_path) as f:
+        for row in csv.DictReader(f):
+            nucleus_id = (row.get('NucleusId') or '').strip()
+            image = (row.get('image') or row.get('Image') or '').strip()
+            if nucleus_id and image:
+                yield nucleus_id, image
+
+# ---- worker process side -------------------------------------------------
+
+_worker_service = None
+
+def _init_worker() -> None:
+    global _worker_service
+    from .face_service import FaceRecognitionService
+    _worker_service = FaceRecognitionService()
+
+def _encode_image(image_data: bytes):
+    """Decode and encode one capture in a worker; returns (encoding, error status, message)"""
+    try:
+        return _worker_service.create_face_encoding(image_data), None, ''
+    except NoFaceFoundError as e:
+        return None, 'no_face', str(e)
+    except FaceEncodingError as e:
+        return None, 'error', str(e)
+
+# ---- coordinator ---------------------------------------------------------
+
+class BatchVerifier:
+    """Streams a manifest through a bounded process pool and compares in the parent"""
+
+    def __init__(self, face_service=None, workers: int = None):
+        from .face_service import FaceRecognitionService
+        self.face_service = face_service or FaceRecognitionService()
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+
+    def run(self, source: CaptureSource, manifest_path: Optional[str] = None) -> Tuple[List[BatchResult], Dict]:
+        results: List[BatchResult] = []
+        started = time.perf_counter()
+        tracemalloc.start()
+
+        # Bounded in-flight work keeps memory flat regardless of archive size
+        max_in_flight = self.workers * 2
+        pending = {}
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+            for nucleus_id, image in iter_manifest(source, manifest_path):
+                try:
+                    image_data = source.read(image)
+                except (KeyError, OSError) as e:
+                    results.append(BatchResult(nucleus_id, image, 'error', message=f"Cannot read image: {e}"))
+                    continue
+
+                pending[executor.submit(_encode_image, image_data)] = (nucleus_id, image)
+                if len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results.append(self._compare(*pending.pop(future), future))
+
+            for future in list(pending):
+                results.append(self._compare(*pending.pop(future), future))
+
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        summary = self._summarize(results, elapsed, peak)
+        return results, summary
+
+    def _compare(self, nucleus_id: str, image: str, future) -> BatchResult:
+        from .models import EmployeeFaceModel
+
+        try:
+            encoding, status, message = future.result()
+        except Exception as e:
+            return BatchResult(nucleus_id, image, 'error', message=str(e))
+        if encoding is None:
+            return BatchResult(nucleus_id, image, status, message=message)
+
+        try:
+            employee_id = int(nucleus_id)
+            templates = self.face_service.encoding_cache.get(employee_id)
+            if templates is None:
+                employee = EmployeeFaceModel.get_by_id(employee_id)
+                if not employee:
+                    return BatchResult(nucleus_id, image, 'unknown_employee', message="Employee not found or inactive")
+                templates = self.face_service.load_employee_encoding(employee_id, employee.Image)
+
+            template_match = self.face_service.match_templates(templates, encoding)
+            return BatchResult(
+                nucleus_id, image,
+                'match' if template_match.is_match else 'no_match',
+                distance=round(template_match.distance, 4),
+                template_index=template_match.template_index
+            )
+        except Exception as e:
+            return BatchResult(nucleus_id, image, 'error', message=str(e))
+
+    @staticmethod
+    def _summarize(results: List[BatchResult], elapsed: float, peak_bytes: int) -> Dict:
+        counts: Dict[str, int] = {}
+        for result in results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+
+        summary = {
+            'images': len(results),
+            'counts': counts,
+            'elapsed_seconds': round(elapsed, 2),
+            'images_per_second': round(len(results) / elapsed, 2) if elapsed else None,
+            'parent_peak_python_mb': round(peak_bytes / (1024 * 1024), 2),
+        }
+        try:
+            import resource
+            # ru_maxrss is in kilobytes on Linux
+            summary['parent_max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+            summary['workers_max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 2)
+        except ImportError:
+            pass
+        return summary
+
+def write_report(results: List[BatchResult], summary: Dict, path: str) -> None:
+    """Write results as CSV, or as JSON (with the summary) when the path ends in .json"""
+    if path.lower().endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump({'summary': summary, 'results': [asdict(r) for r in results]}, f, indent=2)
+        return
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(BatchResult.__dataclass_fields__))
+        writer.writeheader()
+        for result in results:
+            writer.writerow(asdict(result))
+
+def run_batch_verification(source_path: str, report_path: str, manifest_path: str = None,
+                           workers: int = None) -> Dict:
+    """Verify every manifest row and write the report; returns the summary"""
+    source = CaptureSource(source_path)
+    try:
+        results, summary = BatchVerifier(workers=workers).run(source, manifest_path)
+    finally:
+        source.close()
+    write_report(results, summary, report_path)
+    logger.info(f"Batch verification of {source_path}: {summary}")
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-verify captured images against employee faces")
+    parser.add_argument('source', help="Directory or zip archive of captures")
+    parser.add_argument('--manifest', help=f"Manifest CSV (NucleusId,image); defaults to {MANIFEST_NAME} in the source")
+    parser.add_argument('--report', default='batch_verification.csv', help="Report path (.csv or .json)")
+    parser.add_argument('--workers', type=int, help="Encoding worker processes")
+    args = parser.parse_args(argv)
+
+    summary = run_batch_verification(args.source, args.report, args.manifest, args.workers)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -2,7 +2,7 @@
 
 import threading
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from .config import AppConfig
 
 class FaceEncodingCache:
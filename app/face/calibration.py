@@ -0,0 +1,217 @@
+"""Offline tolerance calibration from enrolled face encodings.
+
+Builds genuine (same employee) and impostor (different employees)
+distance distributions over every enrolled encoding, derives FAR/FRR
+curves and recommends a threshold per operating profile.
+
+Usage:
+    python -m app.face.calibration --output logs/calibration.json [--include-images] [--csv curve.csv]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .config import FaceRecognitionConfig, FACE_RECOGNITION_CONFIG
+from .distances import iter_distance_blocks, upper_triangle_mask, DEFAULT_BLOCK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Operating profiles: strict caps false accepts, lenient caps false rejects
+DEFAULT_PROFILES = {
+    'strict': {'max_far': 0.0001},
+    'balanced': {'equal_error': True},
+    'lenient': {'max_frr': 0.01},
+}
+
+@dataclass
+class CalibrationResult:
+    """Distance distributions and derived error curves"""
+    thresholds: np.ndarray
+    genuine_hist: np.ndarray
+    impostor_hist: np.ndarray
+    employees: int
+    encodings: int
+    recommendations: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def genuine_pairs(self) -> int:
+        return int(self.genuine_hist.sum())
+
+    @property
+    def impostor_pairs(self) -> int:
+        return int(self.impostor_hist.sum())
+
+    @property
+    def far(self) -> np.ndarray:
+        """Share of impostor pairs accepted at each threshold (distance <= t)"""
+        return np.cumsum(self.impostor_hist) / max(self.impostor_pairs, 1)
+
+    @property
+    def frr(self) -> np.ndarray:
+        """Share of genuine pairs rejected at each threshold (distance > t)"""
+        return 1.0 - np.cumsum(self.genuine_hist) / max(self.genuine_pairs, 1)
+
+    def rates_at(self, threshold: float) -> Tuple[float, float]:
+        """(FAR, FRR) at an arbitrary threshold"""
+        index = min(int(np.searchsorted(self.thresholds, threshold, side='right')) - 1, len(self.thresholds) - 1)
+        if index < 0:
+            return 0.0, 1.0
+        return float(self.far[index]), float(self.frr[index])
+
+class ToleranceCalibrator:
+    """Accumulates distance histograms over blocked distance matrices"""
+
+    def __init__(self, bin_width: float = 0.005, max_distance: float = 1.5,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        # Bin k covers (edges[k], edges[k+1]]; its upper edge is the threshold
+        self.edges = np.arange(0.0, max_distance + bin_width, bin_width)
+
+    def calibrate(self, labels: np.ndarray, encodings: np.ndarray,
+                  profiles: Dict[str, Dict] = None) -> CalibrationResult:
+        """Compute genuine/impostor histograms and per-profile recommendations"""
+        labels = np.asarray(labels)
+        genuine = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        impostor = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+        for row_start, col_start, distances in iter_distance_blocks(encodings, self.block_size):
+            same = labels[row_start:row_start + distances.shape[0], None] == \
+                labels[None, col_start:col_start + distances.shape[1]]
+            if row_start == col_start:
+                pair_mask = upper_triangle_mask(row_start, col_start, distances.shape)
+            else:
+                pair_mask = np.ones(distances.shape, dtype=bool)
+
+            genuine += self._histogram(distances[pair_mask & same])
+            impostor += self._histogram(distances[pair_mask & ~same])
+
+        result = CalibrationResult(
+            thresholds=self.edges[1:],
+            genuine_hist=genuine,
+            impostor_hist=impostor,
+            employees=len(np.unique(labels)),
+            encodings=len(labels)
+        )
+        result.recommendations = self.recommend(result, profiles or DEFAULT_PROFILES)
+        return result
+
+    def _histogram(self, distances: np.ndarray) -> np.ndarray:
+        # Right-closed bins so "distance <= threshold" matches compare_faces
+        index = np.searchsorted(self.edges, distances, side='left') - 1
+        index = np.clip(index, 0, len(self.edges) - 2)
+        return np.bincount(index, minlength=len(self.edges) - 1)
+
+    @staticmethod
+    def recommend(result: CalibrationResult, profiles: Dict[str, Dict]) -> Dict[str, Dict[str, float]]:
+        """Pick a threshold per profile from the FAR/FRR curves"""
+        far, frr, thresholds = result.far, result.frr, result.thresholds
+        recommendations = {}
+
+        for name, target in profiles.items():
+            if target.get('equal_error'):
+                index = int(np.argmin(np.abs(far - frr)))
+            elif 'max_far' in target:
+                allowed = np.nonzero(far <= target['max_far'])[0]
+                index = int(allowed[-1]) if len(allowed) else 0
+            elif 'max_frr' in target:
+                allowed = np.nonzero(frr <= target['max_frr'])[0]
+                index = int(allowed[0]) if len(allowed) else len(thresholds) - 1
+            else:
+                continue
+
+            recommendations[name] = {
+                'threshold': round(float(thresholds[index]), 4),
+                'far': float(far[index]),
+                'frr': float(frr[index]),
+            }
+
+        return recommendations
+
+def load_enrolled_encodings(include_images: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Collect template encodings, optionally adding encodings of Employee.Image"""
+    from .models import FaceTemplateModel, EmployeeFaceModel
+    from .face_service import FaceRecognitionService
+    from .exceptions import FaceEncodingError
+
+    labels, encodings = FaceTemplateModel.get_all_encodings()
+    label_parts, encoding_parts = [labels], [encodings]
+
+    if include_images:
+        service = FaceRecognitionService()
+        image_labels, image_encodings = [], []
+        for employee in EmployeeFaceModel.get_all_with_images():
+            try:
+                image_encodings.append(service.create_face_encoding(employee.Image))
+                image_labels.append(int(employee.nucleus_id))
+            except FaceEncodingError as e:
+                logger.warning(f"Skipping image of employee {employee.nucleus_id}: {e}")
+        if image_encodings:
+            label_parts.append(np.array(image_labels, dtype=np.int64))
+            encoding_parts.append(np.vstack(image_encodings))
+
+    return np.concatenate(label_parts), np.vstack(encoding_parts)
+
+def build_report(result: CalibrationResult) -> Dict:
+    """JSON-serializable summary, including how today's configured thresholds perform"""
+    configured = {
+        'FaceRecognitionConfig.TOLERANCE': FaceRecognitionConfig.TOLERANCE,
+        'FACE_RECOGNITION_CONFIG.VERIFICATION_THRESHOLD': FACE_RECOGNITION_CONFIG['VERIFICATION_THRESHOLD'],
+    }
+    current = {}
+    for name, threshold in configured.items():
+        far, frr = result.rates_at(threshold)
+        current[name] = {'threshold': threshold, 'far': far, 'frr': frr}
+
+    return {
+        'employees': result.employees,
+        'encodings': result.encodings,
+        'genuine_pairs': result.genuine_pairs,
+        'impostor_pairs': result.impostor_pairs,
+        'recommendations': result.recommendations,
+        'configured': current,
+    }
+
+def write_curve_csv(result: CalibrationResult, path: str) -> None:
+    """Write the FAR/FRR curve as CSV"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['threshold', 'far', 'frr', 'genuine_count', 'impostor_count'])
+        for row in zip(result.thresholds, result.far, result.frr, result.genuine_hist, result.impostor_hist):
+            writer.writerow([f"{row[0]:.4f}", f"{row[1]:.6f}", f"{row[2]:.6f}", int(row[3]), int(row[4])])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate the face verification tolerance")
+    parser.add_argument('--output', default='logs/calibration.json', help="JSON report path")
+    parser.add_argument('--csv', help="Optional FAR/FRR curve CSV path")
+    parser.add_argument('--include-images', action='store_true',
+                        help="Also encode Employee.Image (slow, one encoding per employee)")
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument('--bin-width', type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    labels, encodings = load_enrolled_encodings(args.include_images)
+    if len(labels) < 2:
+        print("Not enough enrolled encodings to calibrate.")
+        return 1
+
+    calibrator = ToleranceCalibrator(bin_width=args.bin_width, block_size=args.block_size)
+    result = calibrator.calibrate(labels, encodings)
+    if not result.genuine_pairs:
+        print("Warning: no employee has more than one encoding, genuine distribution is empty.")
+
+    report = build_report(result)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.csv:
+        write_curve_csv(result, args.csv)
+
+    print(json.dumps(report['recommendations'], indent=2))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 """Configuration settings for face recognition module"""
 
+import os
 from dataclasses import dataclass
 from typing import List
 FACE_RECOGNITION_CONFIG = {
@@ -33,6 +34,14 @@ class FaceRecognitionConfig:
     MAX_RECENT_FRAMES: int = 10
     PROCESS_EVERY_N_FRAMES: int = 2
     MODEL: str = "hog"  # or "cnn" for better accuracy but slower
+    MAX_TEMPLATES_PER_EMPLOYEE: int = 10
+    USE_CENTROID_PRECHECK: bool = True
+    CENTROID_ACCEPT_DISTANCE: float = 0.35  # stricter than TOLERANCE, the centroid sits closer to every template
+    ADAPTIVE_REFRESH_ENABLED: bool = os.environ.get('FACE_ADAPTIVE_REFRESH', 'False').lower() == 'true'
+    ADAPTIVE_REFRESH_MAX_DISTANCE: float = 0.35  # only learn from confident matches
+    TEMPLATE_DEDUP_DISTANCE: float = 0.2  # skip live encodings this close to an existing template
+    ADAPTIVE_TEMPLATE_MAX_AGE_DAYS: int = 90
+    PROXY_CLUSTER_DISTANCE: float = 0.4  # live captures closer than this are treated as one person
 
 @dataclass
 class AppConfig:
@@ -40,3 +49,32 @@ class AppConfig:
     MAX_NO_FRAME_COUNT: int = 100
     THREAD_JOIN_TIMEOUT: float = 5.0
     CACHE_SIZE_LIMIT: int = 100
+    REFRESH_QUEUE_SIZE: int = 200
+    ENCODING_LOG_ENABLED: bool = os.environ.get('FACE_ENCODING_LOG', 'True').lower() == 'true'
+    ENCODING_LOG_DIR: str = os.path.join('logs', 'encodings')
+    TEMPLATE_VERSION_FILE: str = os.environ.get('FACE_TEMPLATE_VERSION_FILE', os.path.join('logs', 'face_templates.version'))
+
+@dataclass
+class FrameQualityConfig:
+    """Capture burst scoring configuration"""
+    SCORING_WIDTH: int = 320  # frames are scored on a downscaled copy
+    SHARPNESS_REFERENCE: float = 150.0  # Laplacian variance treated as fully sharp
+    FACE_AREA_REFERENCE: float = 0.12  # face box / frame area treated as large enough
+    SHARPNESS_WEIGHT: float = 0.4
+    FACE_SIZE_WEIGHT: float = 0.3
+    FRONTALNESS_WEIGHT: float = 0.3
+    MAX_BURST_FRAMES: int = 8
+    ENCODE_TOP_K: int = 2
+    MAX_WORKERS: int = 4
+
+@dataclass
+class ImageIngestConfig:
+    """Normalization applied to uploaded employee photos"""
+    MAX_SIDE: int = 1024  # long side cap in pixels
+    FORMAT: str = os.environ.get('PHOTO_FORMAT', 'jpeg').lower()  # 'jpeg' or 'webp'
+    JPEG_QUALITY: int = 90
+    WEBP_QUALITY: int = 85
+    REQUIRE_SINGLE_FACE: bool = True
+    STORE_FACE_CROP: bool = os.environ.get('STORE_FACE_CROP', 'False').lower() == 'true'
+    FACE_CROP_SIZE: int = 200
+    FACE_CROP_MARGIN: float = 0.35  # extra space around the detected face box
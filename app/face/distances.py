@@ -0,0 +1,38 @@
+"""Vectorized, blocked face-encoding distance computations"""
+
+import numpy as np
+from typing import Generator, Tuple
+
+DEFAULT_BLOCK_SIZE = 2048
+
+def pairwise_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Euclidean distance matrix between two sets of encodings.
+
+    Uses ||a||^2 + ||b||^2 - 2ab so the work is a single matrix product.
+    """
+    a_sq = np.einsum('ij,ij->i', a, a)
+    b_sq = np.einsum('ij,ij->i', b, b)
+    d2 = a_sq[:, None] + b_sq[None, :] - 2.0 * (a @ b.T)
+    np.maximum(d2, 0.0, out=d2)
+    return np.sqrt(d2, out=d2)
+
+def iter_distance_blocks(encodings: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE
+                         ) -> Generator[Tuple[int, int, np.ndarray], None, None]:
+    """Yield (row_start, col_start, distances) for the upper triangle of the distance matrix.
+
+    Blocks on the diagonal are yielded whole; callers should mask the
+    lower triangle and diagonal there (see upper_triangle_mask). Memory
+    stays bounded by block_size^2 regardless of the number of encodings.
+    """
+    encodings = np.asarray(encodings, dtype=np.float32)
+    n = len(encodings)
+    for i in range(0, n, block_size):
+        rows = encodings[i:i + block_size]
+        for j in range(i, n, block_size):
+            yield i, j, pairwise_distances(rows, encodings[j:j + block_size])
+
+def upper_triangle_mask(row_start: int, col_start: int, shape: Tuple[int, int]) -> np.ndarray:
+    """Mask of pairs (r, c) with global index r < c inside a block"""
+    rows = np.arange(row_start, row_start + shape[0])[:, None]
+    cols = np.arange(col_start, col_start + shape[1])[None, :]
+    return rows < cols
@@ -0,0 +1,111 @@
+"""Append-only, fixed-record log of live verification encodings.
+
+Every verification appends one packed record to a per-day segment file.
+Segments are read back as NumPy memmaps, so analytics and audits can
+scan a day of encodings vectorized without loading them into SQL Server
+or keeping any images around.
+"""
+
+import os
+import logging
+import threading
+import numpy as np
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+from .config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),      # POSIX seconds
+    ('nucleus_id', '<i8'),
+    ('unit_id', '<i4'),
+    ('matched', 'u1'),
+    ('distance', '<f4'),
+    ('encoding', '<f4', (128,)),
+])
+
+SEGMENT_PREFIX = 'verifications-'
+SEGMENT_SUFFIX = '.v1.bin'
+
+class VerificationEncodingLog:
+    """Day-rotated segments of fixed-size verification records"""
+
+    def __init__(self, directory: str = AppConfig.ENCODING_LOG_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._fd_day: Optional[date] = None
+
+    def segment_path(self, day: date) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{day:%Y%m%d}{SEGMENT_SUFFIX}")
+
+    def append(self, nucleus_id: int, unit_id: int, encoding: np.ndarray, distance: float,
+               matched: bool, timestamp: datetime = None) -> None:
+        """Append one verification record to today's segment"""
+        timestamp = timestamp or datetime.now()
+
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record['timestamp'] = timestamp.timestamp()
+        record['nucleus_id'] = int(nucleus_id)
+        record['unit_id'] = int(unit_id or 0)
+        record['matched'] = 1 if matched else 0
+        record['distance'] = distance
+        record['encoding'] = np.asarray(encoding, dtype=np.float32)
+        payload = record.tobytes()
+
+        with self._lock:
+            fd = self._segment_fd(timestamp.date())
+            # A single O_APPEND write keeps records whole even with several worker processes
+            os.write(fd, payload)
+
+    def _segment_fd(self, day: date) -> int:
+        if self._fd is not None and self._fd_day == day:
+            return self._fd
+
+        if self._fd is not None:
+            os.close(self._fd)
+        os.makedirs(self.directory, exist_ok=True)
+        self._fd = os.open(self.segment_path(day), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        self._fd_day = day
+        return self._fd
+
+    def open_segment(self, day: date) -> np.ndarray:
+        """Memory-map one day's records (read-only); empty when the day has no log"""
+        path = self.segment_path(day)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        # Ignore a trailing partial record left by an interrupted write
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+
+    def iter_segments(self, start: date, end: date) -> Iterator[Tuple[date, np.ndarray]]:
+        """Yield (day, records) for every day in [start, end]"""
+        day = start
+        while day <= end:
+            records = self.open_segment(day)
+            if len(records):
+                yield day, records
+            day += timedelta(days=1)
+
+    def load(self, start: date, end: date = None, unit_id: int = None) -> np.ndarray:
+        """Records of a date range, optionally for a single unit, as one in-memory array"""
+        parts = []
+        for _, records in self.iter_segments(start, end or start):
+            if unit_id is not None:
+                records = records[records['unit_id'] == unit_id]
+            parts.append(np.asarray(records))
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                self._fd_day = None
@@ -24,6 +24,10 @@ class NoFaceFoundError(FaceEncodingError):
     """No face found in image"""
     pass
 
+class MultipleFacesFoundError(FaceEncodingError):
+    """More than one face found where exactly one is expected"""
+    pass
+
 class InvalidImageError(FaceEncodingError):
     """Invalid image data"""
     pass
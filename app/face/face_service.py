@@ -7,9 +7,13 @@ import logging
 from typing import List, Tuple, Optional, Generator
 from dataclasses import dataclass
 
-from .config import FaceRecognitionConfig
+from app.database.version_stamp import VersionStamp
+from .config import FaceRecognitionConfig, AppConfig
 from .exceptions import FaceEncodingError, NoFaceFoundError, InvalidImageError
 from .cache import FaceEncodingCache
+from .models import FaceTemplateModel
+from .frame_quality import FrameQualityScorer, FrameScore
+from .template_refresh import ADAPTIVE_SOURCE
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +25,13 @@ class FaceMatch:
     distance: float
     location: Tuple[int, int, int, int]  
 
+@dataclass
+class TemplateMatch:
+    """Result of comparing one live encoding against an employee's templates"""
+    is_match: bool
+    distance: float
+    template_index: int  # -1 when accepted by the centroid pre-check
+
 @dataclass
 class FrameProcessor:
     """Frame processing result"""
@@ -34,6 +45,8 @@ class FaceRecognitionService:
     def __init__(self, config: FaceRecognitionConfig = None):
         self.config = config or FaceRecognitionConfig()
         self.encoding_cache = FaceEncodingCache()
+        self._template_stamp = VersionStamp(AppConfig.TEMPLATE_VERSION_FILE)
+        self.frame_scorer = FrameQualityScorer(model=self.config.MODEL)
         self._recent_matches: List[bool] = []
         self._frame_count = 0
     
@@ -65,20 +78,144 @@ class FaceRecognitionService:
                 raise
             raise FaceEncodingError(f"Failed to create face encoding: {e}")
     
-    def load_employee_encoding(self, employee_id: int, image_data: bytes) -> None:
-        """Load and cache employee face encoding"""
-        if employee_id in self.encoding_cache:
+    def load_employee_encoding(self, employee_id: int, image_data: bytes) -> np.ndarray:
+        """Load and cache employee reference encodings (stored image plus enrolled templates)"""
+        self._sync_templates()
+        cached = self.encoding_cache.get(employee_id)
+        if cached is not None:
             logger.info(f"Face encoding already cached for employee {employee_id}")
-            return
+            return cached
+        
+        stored = FaceTemplateModel.get_templates(employee_id)
+        templates = [t['encoding'] for t in stored]
+        has_profile_encoding = any(t['source'] == FaceTemplateModel.PROFILE_SOURCE for t in stored)
+        encodings = []
+        if image_data and not has_profile_encoding:
+            try:
+                encodings.append(self.create_face_encoding(image_data))
+            except FaceEncodingError:
+                # A bad profile photo is tolerable as long as other templates exist
+                if not len(templates):
+                    raise
+                logger.warning(f"Stored image of employee {employee_id} has no usable face, using templates only")
+        
+        if len(templates):
+            encodings.extend(templates)
+        if not encodings:
+            raise NoFaceFoundError(f"No reference face available for employee {employee_id}")
+        
+        matrix = np.vstack(encodings)
+        self.encoding_cache.set(employee_id, matrix)
+        logger.info(f"Face encoding cached for employee {employee_id} ({len(matrix)} template(s))")
+        return matrix
+    
+    def match_templates(self, templates: np.ndarray, encoding: np.ndarray) -> TemplateMatch:
+        """Compare a live encoding against all reference templates in one vectorized step"""
+        templates = np.atleast_2d(templates)
+        
+        if self.config.USE_CENTROID_PRECHECK and len(templates) > 1:
+            centroid_distance = float(np.linalg.norm(templates.mean(axis=0) - encoding))
+            if centroid_distance <= self.config.CENTROID_ACCEPT_DISTANCE:
+                return TemplateMatch(is_match=True, distance=centroid_distance, template_index=-1)
+        
+        distances = np.linalg.norm(templates - encoding, axis=1)
+        best = int(np.argmin(distances))
+        distance = float(distances[best])
+        return TemplateMatch(
+            is_match=distance <= self.config.TOLERANCE,
+            distance=distance,
+            template_index=best
+        )
+    
+    def encode_frame(self, frame: FrameScore) -> np.ndarray:
+        """Encode a scored frame, reusing the face box found while scoring"""
+        encodings = face_recognition.face_encodings(frame.image, [frame.location])
+        if not encodings:
+            raise NoFaceFoundError("Could not generate face encoding")
+        return encodings[0]
+    
+    def verify_burst(self, templates: np.ndarray, frames: List[bytes]) -> Tuple[TemplateMatch, np.ndarray, FrameScore]:
+        """Verify a capture burst by encoding only its best frames.
         
-        encoding = self.create_face_encoding(image_data)
-        self.encoding_cache.set(employee_id, encoding)
-        logger.info(f"Face encoding cached for employee {employee_id}")
+        The runner-up frame is encoded only when the best one does not match.
+        """
+        best_frames = self.frame_scorer.select_best(frames, self.frame_scorer.config.ENCODE_TOP_K)
+        if not best_frames:
+            raise NoFaceFoundError("No usable face found in the captured frames")
+        
+        best = None
+        for frame in best_frames:
+            encoding = self.encode_frame(frame)
+            template_match = self.match_templates(templates, encoding)
+            if best is None or template_match.distance < best[0].distance:
+                best = (template_match, encoding, frame)
+            if template_match.is_match:
+                break
+        return best
+    
+    def enroll_templates(self, employee_id: int, images: List[bytes], created_by: int = None) -> Tuple[int, int]:
+        """Encode uploaded reference photos and store them as templates.
+        
+        Returns (enrolled, rejected) counts.
+        """
+        encodings = []
+        rejected = 0
+        for image_data in images:
+            try:
+                encodings.append(self.create_face_encoding(image_data))
+            except FaceEncodingError as e:
+                logger.warning(f"Rejected template image for employee {employee_id}: {e}")
+                rejected += 1
+        
+        enrolled = self.store_templates(employee_id, encodings, created_by=created_by)
+        return enrolled, rejected + len(encodings) - enrolled
+    
+    def enroll_from_burst(self, employee_id: int, frames: List[bytes], created_by: int = None) -> Tuple[int, List[FrameScore]]:
+        """Enroll the best frame(s) of a capture burst as templates"""
+        best_frames = self.frame_scorer.select_best(frames)
+        if not best_frames:
+            raise NoFaceFoundError("No usable face found in the captured frames")
+        
+        encodings = [self.encode_frame(frame) for frame in best_frames]
+        return self.store_templates(employee_id, encodings, created_by=created_by), best_frames
+    
+    def store_templates(self, employee_id: int, encodings: List[np.ndarray], source: str = 'upload',
+                        created_by: int = None) -> int:
+        """Persist encodings as templates within the per-employee cap.
+
+        Only curated (non-adaptive) templates limit the room; the oldest
+        adaptive templates are dropped to make space for uploaded ones.
+        """
+        cap = self.config.MAX_TEMPLATES_PER_EMPLOYEE
+        templates = FaceTemplateModel.get_templates(employee_id)
+        adaptive = [t for t in templates if t['source'] == ADAPTIVE_SOURCE]  # oldest first
+        curated = len(templates) - len(adaptive)
+        accepted = encodings[:max(cap - curated, 0)]
+        
+        overflow = curated + len(adaptive) + len(accepted) - cap
+        if accepted and overflow > 0:
+            FaceTemplateModel.delete_ids([t['id'] for t in adaptive[:overflow]])
+        
+        enrolled = FaceTemplateModel.add_many(employee_id, accepted, source=source, created_by=created_by)
+        self.invalidate_employee(employee_id)
+        return enrolled
+    
+    def invalidate_employee(self, employee_id: int) -> None:
+        """Drop cached encodings after the employee's image or templates change, here and in the other workers"""
+        self.encoding_cache.remove(employee_id)
+        if self._template_stamp.bump():
+            self.encoding_cache.clear()  # another worker's template change was not picked up yet
+    
+    def _sync_templates(self) -> None:
+        """Drop every cached encoding if another worker changed templates"""
+        if self._template_stamp.changed():
+            self.encoding_cache.clear()
     
     def process_frame(self, frame: np.ndarray, employee_id: int) -> FrameProcessor:
         """Process frame for face recognition"""
         self._frame_count += 1
         
+        self._sync_templates()
         known_encoding = self.encoding_cache.get(employee_id)
         if known_encoding is None:
             raise FaceEncodingError(f"No encoding found for employee {employee_id}")
@@ -120,19 +257,18 @@ class FaceRecognitionService:
             
             for face_encoding, face_location in zip(face_encodings, face_locations):
 
-                face_matches = face_recognition.compare_faces([known_encoding], face_encoding, tolerance=self.config.TOLERANCE)
-                face_distances = face_recognition.face_distance([known_encoding], face_encoding)
+                template_match = self.match_templates(known_encoding, face_encoding)
                 
                 # Scale back face location
                 top, right, bottom, left = [int(coord / self.config.SCALE_FACTOR) for coord in face_location]
                 
-                is_match = face_matches[0] and face_distances[0] < self.config.TOLERANCE
-                confidence = (1 - face_distances[0]) * 100 if is_match else 0
+                is_match = template_match.is_match
+                confidence = (1 - template_match.distance) * 100 if is_match else 0
                 
                 matches.append(FaceMatch(
                     is_match=is_match,
                     confidence=confidence,
-                    distance=face_distances[0],
+                    distance=template_match.distance,
                     location=(top, right, bottom, left)
                 ))
                 
@@ -0,0 +1,121 @@
+"""Cheap quality scoring of capture bursts to pick the frame worth encoding"""
+
+import cv2
+import logging
+import numpy as np
+import face_recognition
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .config import FrameQualityConfig, FaceRecognitionConfig
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FrameScore:
+    """Quality score of one frame in a burst"""
+    index: int
+    score: float
+    sharpness: float = 0.0
+    face_size: float = 0.0
+    frontalness: float = 0.0
+    face_count: int = 0
+    # Full resolution RGB frame and face box, kept so the winner is not decoded or detected twice
+    image: Optional[np.ndarray] = field(default=None, repr=False)
+    location: Optional[Tuple[int, int, int, int]] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'index': self.index,
+            'score': round(self.score, 4),
+            'sharpness': round(self.sharpness, 2),
+            'face_size': round(self.face_size, 4),
+            'frontalness': round(self.frontalness, 4),
+            'face_count': self.face_count,
+        }
+
+class FrameQualityScorer:
+    """Scores frames on sharpness, face size and frontalness"""
+
+    def __init__(self, config: FrameQualityConfig = None, model: str = FaceRecognitionConfig.MODEL):
+        self.config = config or FrameQualityConfig()
+        self.model = model
+
+    def score(self, index: int, image_data: bytes) -> FrameScore:
+        """Score a single encoded frame; frames without exactly one face score 0"""
+        image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return FrameScore(index=index, score=0.0)
+
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        height, width = rgb_image.shape[:2]
+        scale = min(self.config.SCORING_WIDTH / width, 1.0)
+        small = cv2.resize(rgb_image, (0, 0), fx=scale, fy=scale) if scale < 1.0 else rgb_image
+
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+        locations = face_recognition.face_locations(small, model=self.model)
+        if len(locations) != 1:
+            return FrameScore(index=index, score=0.0, sharpness=sharpness, face_count=len(locations))
+
+        top, right, bottom, left = locations[0]
+        face_size = ((bottom - top) * (right - left)) / float(small.shape[0] * small.shape[1])
+        frontalness = self._frontalness(small, locations[0])
+
+        score = (
+            self.config.SHARPNESS_WEIGHT * min(sharpness / self.config.SHARPNESS_REFERENCE, 1.0)
+            + self.config.FACE_SIZE_WEIGHT * min(face_size / self.config.FACE_AREA_REFERENCE, 1.0)
+            + self.config.FRONTALNESS_WEIGHT * frontalness
+        )
+
+        full_location = tuple(int(coord / scale) for coord in locations[0])
+        return FrameScore(
+            index=index,
+            score=score,
+            sharpness=sharpness,
+            face_size=face_size,
+            frontalness=frontalness,
+            face_count=1,
+            image=rgb_image,
+            location=full_location
+        )
+
+    @staticmethod
+    def _frontalness(rgb_image: np.ndarray, location: Tuple[int, int, int, int]) -> float:
+        """1.0 when the nose tip sits midway between the eyes, falling towards 0 for profile views"""
+        landmarks = face_recognition.face_landmarks(rgb_image, [location], model='small')
+        if not landmarks:
+            return 0.0
+
+        points = landmarks[0]
+        left_eye = np.mean(points['left_eye'], axis=0)
+        right_eye = np.mean(points['right_eye'], axis=0)
+        nose = np.mean(points['nose_tip'], axis=0)
+
+        eye_distance = np.linalg.norm(right_eye - left_eye)
+        if eye_distance == 0:
+            return 0.0
+
+        offset = abs(nose[0] - (left_eye[0] + right_eye[0]) / 2.0) / eye_distance
+        return float(max(0.0, 1.0 - 2.0 * offset))
+
+    def rank(self, frames: List[bytes]) -> List[FrameScore]:
+        """Score a burst in parallel, best frame first"""
+        frames = frames[:self.config.MAX_BURST_FRAMES]
+        with ThreadPoolExecutor(max_workers=self.config.MAX_WORKERS) as executor:
+            scores = list(executor.map(self._safe_score, range(len(frames)), frames))
+        return sorted(scores, key=lambda s: s.score, reverse=True)
+
+    def select_best(self, frames: List[bytes], top_k: int = None) -> List[FrameScore]:
+        """Best usable frames of a burst (those with exactly one face)"""
+        top_k = top_k or self.config.ENCODE_TOP_K
+        return [s for s in self.rank(frames) if s.score > 0][:top_k]
+
+    def _safe_score(self, index: int, image_data: bytes) -> FrameScore:
+        try:
+            return self.score(index, image_data)
+        except Exception as e:
+            logger.warning(f"Failed to score frame {index}: {e}")
+            return FrameScore(index=index, score=0.0)
@@ -0,0 +1,104 @@
+"""Normalization of uploaded face photos before they are stored.
+
+Photos are decoded once (OpenCV applies the EXIF orientation while
+decoding), capped on the long side, checked for exactly one face and
+re-encoded compactly. The face encoding and an optional eye-aligned
+face crop are computed from the same decoded image.
+"""
+
+import cv2
+import numpy as np
+import face_recognition
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .config import ImageIngestConfig, FaceRecognitionConfig
+from .exceptions import InvalidImageError, NoFaceFoundError, MultipleFacesFoundError
+
+@dataclass
+class IngestedPhoto:
+    """Normalized photo and what was derived from it"""
+    photo: bytes
+    encoding: Optional[np.ndarray] = None
+    face_crop: Optional[bytes] = None
+
+def decode_image(image_data: bytes) -> np.ndarray:
+    """Decode image bytes to a BGR array (OpenCV applies EXIF orientation)"""
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise InvalidImageError("Could not decode image data")
+    return image
+
+def downscale(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Cap the long side of an image, keeping its aspect ratio"""
+    height, width = image.shape[:2]
+    scale = max_side / float(max(height, width))
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (int(round(width * scale)), int(round(height * scale))), interpolation=cv2.INTER_AREA)
+
+def encode_image(image: np.ndarray, config: ImageIngestConfig = None) -> bytes:
+    """Re-encode a BGR image as JPEG or WebP"""
+    config = config or ImageIngestConfig()
+    if config.FORMAT == 'webp':
+        ok, buffer = cv2.imencode('.webp', image, [int(cv2.IMWRITE_WEBP_QUALITY), config.WEBP_QUALITY])
+    else:
+        ok, buffer = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), config.JPEG_QUALITY])
+    if not ok:
+        raise InvalidImageError("Could not encode image")
+    return buffer.tobytes()
+
+def normalize_photo(image_data: bytes, config: ImageIngestConfig = None) -> bytes:
+    """Decode once, cap the long side and re-encode, without any face checks"""
+    config = config or ImageIngestConfig()
+    return encode_image(downscale(decode_image(image_data), config.MAX_SIDE), config)
+
+def align_face_crop(image: np.ndarray, rgb_image: np.ndarray, location: Tuple[int, int, int, int],
+                    config: ImageIngestConfig) -> np.ndarray:
+    """Square face crop rotated so the eyes are level"""
+    top, right, bottom, left = location
+    center = ((left + right) / 2.0, (top + bottom) / 2.0)
+    angle = 0.0
+
+    landmarks = face_recognition.face_landmarks(rgb_image, [location], model='small')
+    if landmarks:
+        left_eye = np.mean(landmarks[0]['left_eye'], axis=0)
+        right_eye = np.mean(landmarks[0]['right_eye'], axis=0)
+        angle = float(np.degrees(np.arctan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0])))
+
+    rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
+    rotated = cv2.warpAffine(image, rotation, (image.shape[1], image.shape[0]), borderMode=cv2.BORDER_REPLICATE)
+
+    half = max(right - left, bottom - top) * (1.0 + config.FACE_CROP_MARGIN) / 2.0
+    x0, y0 = int(max(center[0] - half, 0)), int(max(center[1] - half, 0))
+    x1, y1 = int(min(center[0] + half, image.shape[1])), int(min(center[1] + half, image.shape[0]))
+    return cv2.resize(rotated[y0:y1, x0:x1], (config.FACE_CROP_SIZE, config.FACE_CROP_SIZE), interpolation=cv2.INTER_AREA)
+
+def ingest_photo(image_data: bytes, config: ImageIngestConfig = None, compute_encoding: bool = True,
+                 model: str = FaceRecognitionConfig.MODEL) -> IngestedPhoto:
+    """Normalize an uploaded photo, rejecting it unless it shows exactly one face"""
+    config = config or ImageIngestConfig()
+    image = downscale(decode_image(image_data), config.MAX_SIDE)
+
+    if not (config.REQUIRE_SINGLE_FACE or compute_encoding or config.STORE_FACE_CROP):
+        return IngestedPhoto(photo=encode_image(image, config))
+
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    locations = face_recognition.face_locations(rgb_image, model=model)
+    if not locations:
+        raise NoFaceFoundError("No face found in the image")
+    if len(locations) > 1 and config.REQUIRE_SINGLE_FACE:
+        raise MultipleFacesFoundError(f"{len(locations)} faces found, the photo must show exactly one person")
+
+    encoding = None
+    if compute_encoding:
+        encodings = face_recognition.face_encodings(rgb_image, locations[:1])
+        if not encodings:
+            raise NoFaceFoundError("Could not generate face encoding")
+        encoding = encodings[0]
+
+    face_crop = None
+    if config.STORE_FACE_CROP:
+        face_crop = encode_image(align_face_crop(image, rgb_image, locations[0], config), config)
+
+    return IngestedPhoto(photo=encode_image(image, config), encoding=encoding, face_crop=face_crop)
@@ -1,8 +1,12 @@
 """Database models for face recognition module"""
 
 import logging
+import numpy as np
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from app.database import DatabaseManager
+from app.database.blob_store import load_image
+from app.database.wage_snapshot import wage_snapshots
 from .exceptions import DatabaseError
 
 logger = logging.getLogger(__name__)
@@ -11,13 +15,15 @@ class EmployeeFaceModel:
     """Employee model for face recognition"""
     
     def __init__(self, employee_id: int, nucleus_id: str, name: str, 
-                 father_name: str, image: bytes = None, is_active: bool = True):
+                 father_name: str, image: bytes = None, is_active: bool = True,
+                 image_hash: str = None):
         self.employee_id = employee_id
         self.nucleus_id = nucleus_id
         self.name = name
         self.father_name = father_name
         self.image = image
         self.is_active = is_active
+        self.image_hash = image_hash
     
     @classmethod
     def get_by_id(cls, employee_id: int) -> Optional['EmployeeFaceModel']:
@@ -29,7 +35,7 @@ class EmployeeFaceModel:
             
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT NucleusId, Name, FatherName, Image, IsActive
+                SELECT NucleusId, Name, FatherName, Image, IsActive, ImageHash
                 FROM Employee 
                 WHERE NucleusId = ? AND IsActive = 1
             """, (employee_id,))
@@ -44,7 +50,8 @@ class EmployeeFaceModel:
                 name=result[1],
                 father_name=result[2],
                 image=result[3],
-                is_active=result[4]
+                is_active=result[4],
+                image_hash=result[5]
             )
             
         except Exception as e:
@@ -64,9 +71,9 @@ class EmployeeFaceModel:
             
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT NucleusId, Name, FatherName, Image 
+                SELECT NucleusId, Name, FatherName, Image, ImageHash
                 FROM Employee 
-                WHERE IsActive = 1 AND Image IS NOT NULL
+                WHERE IsActive = 1 AND (Image IS NOT NULL OR ImageHash IS NOT NULL)
                 ORDER BY Name
             """)
             
@@ -79,7 +86,8 @@ class EmployeeFaceModel:
                     nucleus_id=result[0],
                     name=result[1],
                     father_name=result[2],
-                    image=result[3]
+                    image=result[3],
+                    image_hash=result[4]
                 ))
             
             return employees
@@ -93,9 +101,148 @@ class EmployeeFaceModel:
     
     @property
     def Image(self) -> Optional[bytes]:
-        """Property for backward compatibility"""
+        """Photo bytes; memory-mapped from the blob store when the row only keeps the hash"""
+        if self.image is None and self.image_hash:
+            self.image = load_image(None, self.image_hash)
         return self.image
 
+class FaceTemplateModel:
+    """Additional reference face encodings (templates) enrolled per employee"""
+
+    ENCODING_DTYPE = np.float64
+    ENCODING_SIZE = 128
+    # Encoding of the current Employee.Image, saved so it is not recomputed on every cache miss
+    PROFILE_SOURCE = 'profile'
+
+    @classmethod
+    def to_bytes(cls, encoding: np.ndarray) -> bytes:
+        """Serialize a single face encoding for the varbinary column"""
+        return np.asarray(encoding, dtype=cls.ENCODING_DTYPE).reshape(cls.ENCODING_SIZE).tobytes()
+
+    @classmethod
+    def from_rows(cls, rows) -> np.ndarray:
+        """Stack encoding blobs into a (k, 128) matrix"""
+        if not rows:
+            return np.empty((0, cls.ENCODING_SIZE), dtype=cls.ENCODING_DTYPE)
+        return np.vstack([np.frombuffer(row[0], dtype=cls.ENCODING_DTYPE) for row in rows])
+
+    @classmethod
+    def get_encodings(cls, nucleus_id: int) -> np.ndarray:
+        """Get all template encodings of an employee as a (k, 128) matrix"""
+        try:
+            conn = DatabaseManager.get_connection()
+            if not conn:
+                raise DatabaseError("Database connection failed")
+
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT Encoding
+                FROM EmployeeFaceTemplate
+                WHERE NucleusId = ?
+                ORDER BY CreatedAt
+            """, (nucleus_id,))
+
+            return cls.from_rows(cursor.fetchall())
+
+        except Exception as e:
+            logger.error(f"Error fetching face templates for {nucleus_id}: {e}")
+            raise DatabaseError(f"Failed to fetch face templates: {e}")
+        finally:
+            if 'conn' in locals() and conn:
+                conn.close()
+
+    @classmethod
+    def get_templates(cls, nucleus_id: int) -> List[Dict[str, Any]]:
+        """Get templates of an employee with their metadata, oldest first"""
+        rows = DatabaseManager.execute_query("""
+            SELECT Id, Encoding, Source, CreatedAt
+            FROM EmployeeFaceTemplate
+            WHERE NucleusId = ?
+            ORDER BY CreatedAt
+        """, (nucleus_id,), fetch_all=True)
+
+        return [{
+            'id': row[0],
+            'encoding': np.frombuffer(row[1], dtype=cls.ENCODING_DTYPE),
+            'source': row[2],
+            'created_at': row[3]
+        } for row in rows or []]
+
+    @staticmethod
+    def delete_ids(template_ids: List[int]) -> bool:
+        """Delete specific templates by Id"""
+        if not template_ids:
+            return True
+        placeholders = ', '.join('?' for _ in template_ids)
+        return DatabaseManager.execute_query(
+            f"DELETE FROM EmployeeFaceTemplate WHERE Id IN ({placeholders})",
+            tuple(template_ids)
+        )
+
+    @classmethod
+    def get_all_encodings(cls):
+        """Get every enrolled template as (labels, matrix) for offline analysis"""
+        rows = DatabaseManager.execute_query("""
+            SELECT Encoding, NucleusId
+            FROM EmployeeFaceTemplate
+            ORDER BY NucleusId
+        """, fetch_all=True) or []
+
+        labels = np.array([row[1] for row in rows], dtype=np.int64)
+        return labels, cls.from_rows(rows)
+
+    @staticmethod
+    def count(nucleus_id: int) -> int:
+        """Number of templates enrolled for an employee"""
+        result = DatabaseManager.execute_query(
+            "SELECT COUNT(*) FROM EmployeeFaceTemplate WHERE NucleusId = ?",
+            (nucleus_id,),
+            fetch_one=True
+        )
+        return result[0] if result else 0
+
+    @classmethod
+    def add_many(cls, nucleus_id: int, encodings: List[np.ndarray], source: str = 'upload',
+                 created_by: int = None) -> int:
+        """Insert several templates for an employee in one round trip"""
+        if not encodings:
+            return 0
+        try:
+            conn = DatabaseManager.get_connection()
+            if not conn:
+                raise DatabaseError("Database connection failed")
+
+            cursor = conn.cursor()
+            now = datetime.now()
+            cursor.executemany("""
+                INSERT INTO EmployeeFaceTemplate (NucleusId, Encoding, Source, CreatedBy, CreatedAt)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(nucleus_id, cls.to_bytes(encoding), source, created_by, now) for encoding in encodings])
+            conn.commit()
+
+            logger.info(f"Enrolled {len(encodings)} face template(s) for NucleusId {nucleus_id}")
+            return len(encodings)
+
+        except Exception as e:
+            logger.error(f"Error saving face templates for {nucleus_id}: {e}")
+            raise DatabaseError(f"Failed to save face templates: {e}")
+        finally:
+            if 'conn' in locals() and conn:
+                conn.close()
+
+    @staticmethod
+    def delete_for_employee(nucleus_id: int, source: str = None) -> bool:
+        """Remove the templates of an employee, optionally only those from one source"""
+        if source:
+            return DatabaseManager.execute_query(
+                "DELETE FROM EmployeeFaceTemplate WHERE NucleusId = ? AND Source = ?",
+                (nucleus_id, source)
+            )
+        return DatabaseManager.execute_query(
+            "DELETE FROM EmployeeFaceTemplate WHERE NucleusId = ?",
+            (nucleus_id,)
+        )
+
 class WagesModel:
     """Wages model for payment verification"""
     
@@ -159,6 +306,7 @@ class WagesModel:
             
             conn.commit()
             self.is_paid = True
+            DatabaseManager.after_commit(wage_snapshots.invalidate)
             
             logger.info(f"Wages marked as paid for {self.name} (NucleusId: {self.nucleus_id})")
             return True
@@ -224,12 +372,14 @@ class EmployeeModel:
                 FROM WagesUpload
                 WHERE NucleusId = ?
                 and UnitId = ?
-                and CreatedAt = (
-                SELECT MAX(CreatedAt) 
-                FROM WagesUpload wu 
-                WHERE wu.NucleusId = WagesUpload.NucleusId
+                and BatchId = (
+                SELECT TOP 1 wb.Id
+                FROM WagesUpload wu
+                INNER JOIN WageBatch wb ON wb.Id = wu.BatchId
+                WHERE wu.NucleusId = ?
+                ORDER BY wb.BatchDate DESC, wu.CreatedAt DESC
                 )
-            """, (employeeID,unitID,))
+            """, (employeeID,unitID,employeeID,))
 
             results = cursor.fetchone()
             if not results:
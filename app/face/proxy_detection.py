@@ -0,0 +1,145 @@
+"""Proxy-collection detection over logged live verification encodings.
+
+Clusters a payday's live captures (per unit, or across units) by face
+distance and reports clusters that span several NucleusIds, i.e. one
+face collecting wages for more than one labour code.
+
+Usage:
+    python -m app.face.proxy_detection --date 2025-09-22 [--unit 1] [--across-units] [--output report.json]
+"""
+
+import argparse
+import json
+import logging
+import numpy as np
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from .config import FaceRecognitionConfig
+from .distances import iter_distance_blocks, upper_triangle_mask, DEFAULT_BLOCK_SIZE
+from .encoding_log import VerificationEncodingLog
+
+logger = logging.getLogger(__name__)
+
+class UnionFind:
+    """Disjoint sets over record indices with path halving and union by size"""
+
+    def __init__(self, size: int):
+        self.parent = np.arange(size)
+        self.size = np.ones(size, dtype=np.int64)
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def roots(self) -> np.ndarray:
+        return np.array([self.find(i) for i in range(len(self.parent))])
+
+class ProxyCollectionDetector:
+    """Finds faces that were verified against more than one labour code"""
+
+    def __init__(self, threshold: float = FaceRecognitionConfig.PROXY_CLUSTER_DISTANCE,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.threshold = threshold
+        self.block_size = block_size
+
+    def cluster(self, records: np.ndarray) -> np.ndarray:
+        """Cluster label (root index) per record: connected components of captures within threshold"""
+        union_find = UnionFind(len(records))
+        encodings = records['encoding']
+
+        for row_start, col_start, distances in iter_distance_blocks(encodings, self.block_size):
+            edges = distances <= self.threshold
+            if row_start == col_start:
+                edges &= upper_triangle_mask(row_start, col_start, distances.shape)
+
+            # Same-code edges are joined too: two captures of one code that each match a
+            # different impostor code belong to one ring, not two findings
+            rows, cols = np.nonzero(edges)
+            rows += row_start
+            cols += col_start
+            for a, b in zip(rows, cols):
+                union_find.union(int(a), int(b))
+
+        return union_find.roots()
+
+    def detect(self, records: np.ndarray) -> List[Dict]:
+        """Clusters spanning more than one NucleusId, largest first"""
+        if len(records) < 2:
+            return []
+
+        labels = self.cluster(records)
+        suspicious = []
+        for label in np.unique(labels):
+            members = records[labels == label]
+            nucleus_ids = np.unique(members['nucleus_id'])
+            if len(nucleus_ids) < 2:
+                continue
+
+            suspicious.append({
+                'nucleus_ids': [int(n) for n in nucleus_ids],
+                'units': sorted({int(u) for u in members['unit_id']}),
+                'captures': int(len(members)),
+                'first_seen': datetime.fromtimestamp(float(members['timestamp'].min())).isoformat(),
+                'last_seen': datetime.fromtimestamp(float(members['timestamp'].max())).isoformat(),
+                'matched_captures': int(members['matched'].sum()),
+            })
+
+        return sorted(suspicious, key=lambda c: (len(c['nucleus_ids']), c['captures']), reverse=True)
+
+def run(payday: date, unit_id: Optional[int] = None, across_units: bool = False,
+        threshold: float = FaceRecognitionConfig.PROXY_CLUSTER_DISTANCE,
+        encoding_log: VerificationEncodingLog = None) -> Dict:
+    """Detect proxy collections for a payday, per unit unless across_units is set"""
+    encoding_log = encoding_log or VerificationEncodingLog()
+    records = encoding_log.load(payday, unit_id=unit_id)
+    detector = ProxyCollectionDetector(threshold=threshold)
+
+    if across_units:
+        groups = {'all': records}
+    else:
+        groups = {int(u): records[records['unit_id'] == u] for u in np.unique(records['unit_id'])}
+
+    started = datetime.now()
+    clusters = {str(group): detector.detect(group_records) for group, group_records in groups.items()}
+
+    return {
+        'payday': payday.isoformat(),
+        'threshold': threshold,
+        'captures': int(len(records)),
+        'elapsed_seconds': round((datetime.now() - started).total_seconds(), 3),
+        'clusters': {group: found for group, found in clusters.items() if found},
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Detect one face collecting wages for several labour codes")
+    parser.add_argument('--date', default=date.today().isoformat(), help="Payday (YYYY-MM-DD)")
+    parser.add_argument('--unit', type=int, help="Restrict to one unit")
+    parser.add_argument('--across-units', action='store_true', help="Cluster all units together")
+    parser.add_argument('--threshold', type=float, default=FaceRecognitionConfig.PROXY_CLUSTER_DISTANCE)
+    parser.add_argument('--output', help="JSON report path (prints to stdout otherwise)")
+    args = parser.parse_args(argv)
+
+    report = run(date.fromisoformat(args.date), args.unit, args.across_units, args.threshold)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -4,16 +4,20 @@ import logging
 from flask import request, render_template, flash,Response, session, jsonify
 from app.auth.decorators import require_auth, require_role
 from app.database import DatabaseManager
+from app.database.blob_store import load_image
+from app.database.wage_snapshot import wage_snapshots
+from app.database.wage_listings import unpaid_batch_page, unpaid_history_page
+from app.database.employee_search import employee_search
 from .models import EmployeeFaceModel
-from .models import EmployeeModel
 from app.contractors.models import ContractorModel
 from .face_service import FaceRecognitionService
-from .exceptions import FaceRecognitionError
-from .utils import  get_upload_data, mark_labour_as_paid_for_code,check_labour_ispaid_or_not,mark_labour_as_paid_for_face,PreviousWeekUnpaidEmployeesfromDB,FilterByDatePreviousWeek,get_EmployeeByLabourId
+from .template_refresh import TemplateRefreshWorker
+from .encoding_log import VerificationEncodingLog
+from .config import AppConfig
+from .exceptions import FaceRecognitionError, FaceEncodingError
+from .utils import  decode_data_url, get_upload_data, mark_labour_as_paid_for_code,check_labour_ispaid_or_not,mark_labour_as_paid_for_face,get_EmployeeByLabourId,get_name_and_amount,parse_date
+from app.media.routes import employee_image_url
 from . import face_bp
-import face_recognition
-import base64
-import io
 from datetime import datetime
 
 
@@ -21,8 +25,12 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+MAX_SEARCH_SUGGESTIONS = 50
+
 
 face_service = FaceRecognitionService()
+template_refresh = TemplateRefreshWorker(face_service)
+encoding_log = VerificationEncodingLog()
 
 
 @face_bp.route('/cashier/dashboard')
@@ -74,21 +82,19 @@ def GetEmployeeById_onFacePage():
         return jsonify({'message': 'ID must be a valid integer'})
     try:
         employee = EmployeeFaceModel.get_by_id(employee_id)
-        row = EmployeeModel.getNameandAmount(employee_id,cashier_unit)
+        row = get_name_and_amount(employee_id, cashier_unit)
         
         if not employee or not employee.Image:
             flash("Employee not found or no image available.", "error")
             return jsonify({'message': 'Employee not found or no image available.'})
         face_service.load_employee_encoding(employee_id, employee.Image)
 
-        import base64
-        image_base64 = "data:image/png;base64," + base64.b64encode(employee.Image).decode('utf-8')
         return jsonify({
             "status": "success",
             "employee_id": employee_id,
             "employee_name": row[0],
             "employee_amount": row[1],
-            "employee_image": image_base64,
+            "employee_image": employee_image_url(employee_id),
             "message": "Employee fetched"
         })
                              
@@ -111,6 +117,7 @@ def VerifyEmployee_onFacePage():
         data = request.get_json(force=True)
         neclusid = data.get("neclusid")
         live_image_data = data.get("live_image")  # optional
+        live_frames = data.get("live_frames")  # optional capture burst, preferred over live_image
         cashier_unit=session['cashier_unit']
 
         if not neclusid:
@@ -119,7 +126,7 @@ def VerifyEmployee_onFacePage():
         conn = DatabaseManager.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT TOP 1 NucleusId, Name, Image
+            SELECT TOP 1 NucleusId, Name, Image, ImageHash
             FROM Employee
             WHERE NucleusId = ?
         """, (neclusid,))
@@ -128,39 +135,45 @@ def VerifyEmployee_onFacePage():
         if not row:
             return jsonify({"status": "error", "message": "Employee not found"}), 404
 
-        nucleus_id, name, image_bytes = row
+        nucleus_id, name, image_bytes, image_hash = row
+        image_bytes = load_image(image_bytes, image_hash)
         if not image_bytes:
             return jsonify({"status": "error", "message": "Employee has no stored face image"}), 404
 
-        # Convert DB image to Base64 for frontend
-        image_base64 = "data:image/png;base64," + base64.b64encode(image_bytes).decode('utf-8')
-
         # If no live image sent → return employee info
-        if not live_image_data:
+        if not live_image_data and not live_frames:
             return jsonify({
                 "status": "success",
                 "neclusid": nucleus_id,
                 "employee_name": name,
-                "employee_image": image_base64,
+                "employee_image": employee_image_url(nucleus_id),
                 "message": "Employee fetched"
             })
 
         # ===== Face Recognition =====
-        db_image = face_recognition.load_image_file(io.BytesIO(image_bytes))
-        db_encodings = face_recognition.face_encodings(db_image)
-        if not db_encodings:
+        try:
+            templates = face_service.load_employee_encoding(int(nucleus_id), image_bytes)
+        except FaceEncodingError:
             return jsonify({"status": "error", "message": "No face detected in stored employee image"}), 400
-        db_encoding = db_encodings[0]
 
-        header, encoded = live_image_data.split(",", 1)
-        live_image_bytes = base64.b64decode(encoded)
-        live_image = face_recognition.load_image_file(io.BytesIO(live_image_bytes))
-        live_encodings = face_recognition.face_encodings(live_image)
-        if not live_encodings:
+        try:
+            if live_frames:
+                frames = [decode_data_url(frame) for frame in live_frames]
+                template_match, live_encoding, _ = face_service.verify_burst(templates, frames)
+            else:
+                live_encoding = face_service.create_face_encoding(decode_data_url(live_image_data))
+                template_match = face_service.match_templates(templates, live_encoding)
+        except FaceEncodingError:
             return jsonify({"status": "error", "message": "No face detected in live image"}), 400
-        live_encoding = live_encodings[0]
 
-        matched = face_recognition.compare_faces([db_encoding], live_encoding, tolerance=0.5)[0]
+        matched = template_match.is_match
+        if AppConfig.ENCODING_LOG_ENABLED:
+            try:
+                encoding_log.append(nucleus_id, cashier_unit, live_encoding, template_match.distance, matched)
+            except OSError as e:
+                logger.error(f"Failed to log verification encoding for {nucleus_id}: {e}")
+        if matched:
+            template_refresh.submit(int(nucleus_id), live_encoding, template_match.distance, templates)
         message = "Matched ✅" if matched else "Unknown ❌"
         # ===== Update WagesUpload if matched =====
         if matched:
@@ -223,6 +236,38 @@ def VerifyEmployee_onFacePage():
     
     
 
+@face_bp.route('/api/EnrollFromBurst', methods=["POST"])
+@require_auth
+@require_role(['admin', 'hr'])
+def EnrollFromBurst():
+    """Enroll the best frame(s) of a capture burst as face templates"""
+    data = request.get_json(silent=True) or {}
+    neclusid = data.get("neclusid")
+    frames = data.get("frames") or []
+
+    if not neclusid or not frames:
+        return jsonify({"status": "error", "message": "Employee Code and captured frames are required"}), 400
+
+    try:
+        nucleus_id = int(neclusid)
+        enrolled, best_frames = face_service.enroll_from_burst(
+            nucleus_id, [decode_data_url(frame) for frame in frames], session['user_id']
+        )
+        return jsonify({
+            "status": "success",
+            "message": f"{enrolled} face template(s) enrolled",
+            "enrolled": enrolled,
+            "frames": [frame.to_dict() for frame in best_frames]
+        })
+    except (ValueError, TypeError):
+        return jsonify({"status": "error", "message": "Invalid Employee Code or frame data"}), 400
+    except FaceEncodingError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error enrolling from burst for {neclusid}: {e}")
+        return jsonify({"status": "error", "message": "Enrollment failed"}), 500
+
+
 @face_bp.route('/cashier/RenderCodePage')
 @require_auth
 @require_role(['admin', 'cashier:match'])
@@ -279,9 +324,7 @@ def MatchbyCode():
         if not employee or not employee.Image:
             return jsonify({"status": "error", "message": "Employee not found or no image"})
 
-        import base64
-        image_base64 = base64.b64encode(employee.Image).decode("utf-8")
-        row = EmployeeModel.getNameandAmount(employee_id,cashier_unit)
+        row = get_name_and_amount(employee_id, cashier_unit)
         return jsonify({
             "status": "success",
             "employee_id": employee_id,
@@ -289,7 +332,7 @@ def MatchbyCode():
                 "LabourName": row.LabourName if hasattr(row, "LabourName") else row[0],
                 "Amount": row.Amount if hasattr(row, "Amount") else row[1]
             },
-            "image_base64": image_base64
+            "image_url": employee_image_url(employee_id)
         })
     except Exception as e:
         return jsonify({"status": "error", "message": "Unexpected error occurred"})
@@ -350,38 +393,20 @@ def verify_employeebyCode():
 def ViewUnpaidEmployees():
     return render_template('FaceRecognition/PreviousWeekUnpaidEmployee.html')
 
-@face_bp.route("/api/PreviousWeekUnpaidEmployees", methods=["GET", "POST"])
+@face_bp.route("/api/PreviousWeekUnpaidEmployees", methods=["GET"])
 @require_auth
 @require_role(['admin', 'cashier:match','cashier:paid'])
 def PreviousWeekUnpaidEmployees():
+    """DataTables page of the unit's unpaid labour: latest batch, or batches between from_date and to_date"""
     cashier_unit = session.get('cashier_unit', 1)
-    data = request.get_json(silent=True)
-    fromDate, toDate = None, None  
-    if data:
-        fromDate = data.get("from_date")
-        toDate = data.get("to_date")
-    if fromDate and toDate:
-        employees = FilterByDatePreviousWeek(cashier_unit, fromDate, toDate)
-    else:
-        employees = PreviousWeekUnpaidEmployeesfromDB(cashier_unit)
-    result = []
-    for row in employees:
-        result.append({
-            "NucleusId": row.get("NucleusId"),
-            "ContractorId": row.get("ContractorId"),
-            "LabourName": row.get("LabourName"),
-            "ContractorName": row.get("ContractorName"),
-            "Amount": row.get("Amount"),
-            "UnitId": row.get("UnitId"),
-            "UnitName": row.get("UnitName"),
-            "IsPaid": row.get("IsPaid"),
-            "VerifyType": row.get("VerifyType"),
-            "CreatedBy": row.get("CreatedBy"),
-            "CreatedAt": row.get("CreatedAt").strftime("%Y-%m-%d %H:%M:%S") 
-                          if row.get("CreatedAt") else None,
-        })
-
-    return jsonify(result)  
+    fromDate = parse_date(request.args.get("from_date"))
+    toDate = parse_date(request.args.get("to_date"))
+    try:
+        return jsonify(unpaid_batch_page(request.args, cashier_unit, fromDate, toDate))
+    except Exception as e:
+        logger.error(f"Failed to load previous week unpaid employees: {e}")
+        return jsonify({"draw": request.args.get("draw", type=int, default=0),
+                        "error": "Failed to load unpaid employees"}), 500
 
 
 @face_bp.route('/SearchEmployeeByCode')
@@ -402,11 +427,6 @@ def SearchEmployeeByCode():
 
     employee = get_EmployeeByLabourId(LabourId)
     if employee: 
-            image_data = employee[7]
-            image_base64 = None
-            if image_data:
-                image_base64 = base64.b64encode(image_data).decode('utf-8')
-
             return jsonify({
             "Employee": {
                 "NucleusId": employee[0],
@@ -416,7 +436,7 @@ def SearchEmployeeByCode():
                 "Address": employee[4],
                 "ContractorName": employee[5],
                 "UnitId": employee[6],
-                "Image": f"data:image/jpeg;base64,{image_base64}" if image_base64 else None,
+                "Image": employee_image_url(employee[0]) if employee[7] else None,
                 "IsActive": employee[8],
             }
         })
@@ -424,6 +444,22 @@ def SearchEmployeeByCode():
     return jsonify([])
 
 
+@face_bp.route('/api/SearchEmployees', methods=['GET'])
+@require_auth
+@require_role(['admin', 'cashier:match', 'cashier:paid'])
+def SearchEmployees():
+    """Typeahead suggestions over active employees by code prefix, name, father name or contractor"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', type=int, default=employee_search.default_limit), 1), MAX_SEARCH_SUGGESTIONS)
+    if not query:
+        return jsonify({"query": query, "results": []})
+    try:
+        return jsonify({"query": query, "results": employee_search.search(query, limit)})
+    except Exception as e:
+        logger.error(f"Employee search failed: {e}")
+        return jsonify({"status": "error", "message": "Search is unavailable"}), 503
+
+
 #Author: Abrar ul Hassan, Comment: Wages pay to unpaid Employee, Created At: 10-06-2025
 @face_bp.route('/ViewWagesPayEmployees')
 @require_auth
@@ -437,50 +473,9 @@ def ViewWagesPayEmployee():
 @require_role(['admin', 'cashier:match', 'cashier:paid'])
 def get_all_unpaid_previous_week():
     try:
-        conn = DatabaseManager.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT 
-                Id,
-                NucleusId,
-                LabourName,
-                ContractorName,
-                Amount,
-                UnitId,
-                IsPaid,
-                CreatedAt,
-                CASE 
-                    WHEN UnitId = 1 THEN 'C4'
-                    WHEN UnitId = 2 THEN 'E-38'
-                    WHEN UnitId = 3 THEN 'B44'
-                    ELSE 'Unknown'
-                END AS UnitName
-            FROM WagesUpload
-            WHERE IsPaid = 0 AND UnitId = ?
-        """,session['cashier_unit'])
-        rows = cursor.fetchall()
-
-        data = []
-        for row in rows:
-            data.append({
-                "Id": row.Id,
-                "NucleusId": row.NucleusId,
-                "LabourName": row.LabourName,
-                "ContractorName": row.ContractorName,
-                "Amount": row.Amount,
-                "UnitName": row.UnitName,
-                "Date": row.CreatedAt.strftime("%Y-%m-%d %H:%M:%S") if row.CreatedAt else None,
-                "IsPaid": row.IsPaid
-            })
-
-        return jsonify(data)
-
+        return jsonify(unpaid_history_page(request.args, session['cashier_unit']))
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+        return jsonify({"draw": request.args.get("draw", type=int, default=0), "error": str(e)}), 500
 
 
 #Author: Abrar ul Hassan, Comment: Paid record go down, then unpaid on top, Updated At: 09-22-2025
@@ -507,6 +502,8 @@ def update_payment_status():
         """, (is_paid, session['user_id'], datetime.now(), session['cashier_unit'], record_id))
 
         conn.commit()
+        # The row may belong to any unit's batch (and moves to this unit), so drop every snapshot
+        DatabaseManager.after_commit(wage_snapshots.invalidate)
 
         if cursor.rowcount > 0:
             return jsonify({"success": True, "message": "Payment updated successfully"})
@@ -0,0 +1,112 @@
+"""Adaptive face template refresh from confident verifications"""
+
+import logging
+import queue
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .config import FaceRecognitionConfig, AppConfig
+from .models import FaceTemplateModel
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE_SOURCE = 'adaptive'
+
+class TemplateRefreshWorker:
+    """Background worker that appends live encodings to an employee's template set.
+
+    Verifications only enqueue work; de-duplication, ageing out and the
+    database writes happen on a single daemon thread off the request path.
+    """
+
+    def __init__(self, face_service, config: FaceRecognitionConfig = None):
+        self.face_service = face_service
+        self.config = config or face_service.config
+        self._queue: queue.Queue = queue.Queue(maxsize=AppConfig.REFRESH_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def submit(self, employee_id: int, encoding: np.ndarray, distance: float,
+               reference: np.ndarray = None) -> bool:
+        """Queue a live encoding if the policy allows learning from it"""
+        if not self.config.ADAPTIVE_REFRESH_ENABLED:
+            return False
+        if distance > self.config.ADAPTIVE_REFRESH_MAX_DISTANCE:
+            return False
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((employee_id, np.array(encoding, copy=True), reference))
+            return True
+        except queue.Full:
+            logger.warning(f"Template refresh queue full, dropping update for employee {employee_id}")
+            return False
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='face-template-refresh', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                employee_id, encoding, reference = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            try:
+                self.refresh(employee_id, encoding, reference)
+            except Exception as e:
+                logger.error(f"Template refresh failed for employee {employee_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def refresh(self, employee_id: int, encoding: np.ndarray, reference: np.ndarray = None) -> bool:
+        """Append the encoding to the template set, then age out old adaptive templates"""
+        templates = FaceTemplateModel.get_templates(employee_id)
+
+        known = [t['encoding'] for t in templates]
+        if reference is not None and len(reference):
+            known.extend(np.atleast_2d(reference))
+        if known:
+            nearest = float(np.min(np.linalg.norm(np.vstack(known) - encoding, axis=1)))
+            if nearest < self.config.TEMPLATE_DEDUP_DISTANCE:
+                return False
+
+        enrolled = [t for t in templates if t['source'] != ADAPTIVE_SOURCE]
+        if len(enrolled) >= self.config.MAX_TEMPLATES_PER_EMPLOYEE:
+            return False
+
+        FaceTemplateModel.add_many(employee_id, [encoding], source=ADAPTIVE_SOURCE)
+        self._prune(employee_id, templates, len(enrolled))
+        self.face_service.invalidate_employee(employee_id)
+        logger.info(f"Adaptive face template added for employee {employee_id}")
+        return True
+
+    def _prune(self, employee_id: int, templates, enrolled_count: int) -> None:
+        """Drop expired adaptive templates and the oldest ones beyond the per-employee cap"""
+        cutoff = datetime.now() - timedelta(days=self.config.ADAPTIVE_TEMPLATE_MAX_AGE_DAYS)
+        adaptive = [t for t in templates if t['source'] == ADAPTIVE_SOURCE]
+
+        expired = [t['id'] for t in adaptive if t['created_at'] and t['created_at'] < cutoff]
+        remaining = [t for t in adaptive if t['id'] not in expired]
+
+        # One slot is taken by the template just inserted
+        allowed = max(self.config.MAX_TEMPLATES_PER_EMPLOYEE - enrolled_count - 1, 0)
+        overflow = [t['id'] for t in remaining[:max(len(remaining) - allowed, 0)]]
+
+        stale = expired + overflow
+        if stale:
+            FaceTemplateModel.delete_ids(stale)
+            logger.info(f"Aged out {len(stale)} adaptive template(s) for employee {employee_id}")
+
+    def stop(self, timeout: float = AppConfig.THREAD_JOIN_TIMEOUT) -> None:
+        """Stop the worker thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
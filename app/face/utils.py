@@ -1,55 +1,42 @@
 """Utility functions for face recognition module"""
 
+import base64
 import logging
 from flask import session
-from typing import List, Dict, Any, Generator
+from typing import List, Any, Generator, Optional
 from app.database import DatabaseManager
+from app.database.wage_snapshot import wage_snapshots
 from datetime import datetime
 from .face_service import FaceRecognitionService
+from .models import EmployeeModel
 logger = logging.getLogger(__name__)
 
-def get_upload_data(unit_id: int) -> List[Dict[str, Any]]:
-    """Fetch upload data from database where UnitId and today's date match."""
-    try:
-        conn = DatabaseManager.get_connection()
-        if conn:
-            cursor = conn.cursor()
-
-            query = """
-                SELECT 
-                NucleusId,
-                ContractorId,
-                LabourName,
-                ContractorName,
-                Amount,
-                CASE WHEN IsPaid = 1 THEN 1 ELSE 0 END AS IsPaid,   -- force into 0/1
-                CASE WHEN IsPaid = 1 THEN 'Yes' ELSE 'No' END AS IsPaidText,
-                UnitId,
-                CreatedBy,
-                CreatedAt
-                FROM WagesUpload
-                WHERE UnitId = ?
-                AND CAST(CreatedAt AS DATE) = (
-                SELECT MAX(CAST(CreatedAt AS DATE)) 
-                FROM WagesUpload 
-                WHERE UnitId = ?
-                );
-            """
-            params = (unit_id, unit_id)
-            cursor.execute(query, params)
-
-            # Fetch all rows
-            rows = cursor.fetchall()
-            if not rows:
-                return []
-            return rows
+def decode_data_url(data_url: str) -> bytes:
+    """Decode a base64 image sent by the browser, with or without the data: prefix."""
+    encoded = data_url.split(",", 1)[1] if "," in data_url else data_url
+    return base64.b64decode(encoded)
 
+def get_upload_data(unit_id: int) -> List[Any]:
+    """Rows of the unit's latest wage batch, served from the in-memory snapshot."""
+    try:
+        return wage_snapshots.get(unit_id).rows()
     except Exception as e:
         logger.error(f"Failed to fetch upload data: {e}")
 
     return []
 
 
+def get_name_and_amount(nucleus_id: int, unit_id: int) -> Any:
+    """(LabourName, Amount) of the employee, from the unit's current batch snapshot when it is there."""
+    try:
+        row = wage_snapshots.get(unit_id).lookup(nucleus_id)
+        if row is not None:
+            return (row[1], row[3])
+    except Exception as e:
+        logger.error(f"Wage snapshot lookup failed, querying the database: {e}")
+    return EmployeeModel.getNameandAmount(nucleus_id, unit_id)
+
+
 def mark_labour_as_paid_for_code(unit_id: int, target_date: datetime.date, nucleus_id: int) -> bool:
     """
     Update WagesUpload by setting IsPaid = 1 
@@ -72,12 +59,12 @@ def mark_labour_as_paid_for_code(unit_id: int, target_date: datetime.date, nucle
 SET VerifyType = 'Code',
     UpdatedBy = ?,
     UpdatedAt = ?
-WHERE UnitId = ?
-  AND CAST(CreatedAt AS DATE) = ?
+WHERE BatchId = (SELECT Id FROM WageBatch WHERE UnitId = ? AND BatchDate = ?)
+  AND UnitId = ?
   AND NucleusId = ?
                   
             """
-            params = (session['user_id'], datetime.now(), unit_id, target_date, nucleus_id)
+            params = (session['user_id'], datetime.now(), unit_id, target_date, unit_id, nucleus_id)
 
             cursor.execute(query, params)
             conn.commit()
@@ -112,12 +99,12 @@ def mark_labour_as_paid_for_face(unit_id: int, target_date: datetime.date, nucle
                 SET VerifyType = 'Face',
                 UpdatedBy = ?,
                 UpdatedAt = ?
-                WHERE UnitId = ?
-                  AND CAST(CreatedAt AS DATE) = ?
+                WHERE BatchId = (SELECT Id FROM WageBatch WHERE UnitId = ? AND BatchDate = ?)
+                  AND UnitId = ?
                   and NucleusId = ?
                   
             """
-            params = (session['user_id'], datetime.now(), unit_id, target_date, nucleus_id)
+            params = (session['user_id'], datetime.now(), unit_id, target_date, unit_id, nucleus_id)
 
             cursor.execute(query, params)
             conn.commit()
@@ -142,30 +129,34 @@ def check_labour_ispaid_or_not(unit_id: int, nucleus_id: int) -> bool:
     Returns:
         bool: True if the labour is marked as paid, False otherwise.
     """
+    try:
+        # Labour codes of the current batch are answered from the snapshot; older batches from the DB
+        row = wage_snapshots.get(unit_id).lookup(nucleus_id)
+        if row is not None:
+            return row
+    except Exception as e:
+        logger.error(f"Wage snapshot lookup failed, querying the database: {e}")
+
     try:
         conn = DatabaseManager.get_connection()
         if conn:
             cursor = conn.cursor()
 
             query = """
-                    SELECT 
-                    NucleusId, 
-                    LabourName, 
-                    ContractorName, 
-                    Amount, 
-                    IsPaid, 
-                    CreatedAt
-                    FROM WagesUpload
-                    WHERE UnitId = ?
-                    AND NucleusId = ?
-                    AND CAST(CreatedAt AS DATE) = (
-                    SELECT MAX(CAST(CreatedAt AS DATE)) 
-                    FROM WagesUpload
-                    WHERE UnitId = ?
-                    AND NucleusId = ?
-                    );
+                    SELECT TOP 1
+                    wu.NucleusId, 
+                    wu.LabourName, 
+                    wu.ContractorName, 
+                    wu.Amount, 
+                    wu.IsPaid, 
+                    wu.CreatedAt
+                    FROM WagesUpload wu
+                    INNER JOIN WageBatch wb ON wb.Id = wu.BatchId
+                    WHERE wu.UnitId = ?
+                    AND wu.NucleusId = ?
+                    ORDER BY wb.BatchDate DESC;
             """
-            params = (unit_id, nucleus_id, unit_id, nucleus_id)
+            params = (unit_id, nucleus_id)
 
             cursor.execute(query, params)
             return cursor.fetchone()
@@ -176,77 +167,12 @@ def check_labour_ispaid_or_not(unit_id: int, nucleus_id: int) -> bool:
     return False
 
 
-def PreviousWeekUnpaidEmployeesfromDB(unit_id: int) -> List[Dict[str, Any]]:
-    try:
-        conn = DatabaseManager.get_connection()
-        if conn:
-            cursor = conn.cursor()
-            query = """
-                SELECT 
-                    wu.NucleusId,
-                    wu.ContractorId,
-                    wu.LabourName,
-                    wu.ContractorName,
-                    wu.Amount,
-                    wu.UnitId,
-                    u.Name AS UnitName,
-                    wu.IsPaid,
-                    wu.VerifyType,
-                    wu.CreatedBy,
-                    wu.CreatedAt
-                FROM WagesUpload wu
-                INNER JOIN Unit u ON wu.UnitId = u.Id
-                WHERE wu.IsPaid = 0 
-                  AND wu.UnitId = ?
-                  AND CAST(CreatedAt AS DATE) = (
-                  SELECT MAX(CAST(CreatedAt AS DATE)) 
-                  FROM WagesUpload where UnitId = ?
-                );
-            """
-            params = (unit_id, unit_id)
-            cursor.execute(query, params)
-            columns = [col[0] for col in cursor.description]  # get column names
-            rows = cursor.fetchall()
-            results = [dict(zip(columns, row)) for row in rows]  # convert each row into dict
-            return results
-    except Exception as e:
-        logger.error(f"Failed to load previous week unpaid employees: {e}")
-    return []
-
-    
-def FilterByDatePreviousWeek(unit_id: int, from_date: datetime.date, to_date: datetime.date) -> List[Dict[str, Any]]:
+def parse_date(value: Optional[str]) -> Optional[datetime.date]:
+    """A YYYY-MM-DD request value as a date, or None when missing or malformed."""
     try:
-        conn = DatabaseManager.get_connection()
-        if conn:
-            cursor = conn.cursor()
-            query = """
-                    SELECT 
-                    wu.NucleusId,
-                    wu.ContractorId,
-                    wu.LabourName,
-                    wu.ContractorName,
-                    wu.Amount,
-                    wu.UnitId,
-                    u.Name AS UnitName,
-                    wu.IsPaid,
-                    wu.VerifyType,
-                    wu.CreatedBy,
-                    wu.CreatedAt
-                    FROM WagesUpload wu
-                    INNER JOIN Unit u ON wu.UnitId = u.Id
-                    WHERE wu.IsPaid = 0
-                    AND wu.UnitId = ?
-                    AND CAST(wu.CreatedAt AS DATE) BETWEEN ? AND ?;
-            """
-            params = (unit_id, from_date, to_date)
-            cursor.execute(query, params)
-            columns = [col[0] for col in cursor.description]  # get column names
-            rows = cursor.fetchall()
-            results = [dict(zip(columns, row)) for row in rows]  # convert each row into dict
-            return results
-    except Exception as e:
-        logger.error(f"Failed to load previous week unpaid employees: {e}")
-    return []
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
 
 
 def get_EmployeeByLabourId(nucleus_id: int) -> Any:
@@ -259,7 +185,7 @@ def get_EmployeeByLabourId(nucleus_id: int) -> Any:
             cursor = conn.cursor()
 
             query = """
-                    SELECT e.NucleusId,e.Name ,e.FatherName,e.PhoneNo,e.Address,c.Name,e.UnitId,e.Image,e.IsActive
+                    SELECT e.NucleusId,e.Name ,e.FatherName,e.PhoneNo,e.Address,c.Name,e.UnitId,CASE WHEN e.Image IS NULL AND e.ImageHash IS NULL THEN 0 ELSE 1 END AS HasImage,e.IsActive
                     FROM Employee e inner join Contractor c on c.ContractorId=e.ContractorId where e.NucleusId = ?
             """
             params = (nucleus_id, )
@@ -290,9 +216,10 @@ def get_Paid_Employee_Details(nucleus_id: int, unit_id: int, date: datetime.date
                      UnitId,
                      IsPaid,
                      CreatedAt
-                     FROM WagesUpload WHERE NucleusId = ? AND UnitId = ? AND IsPaid=0 AND CAST(CreatedAt AS DATE)=?
+                     FROM WagesUpload WHERE NucleusId = ? AND UnitId = ? AND IsPaid=0
+                     AND BatchId = (SELECT Id FROM WageBatch WHERE UnitId = ? AND BatchDate = ?)
             """
-            params = (nucleus_id, unit_id, date)
+            params = (nucleus_id, unit_id, unit_id, date)
 
             cursor.execute(query, params)
             return cursor.fetchone()
@@ -317,15 +244,19 @@ def mark_labour_as_paid_for_code_for_single_employee(nucleus_id: int, unit_id: i
             UpdatedBy = ?,
             UpdatedAt = ?,
             IsPaid = 1
-            WHERE UnitId = ?
-            AND CAST(CreatedAt AS DATE) = ?
+            WHERE BatchId = (SELECT Id FROM WageBatch WHERE UnitId = ? AND BatchDate = ?)
+            AND UnitId = ?
             AND NucleusId = ?
+            AND (IsPaid = 0 OR IsPaid IS NULL)
             """
-            params = (session['user_id'], datetime.now(), unit_id, date, nucleus_id)
+            params = (session['user_id'], datetime.now(), unit_id, date, unit_id, nucleus_id)
             cursor.execute(query, params)
             conn.commit()
 
-            return cursor.rowcount > 0   # True if at least one row updated
+            if cursor.rowcount > 0:
+                DatabaseManager.after_commit(lambda: wage_snapshots.mark_paid(unit_id, nucleus_id))
+                return True
+            return False
 
     except Exception as e:
         logger.error(f"Failed to update wages: {e}")
@@ -1,34 +1,14 @@
 from app.database import DatabaseManager
-from datetime import datetime
 import logging
 import base64  # ✅ Import for base64 encoding
 
 logger = logging.getLogger(__name__)
 
 class WagesUploadModel:
-      @staticmethod
-      def delete_existing_record_with_unitId(unitId: int):
-          try:
-              conn = DatabaseManager.get_connection()
-              if conn:
-                  logger.info(f"Deleting existing records for UnitId {unitId} created today: {datetime.now().date()}")
-                  cursor = conn.cursor()
-                  cursor.execute("""
-                      DELETE FROM WagesUpload
-                      WHERE UnitId = ? and CAST([CreatedAt] AS DATE) = ?;
-                  """, (unitId, datetime.now().date()))
-                  conn.commit()
-          except Exception as e:
-              logger.error(f"Failed to delete record with UnitId {unitId}: {e}")
-              conn.rollback()
-              conn.close()
-              return False
-          return True
-    
       @staticmethod
       def get_latest_record_by_unit(unitId: int):
         """
-        Fetch the latest WagesUpload record for the given UnitId on today's date.
+        Fetch the WagesUpload rows of the latest batch of the given UnitId.
         """
         try:
             conn = DatabaseManager.get_connection()
@@ -48,9 +28,10 @@ class WagesUploadModel:
                 CreatedAt
                 FROM WagesUpload
                 WHERE UnitId = ?
-                and CAST(CreatedAt AS DATE) = (
-                SELECT MAX(cast(CreatedAt AS DATE)) 
-                FROM WagesUpload where UnitId = ?
+                and BatchId = (
+                SELECT TOP 1 Id FROM WageBatch
+                WHERE UnitId = ?
+                ORDER BY BatchDate DESC
                 )
                 """, (unitId, unitId,))
                 
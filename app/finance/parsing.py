@@ -0,0 +1,132 @@
+"""Streaming, vectorized parsing of wage sheets (.xlsx, .xls or .csv).
+
+Only the required columns are read. Workbooks are opened in openpyxl's
+read-only mode and CSVs with a chunked reader, so rows arrive in
+fixed-size DataFrame chunks and memory stays flat however large the
+sheet is. Amount and id cleaning are vectorized string operations.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional
+
+REQUIRED_COLUMNS = ['Labour Code', 'Contractor Code', 'Labour Name', 'Net Payable']
+OPTIONAL_COLUMNS = ['Contractor Name']
+CHUNK_SIZE = 5000
+NULL_TOKENS = {'', 'nan', 'none', 'null'}
+
+# Column name -> cleaned field; every chunk yielded by WageSheet has exactly these columns
+CLEAN_COLUMNS = ['NucleusId', 'ContractorId', 'LabourName', 'ContractorName', 'Amount']
+
+def clean_amount(values: pd.Series) -> pd.Series:
+    """Numbers as is; text stripped of commas, spaces and currency symbols; blanks become 0"""
+    numeric = pd.to_numeric(values, errors='coerce')
+    text = values.astype(str).str.replace(r'[^\d.]', '', regex=True)
+    return numeric.fillna(pd.to_numeric(text, errors='coerce')).fillna(0.0).astype('float64')
+
+def clean_id(values: pd.Series) -> pd.Series:
+    """Integer ids from numbers or text like '12' / '12.0'; anything else becomes <NA>"""
+    text = values.astype(str).str.strip()
+    text = text.mask(text.str.lower().isin(NULL_TOKENS))
+    numeric = pd.to_numeric(text, errors='coerce')
+    return pd.Series(np.trunc(numeric), index=values.index).astype('Int64')
+
+def clean_text(values: pd.Series) -> pd.Series:
+    return values.fillna('').astype(str).str.strip()
+
+def clean_chunk(raw: pd.DataFrame) -> pd.DataFrame:
+    """Typed, cleaned columns from a chunk of raw sheet values"""
+    return pd.DataFrame({
+        'NucleusId': clean_id(raw['Labour Code']),
+        'ContractorId': clean_id(raw['Contractor Code']),
+        'LabourName': clean_text(raw['Labour Name']),
+        'ContractorName': clean_text(raw['Contractor Name']) if 'Contractor Name' in raw.columns else '',
+        'Amount': clean_amount(raw['Net Payable']),
+    }, columns=CLEAN_COLUMNS)
+
+class WageSheet:
+    """An uploaded wage sheet whose header has been checked; chunks() streams the rows"""
+
+    def __init__(self, file_storage, chunk_size: int = CHUNK_SIZE):
+        self.file = file_storage
+        self.chunk_size = chunk_size
+        self.filename = (getattr(file_storage, 'filename', '') or '').lower()
+        self._workbook = None
+        self._columns: Dict[str, int] = {}
+
+        if self.filename.endswith('.csv'):
+            self.kind = 'csv'
+            header = pd.read_csv(self.file, nrows=0).columns
+            self.file.seek(0)
+            self._check_header([str(c) for c in header])
+        elif self.filename.endswith('.xls'):
+            # Legacy .xls has no streaming reader; read the needed columns only
+            self.kind = 'xls'
+            header = pd.read_excel(self.file, nrows=0).columns
+            self.file.seek(0)
+            self._check_header([str(c) for c in header])
+        else:
+            self.kind = 'xlsx'
+            from openpyxl import load_workbook
+            self._workbook = load_workbook(getattr(self.file, 'stream', self.file), read_only=True, data_only=True)
+            sheet = self._workbook.worksheets[0]
+            header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+            self._check_header(['' if c is None else str(c) for c in header])
+
+    def _check_header(self, header: List[str]) -> None:
+        stripped = [c.strip() for c in header]
+        missing = set(REQUIRED_COLUMNS) - set(stripped)
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        wanted = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+        self._columns = {name: stripped.index(name) for name in wanted if name in stripped}
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        """Cleaned DataFrame chunks of at most chunk_size rows, indexed by sheet row number"""
+        if self.kind == 'csv':
+            yield from self._csv_chunks()
+        elif self.kind == 'xls':
+            yield from self._xls_chunks()
+        else:
+            yield from self._xlsx_chunks()
+
+    def _csv_chunks(self) -> Iterator[pd.DataFrame]:
+        positions = sorted(self._columns.values())
+        names = {position: name for name, position in self._columns.items()}
+        reader = pd.read_csv(self.file, usecols=positions, dtype=str, keep_default_na=False,
+                             chunksize=self.chunk_size)
+        for chunk in reader:
+            chunk.columns = [names[p] for p in positions]
+            chunk.index = chunk.index + 2  # sheet row numbers, the header is row 1
+            yield clean_chunk(chunk)
+
+    def _xls_chunks(self) -> Iterator[pd.DataFrame]:
+        df = pd.read_excel(self.file, usecols=sorted(self._columns.values()), dtype=object)
+        df.columns = df.columns.astype(str).str.strip()
+        df.index = df.index + 2
+        for start in range(0, len(df), self.chunk_size):
+            yield clean_chunk(df.iloc[start:start + self.chunk_size])
+
+    def _xlsx_chunks(self) -> Iterator[pd.DataFrame]:
+        sheet = self._workbook.worksheets[0]
+        names = list(self._columns)
+        positions = [self._columns[name] for name in names]
+        buffer, row_numbers = [], []
+        try:
+            for number, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+                values = [row[p] if p < len(row) else None for p in positions]
+                if all(v is None for v in values):
+                    continue  # trailing formatted-but-empty rows
+                buffer.append(values)
+                row_numbers.append(number)
+                if len(buffer) >= self.chunk_size:
+                    yield clean_chunk(pd.DataFrame(buffer, columns=names, index=row_numbers, dtype=object))
+                    buffer, row_numbers = [], []
+            if buffer:
+                yield clean_chunk(pd.DataFrame(buffer, columns=names, index=row_numbers, dtype=object))
+        finally:
+            self._workbook.close()
+
+def open_wage_sheet(file_storage, chunk_size: Optional[int] = None) -> WageSheet:
+    """Check the header of an uploaded sheet; raises ValueError when required columns are missing"""
+    return WageSheet(file_storage, chunk_size or CHUNK_SIZE)
@@ -0,0 +1,114 @@
+"""Dry-run validation of a wage sheet.
+
+The preview runs the same checks as the real upload against cached
+contractor/employee id sets, in one vectorized pass over the cleaned
+sheet, and never touches WagesUpload.
+"""
+
+import threading
+import time
+import pandas as pd
+from typing import Dict, Tuple
+
+from config import Config
+from app.database import DatabaseManager
+from .parsing import CLEAN_COLUMNS, WageSheet
+from .wages_import import skip_masks
+
+PREVIEW_SAMPLE_SIZE = 50  # entries listed per finding; totals are always exact
+HIGH_AMOUNT_IQR_FACTOR = 3.0
+MIN_ROWS_FOR_OUTLIERS = 20
+
+class ReferenceIdCache:
+    """Active contractor ids and known labour codes, reloaded after ttl seconds"""
+
+    def __init__(self, ttl: float = Config.WAGES_REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._ids = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Tuple[set, set]:
+        with self._lock:
+            if self._ids is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._ids = (
+                    self._load("SELECT ContractorId FROM Contractor WHERE IsActive = 1 AND ContractorId IS NOT NULL"),
+                    self._load("SELECT NucleusId FROM Employee WHERE NucleusId IS NOT NULL"),
+                )
+                self._loaded_at = time.monotonic()
+            return self._ids
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._ids = None
+
+    @staticmethod
+    def _load(query: str) -> set:
+        found = DatabaseManager.execute_query(query, fetch_all=True)
+        if found is None:
+            raise RuntimeError("Could not load reference ids")
+        return {int(row[0]) for row in found}
+
+reference_ids = ReferenceIdCache()
+
+def _sample(values) -> list:
+    return list(values)[:PREVIEW_SAMPLE_SIZE]
+
+def _amount_rows(rows: pd.DataFrame) -> list:
+    return [{'row': int(row), 'labour_code': None if pd.isna(code) else int(code), 'amount': float(amount)}
+            for row, code, amount in zip(rows.index, rows['NucleusId'], rows['Amount'])]
+
+def preview_sheet(sheet: WageSheet) -> Dict:
+    """Structured findings for the whole sheet; row numbers are sheet rows (header is row 1)"""
+    chunks = list(sheet.chunks())
+    rows = pd.concat(chunks) if chunks else pd.DataFrame(columns=CLEAN_COLUMNS)
+    contractor_ids, nucleus_ids = reference_ids.get()
+
+    masks = skip_masks(rows, contractor_ids, nucleus_ids)
+    skipped = pd.Series(False, index=rows.index)
+    for mask in masks.values():
+        skipped |= mask
+    valid = rows[~skipped]
+
+    invalid_contractor = rows.loc[masks['inactive or unknown contractor'], 'ContractorId'].value_counts()
+    unknown_labour = rows.loc[masks['labour code not found'], 'NucleusId'].value_counts()
+    invalid_code_rows = rows.index[masks['invalid labour code']]
+
+    duplicated = valid[valid['NucleusId'].duplicated(keep=False)]
+    duplicates = [{'labour_code': int(code), 'rows': [int(r) for r in group.index]}
+                  for code, group in duplicated.groupby('NucleusId', sort=False)]
+
+    written = valid.drop_duplicates('NucleusId')  # the upload keeps the first row per labour code
+    skip_reasons = {reason: int(mask.sum()) for reason, mask in masks.items()}
+    skip_reasons['duplicate labour code'] = int(len(valid) - len(written))
+    amounts = valid['Amount']
+    zero_or_negative = valid[amounts <= 0]
+    threshold = None
+    unusually_high = valid.iloc[0:0]
+    if len(valid) >= MIN_ROWS_FOR_OUTLIERS:
+        q1, q3 = amounts.quantile(0.25), amounts.quantile(0.75)
+        threshold = float(q3 + HIGH_AMOUNT_IQR_FACTOR * (q3 - q1))
+        unusually_high = valid[amounts > threshold].sort_values('Amount', ascending=False)
+
+    return {
+        'rows': int(len(rows)),
+        'valid': int(len(written)),
+        'skipped': sum(skip_reasons.values()),
+        'skip_reasons': skip_reasons,
+        'total_amount': round(float(written['Amount'].sum()), 2),
+        'invalid_contractor_codes': [{'code': int(code), 'rows': int(count)}
+                                     for code, count in _sample(invalid_contractor.items())],
+        'unknown_labour_codes': [{'code': int(code), 'rows': int(count)}
+                                 for code, count in _sample(unknown_labour.items())],
+        'invalid_labour_code_rows': [int(r) for r in _sample(invalid_code_rows)],
+        'duplicate_count': len(duplicates),
+        'duplicates': _sample(duplicates),
+        'anomalies': {
+            'zero_or_negative_count': int(len(zero_or_negative)),
+            'zero_or_negative': _amount_rows(zero_or_negative.head(PREVIEW_SAMPLE_SIZE)),
+            'high_amount_threshold': threshold,
+            'unusually_high_count': int(len(unusually_high)),
+            'unusually_high': _amount_rows(unusually_high.head(PREVIEW_SAMPLE_SIZE)),
+        },
+        'sample_size': PREVIEW_SAMPLE_SIZE,
+    }
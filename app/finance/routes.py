@@ -1,12 +1,13 @@
-from flask import render_template, flash, request, session, redirect, url_for
+from flask import render_template, flash, request, session, redirect, url_for, jsonify
 import logging
-from datetime import datetime
-import pandas as pd
 from . import finance_bp
 from app.contractors.models import ContractorModel
 from .models import WagesUploadModel
+from .parsing import open_wage_sheet
+from .preview import preview_sheet
+from .upload_jobs import upload_jobs
 from app.auth.decorators import require_auth, require_role
-from app.database import DatabaseManager
+from app.database.dashboard_stats import dashboard_stats, empty_stats
 
 logger = logging.getLogger(__name__)
 
@@ -15,178 +16,56 @@ logger = logging.getLogger(__name__)
 @require_role(['finance'])
 def dashboard():
     try:
-        print("📊 Fetching finance dashboard stats...")
-        stats = {
-            'total_employees': DatabaseManager.execute_query("SELECT COUNT(*) FROM Employee", fetch_one=True),
-            'active_employees': DatabaseManager.execute_query("SELECT COUNT(*) FROM Employee WHERE IsActive = 1", fetch_one=True)
-        }
-        stats = {k: v[0] if v else 0 for k, v in stats.items()}
-        print("✅ Dashboard stats fetched:", stats)
-        return render_template('finance/finance_dashboard.html', stats=stats)
+        return render_template('finance/finance_dashboard.html', stats=dashboard_stats.get())
 
     except Exception as e:
         logger.error(f"Error in finance dashboard: {e}")
-        print(f"Error loading dashboard: {e}")
         flash("Error loading dashboard.", "error")
-        return render_template('finance/finance_dashboard.html', stats={'total_employees': 0, 'active_employees': 0})
+        return render_template('finance/finance_dashboard.html', stats=empty_stats())
+
+
+def is_ajax():
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+def upload_error(message, code=400):
+    """JSON for the page's background submit, session message and redirect for a plain form post"""
+    if is_ajax():
+        return jsonify({'status': 'error', 'message': message}), code
+    session['upload_message'] = message
+    session['upload_status'] = "error"
+    return redirect(url_for('finance.wages_upload'))
 
 
 @finance_bp.route('/WagesUpload', methods=['GET', 'POST'])
 @require_auth
 @require_role(['finance'])
 def wages_upload():
-    print("📁 Accessed Wages Upload Route")
-    
     # Check for messages in session
     message = session.pop('upload_message', None) if 'upload_message' in session else None
     status = session.pop('upload_status', None) if 'upload_status' in session else None
     
     units = []
 
-    def parse_contractor_id(value):
-        if pd.isna(value):
-            return None
-        try:
-            if isinstance(value, str):
-                val = value.strip()
-                if val.lower() in ['', 'nan', 'none', 'null']:
-                    return None
-                return int(float(val))
-            return int(float(value))
-        except Exception as e:
-            print(f"❌ ContractorId parse error: {e} for value {value}")
-            return None
-
-    def parse_amount(value):
-        """Parse amount removing commas, spaces and converting to float"""
-        if pd.isna(value):
-            return 0.0
-        try:
-            if isinstance(value, str):
-                # Remove commas, spaces, and any other non-numeric characters except decimal point
-                val = value.replace(',', '').replace(' ', '').strip()
-                # Handle cases where amount might have currency symbols
-                import re
-                # Extract only numbers and decimal points
-                val = re.sub(r'[^\d.]', '', val)
-                if val == '':
-                    return 0.0
-                return float(val)
-            elif isinstance(value, (int, float)):
-                return float(value)
-            else:
-                # Try to convert directly
-                return float(str(value).replace(',', '').replace(' ', '').strip())
-        except Exception as e:
-            print(f"❌ Amount parse error: {e} for value '{value}' (type: {type(value)})")
-            return 0.0
-
     if request.method == 'POST':
         file = request.files.get('file')
         unit_id = request.form.get('Unit')
 
         if not file:
-            session['upload_message'] = "No file uploaded."
-            session['upload_status'] = "error"
-            return redirect(url_for('finance.wages_upload'))
+            return upload_error("No file uploaded.")
         if not unit_id:
-            session['upload_message'] = "Please select a Unit."
-            session['upload_status'] = "error"
-            return redirect(url_for('finance.wages_upload'))
+            return upload_error("Please select a Unit.")
 
         try:
-            result = WagesUploadModel.delete_existing_record_with_unitId(unit_id)
-            print(f"🗑️ Existing records deletion for UnitId result: {result}")         
-            df = pd.read_excel(file)
-            df.columns = df.columns.str.strip()
-            
-            # Updated required columns to match your Excel format
-            required_columns = {'Labour Code', 'Contractor Code', 'Labour Name', 'Net Payable'}
-            if not required_columns.issubset(df.columns):
-                missing = required_columns - set(df.columns)
-                session['upload_message'] = f"Missing columns: {missing}"
-                session['upload_status'] = "error"
-                return redirect(url_for('finance.wages_upload'))
-
-            conn = DatabaseManager.get_connection()
-            if not conn:
-                session['upload_message'] = "Database connection failed."
-                session['upload_status'] = "error"
-                return redirect(url_for('finance.wages_upload'))
-            cursor = conn.cursor()
-
-            inserted_rows = 0
-            skipped_rows = 0
-
-            for index, row in df.iterrows():
-                try:
-                    # Map Excel columns to database columns
-                    nucleus_id = row['Labour Code']  # Labour Code -> NucleusId
-                    contractor_id = parse_contractor_id(row['Contractor Code'])  # Contractor Code -> ContractorId
-                    labour_name = str(row['Labour Name']).strip()  # Labour Name -> Name
-                    contractor_name = str(row.get('Contractor Name', '')).strip()  # For ContractorName field
-                    amount = parse_amount(row['Net Payable'])  # Net Payable -> Amount (properly formatted as number)
-                    
-                    print(f"Row {index} - NucleusId: {nucleus_id}, ContractorId: {contractor_id}, Amount: {amount:.2f}")
-
-                    # Validate ContractorId
-                    if contractor_id is not None:
-                        cursor.execute("SELECT ContractorId FROM Contractor WHERE ContractorId = ? AND IsActive = 1", (contractor_id,))
-                        if not cursor.fetchone():
-                            print(f"⚠ ContractorId {contractor_id} invalid at row {index}, skipping.")
-                            skipped_rows += 1
-                            continue
-
-                    # Validate NucleusId (Labour Code)
-                    try:
-                        nucleus_id_int = int(nucleus_id)
-                    except Exception:
-                        print(f"⚠ Invalid NucleusId at row {index}, skipping.")
-                        skipped_rows += 1
-                        continue
-                    
-                    cursor.execute("SELECT Id FROM Employee WHERE NucleusId = ?", (nucleus_id_int,))
-                    if not cursor.fetchone():
-                        print(f"⚠ NucleusId {nucleus_id_int} not found at row {index}, skipping.")
-                        skipped_rows += 1
-                        continue
-
-                    # Default IsPaid to 0 (False) since it's not in your Excel
-                    is_paid = 0
-
-                    cursor.execute("""
-                        INSERT INTO WagesUpload (
-                            NucleusId, ContractorId, LabourName, ContractorName, Amount, UnitId, IsPaid, CreatedBy, CreatedAt
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        nucleus_id_int,
-                        contractor_id,
-                        labour_name,
-                        contractor_name,  # Using contractor name as substitute for father name
-                        amount,
-                        int(unit_id),
-                        is_paid,
-                        session['user_id'],
-                        datetime.now()
-                    ))
-                    inserted_rows += 1
-
-                except Exception as e:
-                    print(f"❌ Error inserting row {index}: {e}")
-                    skipped_rows += 1
-                    continue
-
-            conn.commit()
-            session['upload_message'] = f"✅ Inserted {inserted_rows} rows, skipped {skipped_rows} rows."
-            session['upload_status'] = "success"
-            return redirect(url_for('finance.wages_upload'))
-
+            job = upload_jobs.submit(file.read(), file.filename or 'upload.xlsx', int(unit_id), session['user_id'])
         except Exception as e:
-            logger.error(f"File processing error: {e}")
-            session['upload_message'] = f"Error processing file: {e}"
-            session['upload_status'] = "error"
-            return redirect(url_for('finance.wages_upload'))
+            logger.error(f"Could not queue wages upload: {e}")
+            return upload_error(f"Error queuing file: {e}", 500)
+
+        if is_ajax():
+            return jsonify({'status': 'success', 'job': job.to_dict()}), 202
+        session['upload_message'] = f"Upload of {job.filename} queued. Progress is shown below."
+        session['upload_status'] = "success"
+        return redirect(url_for('finance.wages_upload'))
 
     # Rest of your code for displaying upload data...
     try:
@@ -201,4 +80,43 @@ def wages_upload():
     except Exception as e:
         logger.error(f"Failed to fetch WagesUpload data: {e}")
 
-    return render_template('finance/wagesUpload.html', message=message, status=status, upload_data=upload_data, units=units, unit_map=unit_map)
\ No newline at end of file
+    jobs = [job.to_dict() for job in upload_jobs.recent(session['user_id'])]
+    return render_template('finance/wagesUpload.html', message=message, status=status, upload_data=upload_data, units=units, unit_map=unit_map, jobs=jobs)
+
+
+@finance_bp.route('/WagesUpload/preview', methods=['POST'])
+@require_auth
+@require_role(['finance'])
+def wages_upload_preview():
+    """Dry run: validate the sheet and report what the upload would skip, without writing anything"""
+    file = request.files.get('file')
+    if not file:
+        return jsonify({'status': 'error', 'message': 'No file uploaded.'}), 400
+    try:
+        preview = preview_sheet(open_wage_sheet(file))
+        return jsonify({'status': 'success', 'preview': preview})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Wages upload preview failed: {e}")
+        return jsonify({'status': 'error', 'message': f"Error processing file: {e}"}), 500
+
+
+@finance_bp.route('/WagesUpload/jobs')
+@require_auth
+@require_role(['finance'])
+def wages_upload_jobs():
+    """Status of the current user's recent uploads"""
+    jobs = upload_jobs.recent(session['user_id'])
+    return jsonify({'status': 'success', 'jobs': [job.to_dict() for job in jobs]})
+
+
+@finance_bp.route('/WagesUpload/jobs/<job_id>')
+@require_auth
+@require_role(['finance'])
+def wages_upload_status(job_id):
+    """Progress of one upload: rows parsed, inserted, skipped and any error"""
+    job = upload_jobs.get(job_id)
+    if job is None or job.created_by != session['user_id']:
+        return jsonify({'status': 'error', 'message': 'Upload job not found'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
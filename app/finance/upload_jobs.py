@@ -0,0 +1,156 @@
+"""Background wage-upload jobs.
+
+The POST only reads the file and queues it; parsing and the insert run on
+a small local thread pool while the page polls the job's status. Jobs live
+in this process's memory, so the status endpoint must be served by the
+same process that accepted the upload. Uploads for the same unit run one
+after another because each one is diffed against that unit's batch.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from werkzeug.datastructures import FileStorage
+
+from config import Config
+from .parsing import open_wage_sheet
+from .wages_import import WagesImporter, WagesImportResult
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+@dataclass
+class UploadJob:
+    """Progress of one queued wages upload"""
+    id: str
+    unit_id: int
+    filename: str
+    created_by: int
+    status: str = QUEUED
+    parsed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    skip_reasons: Dict[str, int] = field(default_factory=dict)
+    flagged: Dict[str, List[int]] = field(default_factory=dict)
+    message: str = ''
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'unit_id': self.unit_id,
+            'filename': self.filename,
+            'status': self.status,
+            'parsed': self.parsed,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'removed': self.removed,
+            'unchanged': self.unchanged,
+            'skipped': self.skipped,
+            'skip_reasons': dict(self.skip_reasons),
+            'flagged': {reason: list(ids) for reason, ids in self.flagged.items()},
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+        }
+
+class UploadJobManager:
+    """Runs wages uploads on a thread pool and keeps their status for polling"""
+
+    def __init__(self, workers: int = Config.WAGES_UPLOAD_WORKERS,
+                 keep_seconds: int = Config.WAGES_UPLOAD_JOB_TTL):
+        self.workers = max(workers, 1)
+        self.keep_seconds = keep_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, UploadJob] = {}
+        self._unit_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, data: bytes, filename: str, unit_id: int, created_by: int) -> UploadJob:
+        """Queue the uploaded file and return its job immediately"""
+        job = UploadJob(id=uuid.uuid4().hex, unit_id=unit_id, filename=filename, created_by=created_by)
+        with self._lock:
+            self._prune_locked()
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='wages-upload')
+            executor = self._executor
+        executor.submit(self._run, job, data)
+        logger.info(f"Wages upload {job.id} queued: {filename} for UnitId {unit_id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, created_by: int) -> List[UploadJob]:
+        """This user's jobs that are still kept, newest first"""
+        with self._lock:
+            self._prune_locked()
+            jobs = [job for job in self._jobs.values() if job.created_by == created_by]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _unit_lock(self, unit_id: int) -> threading.Lock:
+        with self._lock:
+            return self._unit_locks.setdefault(unit_id, threading.Lock())
+
+    def _run(self, job: UploadJob, data: bytes) -> None:
+        with self._unit_lock(job.unit_id):
+            job.status = RUNNING
+            try:
+                sheet = open_wage_sheet(FileStorage(stream=io.BytesIO(data), filename=job.filename))
+                result = WagesImporter().run(sheet.chunks(), job.unit_id, job.created_by,
+                                             progress=lambda totals: self._update(job, totals),
+                                             content_hash=hashlib.sha256(data).hexdigest())
+                self._update(job, result)
+                job.message = result.message
+                job.status = DONE
+            except ValueError as e:
+                job.error = str(e)
+                job.status = FAILED
+            except Exception as e:
+                logger.error(f"Wages upload {job.id} failed: {e}")
+                job.error = f"Error processing file: {e}"
+                job.status = FAILED
+            finally:
+                job.finished_at = datetime.now()
+
+    @staticmethod
+    def _update(job: UploadJob, totals: WagesImportResult) -> None:
+        job.parsed = totals.parsed
+        job.inserted = totals.inserted
+        job.updated = totals.updated
+        job.removed = totals.removed
+        job.unchanged = totals.unchanged
+        job.skipped = totals.skipped
+        job.skip_reasons = dict(totals.skip_reasons)
+        job.flagged = {reason: list(ids) for reason, ids in totals.flagged.items()}
+
+    def _prune_locked(self) -> None:
+        cutoff = datetime.now() - timedelta(seconds=self.keep_seconds)
+        stale = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+upload_jobs = UploadJobManager()
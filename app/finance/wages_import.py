@@ -0,0 +1,271 @@
+"""Incremental import of a unit's wages sheet into WagesUpload.
+
+A unit's batch is a WageBatch row (UnitId, BatchDate) and the WagesUpload
+rows pointing at it through BatchId, keyed by NucleusId. An upload is diffed against that batch: new
+labour codes are inserted, changed amounts/contractors updated, and codes
+missing from the sheet deleted, so IsPaid/VerifyType already recorded
+survive corrections. Rows already paid are never changed or deleted; such
+conflicts are reported instead. A file whose content hash equals the last
+upload for the same batch is skipped entirely.
+"""
+
+import logging
+import pandas as pd
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.database import DatabaseManager
+from app.database.wage_snapshot import wage_snapshots
+from app.database.dashboard_stats import dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+INSERT_BATCH_SIZE = 1000
+FLAG_SAMPLE_SIZE = 10  # labour codes quoted per flag in the result message
+
+PAID_REMOVED = 'paid rows missing from sheet'
+PAID_CHANGED = 'paid rows with a different amount or contractor'
+
+@dataclass
+class WagesImportResult:
+    """Outcome of a wages upload"""
+    parsed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    skipped: int = 0
+    skip_reasons: Dict[str, int] = field(default_factory=dict)
+    flagged: Dict[str, List[int]] = field(default_factory=dict)
+    unchanged_file: bool = False
+    elapsed_seconds: float = 0.0
+
+    @property
+    def message(self) -> str:
+        if self.unchanged_file:
+            return "✅ File is identical to the last upload for this unit today; nothing changed."
+        text = (f"✅ Inserted {self.inserted}, updated {self.updated}, removed {self.removed}, "
+                f"unchanged {self.unchanged}, skipped {self.skipped} rows.")
+        details = ', '.join(f"{reason}: {count}" for reason, count in self.skip_reasons.items() if count)
+        if details:
+            text = f"{text} ({details})"
+        for reason, nucleus_ids in self.flagged.items():
+            if nucleus_ids:
+                sample = ', '.join(str(n) for n in nucleus_ids[:FLAG_SAMPLE_SIZE])
+                more = '…' if len(nucleus_ids) > FLAG_SAMPLE_SIZE else ''
+                text = f"{text} ⚠️ {len(nucleus_ids)} {reason} (left as is): {sample}{more}."
+        return text
+
+def skip_masks(rows: pd.DataFrame, contractor_ids: set, nucleus_ids: set) -> Dict[str, pd.Series]:
+    """Boolean mask per skip reason; each row is counted under its first failing check only"""
+    invalid_contractor = rows['ContractorId'].notna() & ~rows['ContractorId'].isin(contractor_ids)
+    invalid_code = ~invalid_contractor & rows['NucleusId'].isna()
+    unknown_employee = ~invalid_contractor & ~invalid_code & ~rows['NucleusId'].isin(nucleus_ids)
+    return {
+        'inactive or unknown contractor': invalid_contractor.fillna(False).astype(bool),
+        'invalid labour code': invalid_code.fillna(False).astype(bool),
+        'labour code not found': unknown_employee.fillna(False).astype(bool),
+    }
+
+class WagesImporter:
+    """Diffs cleaned sheet chunks against the unit's current batch and applies the changes in one transaction"""
+
+    def run(self, chunks: Iterable[pd.DataFrame], unit_id: int, created_by: int,
+            progress: Optional[Callable[[WagesImportResult], None]] = None,
+            content_hash: Optional[str] = None) -> WagesImportResult:
+        """chunks are cleaned frames from app.finance.parsing.WageSheet.chunks();
+        progress, when given, is called with the running totals after every chunk;
+        content_hash is the SHA-256 of the uploaded file, used to skip repeated uploads"""
+        started = datetime.now()
+        result = WagesImportResult(
+            skip_reasons={
+                'inactive or unknown contractor': 0,
+                'invalid labour code': 0,
+                'labour code not found': 0,
+                'duplicate labour code': 0,
+            },
+            flagged={PAID_REMOVED: [], PAID_CHANGED: []},
+        )
+        now = datetime.now()
+
+        with DatabaseManager.transaction() as conn:
+            cursor = conn.cursor()
+            if content_hash and self._last_hash(cursor, unit_id, now.date()) == content_hash:
+                result.unchanged_file = True
+                logger.info(f"Wages upload for UnitId {unit_id} skipped: same file as the last upload today")
+                return result
+
+            contractor_ids = self._load_ids(cursor, "SELECT ContractorId FROM Contractor WHERE IsActive = 1 AND ContractorId IS NOT NULL")
+            nucleus_ids = self._load_ids(cursor, "SELECT NucleusId FROM Employee WHERE NucleusId IS NOT NULL")
+            batch_id = self._batch_id(cursor, unit_id, now, created_by)
+            existing = self._load_batch(cursor, batch_id)
+            seen = set()
+
+            cursor.fast_executemany = True
+            for chunk in chunks:
+                result.parsed += len(chunk)
+                rows = self._validate(chunk, contractor_ids, nucleus_ids, result)
+                rows = self._drop_duplicates(rows, seen, result)
+                self._apply(cursor, rows, existing, batch_id, unit_id, created_by, now, result)
+                if progress:
+                    progress(result)
+
+            self._remove_missing(cursor, existing, seen, batch_id, result)
+            self._record_upload(cursor, unit_id, now, content_hash, created_by, result)
+        wage_snapshots.invalidate(unit_id)
+        dashboard_stats.invalidate()
+
+        result.elapsed_seconds = round((datetime.now() - started).total_seconds(), 2)
+        logger.info(f"Wages upload for UnitId {unit_id}: {result.inserted} inserted, {result.updated} updated, "
+                    f"{result.removed} removed, {result.unchanged} unchanged, {result.skipped} skipped "
+                    f"{result.skip_reasons} in {result.elapsed_seconds}s")
+        return result
+
+    @staticmethod
+    def _validate(rows: pd.DataFrame, contractor_ids: set, nucleus_ids: set,
+                  result: WagesImportResult) -> pd.DataFrame:
+        """Keep rows whose labour code exists and whose contractor (when given) is active"""
+        masks = skip_masks(rows, contractor_ids, nucleus_ids)
+        keep = pd.Series(True, index=rows.index)
+        for reason, mask in masks.items():
+            result.skip_reasons[reason] += int(mask.sum())
+            keep &= ~mask
+        result.skipped += int((~keep).sum())
+
+        rows = rows[keep].copy()
+        rows['NucleusId'] = rows['NucleusId'].astype('int64')
+        return rows
+
+    @staticmethod
+    def _drop_duplicates(rows: pd.DataFrame, seen: set, result: WagesImportResult) -> pd.DataFrame:
+        """A labour code appears once per batch; later occurrences in the sheet are skipped"""
+        duplicate = rows['NucleusId'].duplicated() | rows['NucleusId'].isin(seen)
+        count = int(duplicate.sum())
+        result.skip_reasons['duplicate labour code'] += count
+        result.skipped += count
+        rows = rows[~duplicate]
+        seen.update(rows['NucleusId'].tolist())
+        return rows
+
+    @staticmethod
+    def _last_hash(cursor, unit_id: int, batch_date) -> Optional[str]:
+        cursor.execute("""
+            SELECT TOP 1 ContentHash FROM WagesUploadHistory
+            WHERE UnitId = ? AND BatchDate = ?
+            ORDER BY Id DESC
+        """, (unit_id, batch_date))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _load_ids(cursor, query: str) -> set:
+        cursor.execute(query)
+        return {int(row[0]) for row in cursor.fetchall()}
+
+    @staticmethod
+    def _batch_id(cursor, unit_id: int, now: datetime, created_by: int) -> int:
+        """Id of the unit's batch for today, created on first upload; the lock keeps concurrent uploads of the unit apart"""
+        cursor.execute("""
+            SELECT Id FROM WageBatch WITH (UPDLOCK, HOLDLOCK)
+            WHERE UnitId = ? AND BatchDate = ?
+        """, (unit_id, now.date()))
+        row = cursor.fetchone()
+        if row:
+            return int(row[0])
+        cursor.execute("""
+            INSERT INTO WageBatch (UnitId, BatchDate, CreatedBy, CreatedAt)
+            OUTPUT INSERTED.Id
+            VALUES (?, ?, ?, ?)
+        """, (unit_id, now.date(), created_by, now))
+        return int(cursor.fetchone()[0])
+
+    @staticmethod
+    def _load_batch(cursor, batch_id: int) -> pd.DataFrame:
+        """The batch's rows indexed by NucleusId"""
+        cursor.execute("""
+            SELECT NucleusId, ContractorId, LabourName, ContractorName, Amount,
+                   CASE WHEN IsPaid = 1 THEN 1 ELSE 0 END AS IsPaid
+            FROM WagesUpload
+            WHERE BatchId = ?
+        """, (batch_id,))
+        rows = [tuple(row) for row in cursor.fetchall()]
+        existing = pd.DataFrame(rows, columns=['NucleusId', 'ContractorId', 'LabourName', 'ContractorName',
+                                               'Amount', 'IsPaid'])
+        existing = existing.drop_duplicates('NucleusId', keep='last').set_index('NucleusId')
+        existing['ContractorId'] = pd.to_numeric(existing['ContractorId'], errors='coerce').astype('Int64')
+        existing['Amount'] = pd.to_numeric(existing['Amount'], errors='coerce').fillna(0.0).astype(float)
+        existing['IsPaid'] = existing['IsPaid'].astype(bool)
+        return existing
+
+    @staticmethod
+    def _apply(cursor, rows: pd.DataFrame, existing: pd.DataFrame, batch_id: int, unit_id: int,
+               created_by: int, now: datetime, result: WagesImportResult) -> None:
+        """Insert new labour codes and update changed unpaid ones"""
+        known = rows['NucleusId'].isin(existing.index)
+        new_rows = rows[~known]
+        matched = rows[known].join(existing, on='NucleusId', rsuffix='Old')
+
+        changed = (
+            ((matched['Amount'] - matched['AmountOld']).abs() > 0.005)
+            | (matched['ContractorId'].fillna(-1) != matched['ContractorIdOld'].fillna(-1))
+        )
+        paid_changed = changed & matched['IsPaid']
+        to_update = matched[changed & ~matched['IsPaid']]
+        result.unchanged += int((~changed).sum())
+        result.flagged[PAID_CHANGED].extend(matched.loc[paid_changed, 'NucleusId'].tolist())
+
+        inserts = [
+            (int(r.NucleusId), None if pd.isna(r.ContractorId) else int(r.ContractorId), r.LabourName,
+             r.ContractorName, float(r.Amount), unit_id, batch_id, 0, created_by, now)
+            for r in new_rows.itertuples(index=False)
+        ]
+        for start in range(0, len(inserts), INSERT_BATCH_SIZE):
+            cursor.executemany("""
+                INSERT INTO WagesUpload (
+                    NucleusId, ContractorId, LabourName, ContractorName, Amount, UnitId, BatchId, IsPaid, CreatedBy, CreatedAt
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, inserts[start:start + INSERT_BATCH_SIZE])
+        result.inserted += len(inserts)
+
+        updates = [
+            (None if pd.isna(r.ContractorId) else int(r.ContractorId), r.LabourName, r.ContractorName,
+             float(r.Amount), created_by, now, batch_id, int(r.NucleusId))
+            for r in to_update.itertuples(index=False)
+        ]
+        for start in range(0, len(updates), INSERT_BATCH_SIZE):
+            cursor.executemany("""
+                UPDATE WagesUpload
+                SET ContractorId = ?, LabourName = ?, ContractorName = ?, Amount = ?, UpdatedBy = ?, UpdatedAt = ?
+                WHERE BatchId = ? AND NucleusId = ?
+                  AND (IsPaid = 0 OR IsPaid IS NULL)
+            """, updates[start:start + INSERT_BATCH_SIZE])
+        result.updated += len(updates)
+
+    @staticmethod
+    def _remove_missing(cursor, existing: pd.DataFrame, seen: set, batch_id: int,
+                        result: WagesImportResult) -> None:
+        """Delete unpaid batch rows whose labour code is no longer in the sheet; paid ones are only flagged"""
+        missing = existing[~existing.index.isin(list(seen))]
+        result.flagged[PAID_REMOVED].extend(int(n) for n in missing.index[missing['IsPaid']])
+
+        deletes = [(batch_id, int(n)) for n in missing.index[~missing['IsPaid']]]
+        for start in range(0, len(deletes), INSERT_BATCH_SIZE):
+            cursor.executemany("""
+                DELETE FROM WagesUpload
+                WHERE BatchId = ? AND NucleusId = ?
+                  AND (IsPaid = 0 OR IsPaid IS NULL)
+            """, deletes[start:start + INSERT_BATCH_SIZE])
+        result.removed += len(deletes)
+
+    @staticmethod
+    def _record_upload(cursor, unit_id: int, now: datetime, content_hash: Optional[str], created_by: int,
+                       result: WagesImportResult) -> None:
+        cursor.execute("""
+            INSERT INTO WagesUploadHistory (
+                UnitId, BatchDate, ContentHash, RowsInserted, RowsUpdated, RowsRemoved, RowsSkipped, CreatedBy, CreatedAt
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (unit_id, now.date(), content_hash, result.inserted, result.updated, result.removed,
+              result.skipped, created_by, now))
@@ -2,7 +2,7 @@ from flask import render_template, flash
 import logging
 from . import hr_bp
 from app.auth.decorators import require_auth, require_role
-from app.database import DatabaseManager
+from app.database.dashboard_stats import dashboard_stats, empty_stats
 
 logger = logging.getLogger(__name__)
 
@@ -12,16 +12,9 @@ logger = logging.getLogger(__name__)
 def dashboard():
     """dashboard with employee management"""
     try:
-        stats = {
-            'total_employees': DatabaseManager.execute_query("SELECT COUNT(*) FROM Employee", fetch_one=True),
-            'active_employees': DatabaseManager.execute_query("SELECT COUNT(*) FROM Employee WHERE IsActive = 1", fetch_one=True)
-        }
-        
-        stats = {k: v[0] if v else 0 for k, v in stats.items()}
-        
-        return render_template('hr/dashboard.html', stats=stats)
+        return render_template('hr/dashboard.html', stats=dashboard_stats.get())
     
     except Exception as e:
         logger.error(f"Error in dashboard: {e}")
         flash('Error loading dashboard data.', 'error')
-        return render_template('hr/dashboard.html', stats={'total_employees': 0, 'active_employees': 0})
\ No newline at end of file
+        return render_template('hr/dashboard.html', stats=empty_stats())
@@ -0,0 +1,62 @@
+"""On-disk cache of resized image variants keyed by content hash"""
+
+import os
+import logging
+import tempfile
+from typing import Callable, Optional
+
+from app.face.config import ImageIngestConfig
+from app.face.image_ingest import decode_image, downscale, encode_image
+
+logger = logging.getLogger(__name__)
+
+# Long-side cap per variant; None keeps the stored photo as is
+VARIANTS = {
+    'thumb': 96,
+    'medium': 320,
+    'original': None,
+}
+
+def render_variant(image_data: bytes, variant: str) -> bytes:
+    """Resize stored photo bytes to a variant"""
+    max_side = VARIANTS[variant]
+    if max_side is None:
+        return image_data
+    config = ImageIngestConfig()
+    return encode_image(downscale(decode_image(image_data), max_side), config)
+
+class DerivativeCache:
+    """Variants stored as <dir>/<variant>/<hash[:2]>/<hash>; a new photo gets a new hash, so entries never go stale"""
+
+    def __init__(self, directory: str):
+        # Absolute, since send_file resolves relative paths against the app package
+        self.directory = os.path.abspath(directory)
+
+    def path(self, content_hash: str, variant: str) -> str:
+        return os.path.join(self.directory, variant, content_hash[:2], content_hash)
+
+    def get(self, content_hash: str, variant: str) -> Optional[str]:
+        path = self.path(content_hash, variant)
+        return path if os.path.exists(path) else None
+
+    def get_or_create(self, content_hash: str, variant: str, loader: Callable[[], bytes]) -> str:
+        """Path of the cached variant, rendering it from loader() on a miss"""
+        path = self.get(content_hash, variant)
+        if path:
+            return path
+
+        path = self.path(content_hash, variant)
+        data = render_variant(loader(), variant)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file then rename, so concurrent requests never serve a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
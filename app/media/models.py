@@ -0,0 +1,55 @@
+"""Image lookups for the media endpoints"""
+
+import logging
+from typing import Optional, Tuple
+from app.database import DatabaseManager
+from app.database.blob_store import load_image
+
+logger = logging.getLogger(__name__)
+
+class MediaModel:
+    @staticmethod
+    def get_employee_image_hash(nucleus_id: int) -> Optional[str]:
+        """SHA-256 of the stored employee photo: the blob store hash, or computed by SQL Server without sending the blob"""
+        row = DatabaseManager.execute_query("""
+            SELECT COALESCE(ImageHash, CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', Image), 2))
+            FROM Employee
+            WHERE NucleusId = ? AND (ImageHash IS NOT NULL OR DATALENGTH(Image) > 0)
+        """, (nucleus_id,), fetch_one=True)
+        return row[0].strip().lower() if row and row[0] else None
+
+    @staticmethod
+    def get_employee_image(nucleus_id: int) -> Optional[Tuple[str, bytes]]:
+        """(hash, image bytes) of the stored employee photo"""
+        row = DatabaseManager.execute_query("""
+            SELECT COALESCE(ImageHash, CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', Image), 2)), Image, ImageHash
+            FROM Employee
+            WHERE NucleusId = ? AND (ImageHash IS NOT NULL OR DATALENGTH(Image) > 0)
+        """, (nucleus_id,), fetch_one=True)
+        if not row:
+            return None
+        image = load_image(row[1], row[2])
+        return (row[0].strip().lower(), image) if image else None
+
+    @staticmethod
+    def get_contractor_image_hash(contractor_id: int) -> Optional[str]:
+        """SHA-256 of the stored contractor photo: the blob store hash, or computed by SQL Server without sending the blob"""
+        row = DatabaseManager.execute_query("""
+            SELECT COALESCE(ImageHash, CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', Image), 2))
+            FROM Contractor
+            WHERE Id = ? AND (ImageHash IS NOT NULL OR DATALENGTH(Image) > 0)
+        """, (contractor_id,), fetch_one=True)
+        return row[0].strip().lower() if row and row[0] else None
+
+    @staticmethod
+    def get_contractor_image(contractor_id: int) -> Optional[Tuple[str, bytes]]:
+        """(hash, image bytes) of the stored contractor photo"""
+        row = DatabaseManager.execute_query("""
+            SELECT COALESCE(ImageHash, CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', Image), 2)), Image, ImageHash
+            FROM Contractor
+            WHERE Id = ? AND (ImageHash IS NOT NULL OR DATALENGTH(Image) > 0)
+        """, (contractor_id,), fetch_one=True)
+        if not row:
+            return None
+        image = load_image(row[1], row[2])
+        return (row[0].strip().lower(), image) if image else None
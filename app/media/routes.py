@@ -0,0 +1,103 @@
+from flask import Response, abort, current_app, request, send_file, url_for
+import logging
+from werkzeug.exceptions import HTTPException
+from . import media_bp
+from .models import MediaModel
+from .derivatives import VARIANTS, DerivativeCache
+from app.auth.decorators import require_auth
+from app.database.blob_store import get_blob_store
+
+logger = logging.getLogger(__name__)
+
+def employee_image_url(nucleus_id, variant='medium'):
+    """URL of an employee photo variant, for JSON APIs and templates"""
+    return url_for('media.employee_image', nucleus_id=int(nucleus_id), variant=variant)
+
+def guess_mimetype(header: bytes) -> str:
+    if header.startswith(b'\x89PNG'):
+        return 'image/png'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    if header.startswith(b'BM'):
+        return 'image/bmp'
+    return 'image/jpeg'
+
+def cache_control(response: Response) -> Response:
+    max_age = current_app.config.get('MEDIA_CACHE_MAX_AGE', 0)
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+def serve_variant(label, variant, get_hash, get_image):
+    """Serve a photo variant with a content-hash ETag; unchanged photos cost a 304"""
+    if variant not in VARIANTS:
+        abort(404)
+
+    try:
+        content_hash = get_hash()
+    except Exception as e:
+        logger.error(f"Error reading image hash for {label}: {e}")
+        abort(500)
+    if not content_hash:
+        abort(404)
+
+    etag = f"{content_hash}-{variant}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return cache_control(response)
+
+    store = get_blob_store()
+
+    def load_image():
+        # Content-addressed, so a blob with this hash is the photo whichever row it came from
+        mapped = store.read(content_hash) if store is not None else None
+        if mapped is not None:
+            return mapped
+        found = get_image()
+        if not found:
+            abort(404)
+        return found[1]
+
+    try:
+        if variant == 'original' and store is not None and store.exists(content_hash):
+            # Stored photos are served straight from the blob store file
+            path = store.path(content_hash)
+        else:
+            cache = DerivativeCache(current_app.config['MEDIA_CACHE_DIR'])
+            path = cache.get_or_create(content_hash, variant, load_image)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rendering {variant} image for {label}: {e}")
+        abort(500)
+
+    with open(path, 'rb') as f:
+        mimetype = guess_mimetype(f.read(12))
+
+    response = send_file(path, mimetype=mimetype, conditional=False, etag=False)
+    response.set_etag(etag)
+    return cache_control(response)
+
+@media_bp.route('/employee/<int:nucleus_id>/<variant>')
+@require_auth
+def employee_image(nucleus_id, variant):
+    """Employee photo variant"""
+    return serve_variant(
+        f"NucleusId {nucleus_id}", variant,
+        lambda: MediaModel.get_employee_image_hash(nucleus_id),
+        lambda: MediaModel.get_employee_image(nucleus_id)
+    )
+
+@media_bp.route('/contractor/<int:contractor_id>/<variant>')
+@require_auth
+def contractor_image(contractor_id, variant):
+    """Contractor photo variant (keyed by Contractor.Id)"""
+    return serve_variant(
+        f"contractor {contractor_id}", variant,
+        lambda: MediaModel.get_contractor_image_hash(contractor_id),
+        lambda: MediaModel.get_contractor_image(contractor_id)
+    )
@@ -1,4 +1,5 @@
 from app.database import DatabaseManager
+from app.auth.user_cache import user_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,19 +25,27 @@ class UserModel:
     @staticmethod
     def create(UserData):
         """Create new user"""
-        return DatabaseManager.execute_query(
+        success = DatabaseManager.execute_query(
             "INSERT INTO [User] (FirstName, LastName, Email, Password, Type, IsActive) VALUES (?, ?, ?, ?, ?, ?)",
             (UserData['FirstName'], UserData['LastName'], UserData['Email'], UserData['Password'], UserData['UserType'], UserData['IsActive'])
         )
+        if success:
+            user_cache.invalidate()
+        return success
         
   # In your UserModel class (users/models.py)
 
 
     @staticmethod
     def delete(user_id):
-            """Delete user by ID"""
-            rows_affected = DatabaseManager.execute_query(
-                "DELETE FROM [User] WHERE Id = ?",
-                (user_id,)
-            )
+            """Delete user by ID; committed right away so other workers cannot re-cache the user"""
+            try:
+                with DatabaseManager.transaction() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("DELETE FROM [User] WHERE Id = ?", (user_id,))
+                    rows_affected = cursor.rowcount
+            except Exception as e:
+                logger.error(f"Error deleting user {user_id}: {e}")
+                return False
+            user_cache.invalidate(user_id)
             return rows_affected > 0
@@ -18,9 +18,19 @@ class Config:
             f"DATABASE={self.DB_NAME};"
             f"UID={self.DB_USERNAME};"
             f"PWD={self.DB_PASSWORD};"
-            "Encrypt=yes;TrustServerCertificate=yes"
+            "Encrypt=yes;TrustServerCertificate=yes;"
+            # One connection serves a whole request, so several cursors may be open at once
+            "MARS_Connection=yes"
         )
 
+    # Connection pool (per process)
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', 300))  # close idle connections above min size after this
+    DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800))
+    DB_POOL_CHECK_INTERVAL = float(os.environ.get('DB_POOL_CHECK_INTERVAL', 30))  # ping on checkout after this much idle time
+
     def log_configuration(self, log_path='logs/config.txt'):
         try:
             os.makedirs(os.path.dirname(log_path), exist_ok=True)
@@ -47,7 +57,33 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     
     # Application Configuration
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16MB max file upload by default, raise for bulk photo archives
+
+    # Wages uploads run on background threads; finished jobs are kept this long for polling
+    WAGES_UPLOAD_WORKERS = int(os.environ.get('WAGES_UPLOAD_WORKERS', 2))
+    WAGES_UPLOAD_JOB_TTL = int(os.environ.get('WAGES_UPLOAD_JOB_TTL', 3600))
+    WAGES_REFERENCE_CACHE_TTL = float(os.environ.get('WAGES_REFERENCE_CACHE_TTL', 60))  # contractor/labour ids used by the upload preview
+
+    # In-memory snapshot of each unit's current wage batch for the cashier pages
+    WAGE_SNAPSHOT_TTL = float(os.environ.get('WAGE_SNAPSHOT_TTL', 300))
+    WAGE_SNAPSHOT_VERSION_FILE = os.environ.get('WAGE_SNAPSHOT_VERSION_FILE', os.path.join('logs', 'wage_snapshot.version'))
+
+    # Typeahead employee search (in-memory index over active employees)
+    EMPLOYEE_SEARCH_LIMIT = int(os.environ.get('EMPLOYEE_SEARCH_LIMIT', 10))
+    EMPLOYEE_SEARCH_VERSION_FILE = os.environ.get('EMPLOYEE_SEARCH_VERSION_FILE', os.path.join('logs', 'employee_search.version'))
+
+    # Dashboard figures, reloaded in the background once older than this
+    DASHBOARD_STATS_TTL = float(os.environ.get('DASHBOARD_STATS_TTL', 30))
+
+    # Authenticated user lookups cached by require_auth
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+    USER_CACHE_VERSION_FILE = os.environ.get('USER_CACHE_VERSION_FILE', os.path.join('logs', 'user_cache.version'))
+
+    # Media Configuration (employee photo variants)
+    MEDIA_CACHE_DIR = os.environ.get('MEDIA_CACHE_DIR', os.path.join('cache', 'media'))
+    MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 0))  # seconds; 0 = always revalidate with the ETag
+    BLOB_STORE_ENABLED = os.environ.get('BLOB_STORE_ENABLED', 'False').lower() == 'true'  # keep new photos on disk, only the hash in the DB
+    BLOB_STORE_DIR = os.environ.get('BLOB_STORE_DIR', 'blobs')
     
 
 class DevelopmentConfig(Config):
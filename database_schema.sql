@@ -61,4 +61,104 @@ INSERT INTO [Employee] (Name, FatherName, PhoneNo, Address, ContractorId, IsActi
 -- Create indexes for better performance
 CREATE INDEX IX_Employee_ContractorId ON Employee(ContractorId);
 CREATE INDEX IX_User_Email ON [User](Email);
-GO
\ No newline at end of file
+GO
+-- Additional reference face encodings per employee (multi-template enrollment).
+-- Encoding holds 128 float64 values (1024 bytes) as produced by face_recognition.
+CREATE TABLE [dbo].[EmployeeFaceTemplate](
+    [Id] [int] IDENTITY(1,1) NOT NULL,
+    [NucleusId] [int] NOT NULL,
+    [Encoding] [varbinary](1024) NOT NULL,
+    [Source] [nvarchar](20) NOT NULL DEFAULT('upload'),
+    [CreatedBy] [int] NULL,
+    [CreatedAt] [datetime] NOT NULL DEFAULT(GETDATE()),
+    CONSTRAINT [PK_EmployeeFaceTemplate] PRIMARY KEY CLUSTERED ([Id] ASC)
+)
+GO
+
+CREATE INDEX IX_EmployeeFaceTemplate_NucleusId ON EmployeeFaceTemplate(NucleusId, CreatedAt);
+GO
+
+-- Optional eye-aligned face crop stored alongside the normalized profile photo
+-- (written only when STORE_FACE_CROP=true).
+ALTER TABLE [dbo].[Employee] ADD [FaceCrop] [varbinary](max) NULL;
+GO
+
+-- Content hash of photos kept in the on-disk blob store (BLOB_STORE_ENABLED=true).
+-- Rows with ImageHash set keep Image NULL; see app/database/blob_store.py.
+ALTER TABLE [dbo].[Employee] ADD [ImageHash] [char](64) NULL;
+ALTER TABLE [dbo].[Contractor] ADD [ImageHash] [char](64) NULL;
+GO
+
+-- One row per applied wages upload. ContentHash (SHA-256 of the uploaded file)
+-- lets a repeated upload of the same sheet for the same unit and day be skipped.
+CREATE TABLE [dbo].[WagesUploadHistory](
+    [Id] [int] IDENTITY(1,1) NOT NULL,
+    [UnitId] [int] NOT NULL,
+    [BatchDate] [date] NOT NULL,
+    [ContentHash] [char](64) NULL,
+    [RowsInserted] [int] NOT NULL DEFAULT(0),
+    [RowsUpdated] [int] NOT NULL DEFAULT(0),
+    [RowsRemoved] [int] NOT NULL DEFAULT(0),
+    [RowsSkipped] [int] NOT NULL DEFAULT(0),
+    [CreatedBy] [int] NULL,
+    [CreatedAt] [datetime] NOT NULL DEFAULT(GETDATE()),
+    CONSTRAINT [PK_WagesUploadHistory] PRIMARY KEY CLUSTERED ([Id] ASC)
+)
+GO
+
+CREATE INDEX IX_WagesUploadHistory_Unit_BatchDate ON WagesUploadHistory(UnitId, BatchDate, Id);
+GO
+
+-- Wage batches: one per unit and payday. WagesUpload rows point at their batch
+-- through BatchId so "latest batch" lookups are index seeks instead of
+-- CAST(CreatedAt AS DATE) scans over the whole history.
+CREATE TABLE [dbo].[WageBatch](
+    [Id] [int] IDENTITY(1,1) NOT NULL,
+    [UnitId] [int] NOT NULL,
+    [BatchDate] [date] NOT NULL,
+    [CreatedBy] [int] NULL,
+    [CreatedAt] [datetime] NOT NULL DEFAULT(GETDATE()),
+    CONSTRAINT [PK_WageBatch] PRIMARY KEY CLUSTERED ([Id] ASC),
+    CONSTRAINT [UQ_WageBatch_Unit_BatchDate] UNIQUE ([UnitId], [BatchDate])
+)
+GO
+
+ALTER TABLE [dbo].[WagesUpload] ADD [BatchId] [int] NULL;
+GO
+
+-- Migration: one batch per (UnitId, day) already in WagesUpload, then link the rows
+INSERT INTO WageBatch (UnitId, BatchDate, CreatedAt)
+SELECT wu.UnitId, CAST(wu.CreatedAt AS DATE), MIN(wu.CreatedAt)
+FROM WagesUpload wu
+WHERE NOT EXISTS (
+    SELECT 1 FROM WageBatch wb
+    WHERE wb.UnitId = wu.UnitId AND wb.BatchDate = CAST(wu.CreatedAt AS DATE)
+)
+GROUP BY wu.UnitId, CAST(wu.CreatedAt AS DATE);
+GO
+
+UPDATE wu SET BatchId = wb.Id
+FROM WagesUpload wu
+INNER JOIN WageBatch wb ON wb.UnitId = wu.UnitId AND wb.BatchDate = CAST(wu.CreatedAt AS DATE)
+WHERE wu.BatchId IS NULL;
+GO
+
+ALTER TABLE [dbo].[WagesUpload] ADD CONSTRAINT [FK_WagesUpload_WageBatch]
+    FOREIGN KEY ([BatchId]) REFERENCES [dbo].[WageBatch]([Id]);
+GO
+
+-- Batch pages and per-employee lookups within a batch
+CREATE INDEX IX_WagesUpload_Batch_Nucleus ON WagesUpload(BatchId, NucleusId)
+    INCLUDE (UnitId, ContractorId, LabourName, ContractorName, Amount, IsPaid, VerifyType, CreatedAt, UpdatedAt);
+-- Unpaid / paid lists of a batch
+CREATE INDEX IX_WagesUpload_Batch_IsPaid ON WagesUpload(BatchId, IsPaid)
+    INCLUDE (UnitId, NucleusId, LabourName, ContractorName, Amount, UpdatedAt);
+-- "Latest batch containing this employee" lookups
+CREATE INDEX IX_WagesUpload_Nucleus_Batch ON WagesUpload(NucleusId, BatchId)
+    INCLUDE (UnitId, IsPaid);
+GO
+
+-- Keyset pages of a unit's unpaid rows across all batches (ordered by Id)
+CREATE INDEX IX_WagesUpload_Unit_IsPaid_Id ON WagesUpload(UnitId, IsPaid, Id)
+    INCLUDE (NucleusId, ContractorId, LabourName, ContractorName, Amount, BatchId, CreatedAt);
+GO
@@ -0,0 +1,31 @@
+// Server-side DataTables listing: paging, sorting and search are answered by the
+// endpoint (app/database/listing.py). The cursor returned with a page is sent back
+// with the next request, so reading the following page is a keyset seek rather
+// than an OFFSET; the server ignores it for any other page.
+function serverDataTable(selector, options) {
+  const settings = $.extend({}, options);
+  const url = settings.url;
+  const params = settings.params;
+  delete settings.url;
+  delete settings.params;
+  let cursor = null;
+
+  return $(selector).DataTable($.extend({
+    serverSide: true,
+    processing: true,
+    searchDelay: 400,
+    pageLength: 25,
+    lengthMenu: [[10, 25, 50, 100], [10, 25, 50, 100]],
+    ajax: {
+      url: url,
+      data: function (d) {
+        if (cursor) d.cursor = cursor;
+        if (params) $.extend(d, params());
+      },
+      dataSrc: function (json) {
+        cursor = json.cursor || null;
+        return json.data;
+      }
+    }
+  }, settings));
+}